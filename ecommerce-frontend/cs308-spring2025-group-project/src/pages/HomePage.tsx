@@ -13,7 +13,7 @@ import { motion } from "framer-motion";
 import ArrowForwardRoundedIcon from "@mui/icons-material/ArrowForwardRounded";
 import Navbar from "../components/Navbar";
 import { useNavigate } from "react-router-dom";
-import axios from "axios";
+import { getAllPages } from "../utils/pagination";
 
 const fadeIn = {
   hidden: { opacity: 0, y: 40 },
@@ -29,9 +29,8 @@ const HomePage: React.FC = () => {
   const [products, setProducts] = useState<any[]>([]);
 
   useEffect(() => {
-    axios
-      .get("http://localhost:8000/api/products/")
-      .then((res) => setProducts(res.data))
+    getAllPages<any>("http://localhost:8000/api/products/")
+      .then(setProducts)
       .catch((err) => console.error("Failed to fetch products", err));
   }, []);
 
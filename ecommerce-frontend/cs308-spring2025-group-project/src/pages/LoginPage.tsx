@@ -29,6 +29,7 @@ function LoginPage() {
       const response = await fetch("http://localhost:8000/api/token/", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
+        credentials: "include", // session cookie lets the backend merge the guest cart
         body: JSON.stringify({ username, password }),
       });
 
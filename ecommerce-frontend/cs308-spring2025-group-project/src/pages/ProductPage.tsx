@@ -27,6 +27,7 @@ import FavoriteBorderIcon from "@mui/icons-material/FavoriteBorder";
 import FavoriteIcon from "@mui/icons-material/Favorite";
 import AddToCartButton from "../components/AddToCartButton";
 import axios from "axios";
+import { getAllPages } from "../utils/pagination";
 import { useWishlist } from "../context/WishlistContext";
 
 interface Product {
@@ -71,10 +72,9 @@ const ProductPage: React.FC = () => {
 
   useEffect(() => {
     // fetch products
-    axios
-      .get("/api/products/?ordering=-ordered_number")
-      .then((res) => {
-        const list = (res.data as any[]).map((p) => ({
+    getAllPages<any>("/api/products/?ordering=-ordered_number")
+      .then((data) => {
+        const list = data.map((p) => ({
           ...p,
           price: parseFloat(p.price),
           discount_percent: parseFloat(p.discount_percent),
@@ -28,6 +28,7 @@ import {
   Close as CloseIcon,
   DoneAll as DoneAllIcon,
 } from "@mui/icons-material";
+import { fetchAllPages } from "../utils/pagination";
 import RefundModal from "../components/RefundModal";
 import { styled } from "@mui/material/styles";
 import { useNavigate } from "react-router-dom";
@@ -425,9 +426,8 @@ const ProfilePage: React.FC = () => {
   useEffect(() => {
     if (!isAuthenticated) return;
     const token = localStorage.getItem("access_token");
-    fetch("http://127.0.0.1:8000/api/orders/mine/", { headers: { Authorization: `Bearer ${token}` } })
-      .then(res => res.ok ? res.json() : Promise.reject("Cannot load orders"))
-      .then((data: any[]) => {
+    fetchAllPages<any>("http://127.0.0.1:8000/api/orders/mine/", { headers: { Authorization: `Bearer ${token}` } })
+      .then(data => {
         const list = data.map(o => {
           const displayStatus = o.status === "Shipped" ? "In Transit" : o.status;
           const createdAtDate = new Date(o.created_at);
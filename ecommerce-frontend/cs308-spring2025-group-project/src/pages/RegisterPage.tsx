@@ -20,6 +20,7 @@ function RegisterPage() {
       const response = await fetch("http://localhost:8000/api/register/", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
+        credentials: "include", // session cookie lets the backend merge the guest cart
         body: JSON.stringify({ username: name, password, email }),
       });
 
@@ -14,6 +14,7 @@ import {
   Button,
 } from '@mui/material';
 import { useNavigate } from 'react-router-dom';
+import { fetchAllPages } from '../utils/pagination';
 
 interface Transaction {
   id: number;
@@ -32,17 +33,12 @@ const TransactionHistoryPage: React.FC = () => {
     const fetchTxs = async () => {
       const token = localStorage.getItem('access_token');
       try {
-        const res = await fetch('http://localhost:8000/api/payment/transactions/', {
+        const data = await fetchAllPages<Transaction>('http://localhost:8000/api/payment/transactions/', {
           headers: {
             'Content-Type': 'application/json',
             Authorization: `Bearer ${token}`,
           },
         });
-        if (!res.ok) {
-          const payload = await res.json();
-          throw new Error(payload.detail || 'Failed to load transactions');
-        }
-        const data: Transaction[] = await res.json();
         setTxs(data);
       } catch (e: any) {
         setError(e.message);
@@ -1,6 +1,7 @@
 // src/pages/admin/CommentsPage.tsx
 import React, { useEffect, useState } from "react";
 import axios from "axios";
+import { getAllPages } from "../../utils/pagination";
 import {
   Box,
   Typography,
@@ -27,11 +28,11 @@ const CommentsPage: React.FC = () => {
 
   const fetchPending = async () => {
     try {
-      const res = await axios.get<PendingReview[]>(
+      const pending = await getAllPages<PendingReview>(
         "http://localhost:8000/api/reviews/pending/",
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      setComments(res.data);
+      setComments(pending);
     } finally {
       setLoading(false);
     }
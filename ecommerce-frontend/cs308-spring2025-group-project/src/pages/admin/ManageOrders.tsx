@@ -14,6 +14,7 @@ import {
   MenuItem,
 } from "@mui/material";
 import DeleteIcon from "@mui/icons-material/Delete";
+import { fetchAllPages } from "../../utils/pagination";
 
 interface RawOrder {
   id:                       number;
@@ -59,18 +60,14 @@ const ManageOrders: React.FC = () => {
       return;
     }
 
-    fetch("http://127.0.0.1:8000/api/orders/", {
+    fetchAllPages<RawOrder>("http://127.0.0.1:8000/api/orders/", {
       method: "GET",
       headers: {
         "Content-Type":  "application/json",
         "Authorization": `Bearer ${token}`,
       },
     })
-      .then((res) => {
-        if (!res.ok) throw new Error(`Failed to load orders (${res.status})`);
-        return res.json();
-      })
-      .then((data: RawOrder[]) => {
+      .then((data) => {
         const formatted: Order[] = data.map((o) => {
           // pick a numeric customer ID from whichever field exists
           const customerId: number =
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { getCookie } from "../../utils/cookies";
 import axios from "axios";
+import { getAllPages } from "../../utils/pagination";
 import { useNavigate } from "react-router-dom";
 import {
   Container,
@@ -42,9 +43,8 @@ const ManageProducts: React.FC<ManageProductsProps> = ({ panel }) => {
   const basePath = "/product-manager";
   
   useEffect(() => {
-    axios
-      .get<Product[]>("http://127.0.0.1:8000/api/products/")
-      .then((res) => setProducts(res.data))
+    getAllPages<Product>("http://127.0.0.1:8000/api/products/")
+      .then(setProducts)
       .catch((err) => console.error("Error fetching products:", err));
   }, []);
 
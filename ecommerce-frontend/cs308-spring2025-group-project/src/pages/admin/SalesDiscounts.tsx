@@ -14,6 +14,7 @@ import {
   Chip,
 } from "@mui/material";
 import axios from "axios";
+import { getAllPages } from "../../utils/pagination";
 
 interface Product {
   slug: string;
@@ -35,11 +36,10 @@ const SalesDiscounts: React.FC = () => {
 
   // 1) load every product
   useEffect(() => {
-    axios
-      .get<Product[]>("/api/products/")
-      .then((res) =>
+    getAllPages<Product>("/api/products/")
+      .then((data) =>
         setProducts(
-          res.data.map((p: any) => ({
+          data.map((p: any) => ({
             ...p,
             price: parseFloat(p.price),
             discount_percent: parseFloat(p.discount_percent),
@@ -12,6 +12,7 @@ import {
   Alert,
 } from "@mui/material";
 import Navbar from "../../components/Navbar";
+import { fetchAllPages } from "../../utils/pagination";
 
 interface RefundRequest {
   id: number;
@@ -40,11 +41,10 @@ const SalesManagerRefundPage: React.FC = () => {
   const fetchRequests = async () => {
     const token = localStorage.getItem("access_token");
     try {
-      const res = await fetch(
+      const data = await fetchAllPages<RefundRequest>(
         "http://localhost:8000/api/orders/refund-requests/pending/",
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      const data = await res.json();
       setRequests(data);
     } catch {
       setSnackbar({
@@ -0,0 +1,43 @@
+// List endpoints return one page as a plain JSON array and point at the
+// next page with a `Link: <url>; rel="next"` header (keyset pagination).
+// These helpers follow that header until the last page.
+import axios, { AxiosRequestConfig } from "axios";
+
+export function nextPageUrl(link: string | null | undefined): string | null {
+  if (!link) return null;
+  for (const part of link.split(",")) {
+    const [url, ...params] = part.split(";");
+    if (params.some((p) => p.trim() === 'rel="next"')) {
+      return url.trim().replace(/^<|>$/g, "");
+    }
+  }
+  return null;
+}
+
+// every page of a list endpoint, concatenated, via fetch()
+export async function fetchAllPages<T>(url: string, init?: RequestInit): Promise<T[]> {
+  const items: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const res: Response = await fetch(next, init);
+    if (!res.ok) {
+      const payload = await res.json().catch(() => ({}));
+      throw new Error(payload.detail || `Request failed (${res.status})`);
+    }
+    items.push(...((await res.json()) as T[]));
+    next = nextPageUrl(res.headers.get("Link"));
+  }
+  return items;
+}
+
+// the same for axios callers; relative URLs resolve against axios.defaults.baseURL
+export async function getAllPages<T>(url: string, config?: AxiosRequestConfig): Promise<T[]> {
+  const items: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const res = await axios.get<T[]>(next, config);
+    items.push(...res.data);
+    next = nextPageUrl(res.headers["link"] as string | undefined);
+  }
+  return items;
+}
@@ -1,12 +1,15 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 class AdminPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_panel'
 
     def ready(self):
-        from .models import Genre
+        from .catalog_cache import invalidate_on_change
+        from .models import Genre, Product
+        from .search import get_search_backend
 
         def create_defaults(sender, **kwargs):
             default_names = [
@@ -20,4 +23,14 @@ class AdminPanelConfig(AppConfig):
             for name in default_names:
                 Genre.objects.get_or_create(name=name)
 
-        post_migrate.connect(create_defaults, sender=self)
\ No newline at end of file
+        def install_search_index(sender, using="default", **kwargs):
+            # idempotent; restores the index triggers if a migration rebuilt the product table
+            get_search_backend(connections[using]).install()
+
+        post_migrate.connect(create_defaults, sender=self)
+        post_migrate.connect(install_search_index, sender=self)
+
+        # cached catalog responses embed product and genre rows
+        for model in (Product, Genre):
+            post_save.connect(invalidate_on_change, sender=model, dispatch_uid=f"catalog-cache-save-{model.__name__}")
+            post_delete.connect(invalidate_on_change, sender=model, dispatch_uid=f"catalog-cache-delete-{model.__name__}")
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Versioned response cache for the public catalog reads.
+
+GET /api/products/, /api/products/<slug>/ and product_detail_by_slug are
+cached in the default cache under a key built from the catalog generation,
+the host and the request's path and query parameters. Writes never delete
+entries: bump_generation() moves every reader to a new generation, and the
+old entries age out after CATALOG_CACHE_SECONDS. The generation is bumped by
+Product/Genre saves and deletes (see AdminPanelConfig.ready), by the
+set_price, set_discount and adjust_stock actions, and by rating changes when
+a review is approved or rejected.
+
+On a miss only one process recomputes a given key; the others wait up to
+CATALOG_CACHE_WAIT_SECONDS for its result instead of all querying at once.
+Every stored response gets an ETag, kept next to it, so a client whose
+If-None-Match still matches gets a 304 without the body being fetched.
+Hits, misses and 304s are counted in the cache as well (see stats()).
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from e_commerce_app import conditional
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "catalog:generation"
+COUNTERS = ("hits", "misses", "waits", "not_modified")
+# headers a cached response must carry over (pagination links and totals)
+KEPT_HEADERS = ("Link", "X-Total-Count")
+
+
+def generation():
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # start from the clock, so an evicted counter never reuses an old generation's entries
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def bump_generation():
+    """
+    Invalidate every cached catalog response. Bumps now, so this process reads
+    its own write, and again on commit, so a reader that cached the old rows
+    between the two does not keep them.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def invalidate_on_change(sender, **kwargs):
+    """post_save / post_delete receiver for the models the catalog shows."""
+    if not kwargs.get("raw"):
+        bump_generation()
+
+
+def _count(name):
+    key = f"catalog:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    """Hit/miss counters since the cache was last cleared, and the hit ratio."""
+    counters = cache.get_many([f"catalog:{name}" for name in COUNTERS])
+    result = {name: counters.get(f"catalog:{name}", 0) for name in COUNTERS}
+    lookups = result["hits"] + result["misses"]
+    result["hit_ratio"] = result["hits"] / lookups if lookups else 0.0
+    result["generation"] = cache.get(GENERATION_KEY)
+    return result
+
+
+def cache_key(request, name):
+    params = sorted(request.query_params.lists())
+    raw = f"{request.scheme}://{request.get_host()}{request.path}|{params!r}"
+    return f"catalog:{generation()}:{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _to_response(entry, state):
+    data, headers = entry
+    response = Response(data)
+    for header, value in headers.items():
+        response[header] = value
+    response["Cache-Control"] = conditional.CACHE_CONTROL
+    response["X-Catalog-Cache"] = state
+    return response
+
+
+def cached_response(request, name, compute):
+    """
+    Serve `compute()` (a view returning a DRF Response) from the catalog cache;
+    `name` tells apart views that answer the same path.
+    Only successful responses are stored; anything else passes through.
+    """
+    key = cache_key(request, name)
+    if request.headers.get("If-None-Match"):
+        etag = cache.get(f"{key}:etag")
+        response = etag and conditional.not_modified(request, etag)
+        if response:
+            _count("not_modified")
+            return response
+
+    entry = cache.get(key)
+    if entry is not None:
+        _count("hits")
+        return _to_response(entry, "HIT")
+
+    _count("misses")
+    lock = f"{key}:lock"
+    if not cache.add(lock, True, settings.CATALOG_CACHE_LOCK_SECONDS):
+        # another request is computing this key: wait for its result
+        _count("waits")
+        deadline = time.monotonic() + settings.CATALOG_CACHE_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return _to_response(entry, "HIT")
+        logger.warning("Catalog cache: gave up waiting for %s, computing it here", key)
+        return compute()
+
+    try:
+        response = compute()
+        if response.status_code == status.HTTP_200_OK:
+            # the body may differ between generations and between recomputes
+            etag = conditional.etag_for(request, key, time.time_ns())
+            headers = {header: response[header] for header in KEPT_HEADERS if response.has_header(header)}
+            headers["ETag"] = etag
+            cache.set_many(
+                {key: (response.data, headers), f"{key}:etag": etag}, settings.CATALOG_CACHE_SECONDS
+            )
+            response["ETag"] = etag
+            response["Cache-Control"] = conditional.CACHE_CONTROL
+            response["X-Catalog-Cache"] = "MISS"
+        return response
+    finally:
+        cache.delete(lock)
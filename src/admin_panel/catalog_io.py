@@ -0,0 +1,326 @@
+"""
+Bulk catalog import and export (manage.py catalog_import / catalog_export).
+
+Imports stream CSV or JSONL rows, keyed by ISBN: rows whose ISBN is already
+in the catalog update that product, the rest are inserted. Rows are handled
+in chunks, one transaction each: one query finds which ISBNs exist, slugs
+come from one SlugAllocator loaded with the existing slugs up front, and the
+chunk is written by a single executemany'd INSERT ... ON CONFLICT (isbn) DO
+UPDATE (see _Upsert). Genres are resolved through an in-memory
+name -> id map and created on first sight. Invalid rows are skipped and
+reported with their line number.
+
+Exports stream `values_list(...).iterator()` rows in the same columns, so an
+export can be edited and imported back.
+"""
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from .catalog_cache import bump_generation
+from .models import Genre, Product, SlugAllocator, base_slug
+from .search import get_search_backend
+
+IMPORT_CHUNK_SIZE = 5000
+EXPORT_CHUNK_SIZE = 2000
+FORMATS = ("csv", "jsonl")
+
+# (column, Product lookup); "genre" is the genre's name
+COLUMNS = [
+    ("isbn", "isbn"),
+    ("title", "title"),
+    ("author", "author"),
+    ("genre", "genre__name"),
+    ("price", "price"),
+    ("discount_percent", "discount_percent"),
+    ("cost_price", "cost_price"),
+    ("stock", "stock"),
+    ("description", "description"),
+    ("publisher", "publisher"),
+    ("publication_date", "publication_date"),
+    ("pages", "pages"),
+    ("language", "language"),
+    ("cover_image", "cover_image"),
+]
+REQUIRED = ("isbn", "title", "author", "genre", "stock", "publication_date", "pages")
+# columns the upsert overwrites on products that already exist
+UPDATE_FIELDS = [
+    "title", "author", "genre", "price", "discount_percent", "cost_price", "stock", "description",
+    "publisher", "publication_date", "pages", "language", "cover_image", "slug",
+]
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportStats:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # (line number, message)
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+
+def normalize_isbn(value):
+    """The 13 digits of an ISBN-13, hyphens and spaces removed."""
+    isbn = (value or "").replace("-", "").replace(" ", "")
+    if not isbn.isdigit() or len(isbn) != 13:
+        raise RowError(f"ISBN must be exactly 13 digits, got {value!r}")
+    return isbn
+
+
+def _decimal(value, column, blank=None):
+    """`value` as a Decimal that fits Product.<column> (finite, max_digits/decimal_places)."""
+    if value in (None, ""):
+        return blank
+    field = Product._meta.get_field(column)
+    try:
+        return field.clean(str(value).strip(), None)
+    except ValidationError as exc:
+        raise RowError(f"{column}: {' '.join(exc.messages)} (got {value!r})") from None
+
+
+def _integer(value, column):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{column} is not an integer: {value!r}") from None
+    if number < 0:
+        raise RowError(f"{column} must not be negative, got {number}")
+    return number
+
+
+def parse_row(row):
+    """Validated Product field values for one input row (genre still a name)."""
+    missing = [column for column in REQUIRED if row.get(column) in (None, "")]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    try:
+        published = date.fromisoformat(str(row["publication_date"]))
+    except ValueError:
+        raise RowError(f"publication_date is not YYYY-MM-DD: {row['publication_date']!r}") from None
+    discount = _decimal(row.get("discount_percent"), "discount_percent", Decimal("0"))
+    if not 0 <= discount <= 100:
+        raise RowError("discount_percent must be between 0 and 100")
+    price = _decimal(row.get("price"), "price")
+    cost_price = _decimal(row.get("cost_price"), "cost_price")
+    if any(value is not None and value < 0 for value in (price, cost_price)):
+        raise RowError("price and cost_price must not be negative")
+    return {
+        "isbn": normalize_isbn(str(row["isbn"])),
+        "title": str(row["title"]).strip(),
+        "author": str(row["author"]).strip(),
+        "genre": str(row["genre"]).strip(),
+        "price": price,
+        "discount_percent": discount,
+        "cost_price": cost_price,
+        "stock": _integer(row["stock"], "stock"),
+        "description": row.get("description") or "",
+        "publisher": row.get("publisher") or "",
+        "publication_date": published,
+        "pages": _integer(row["pages"], "pages"),
+        "language": row.get("language") or "",
+        "cover_image": row.get("cover_image") or "",
+    }
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, row dict) from a CSV (with header) or JSONL text
+    stream; a JSONL line that is not a JSON object yields a RowError instead.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, RowError(f"not valid JSON: {exc}")
+                continue
+            if not isinstance(row, dict):
+                row = RowError(f"not a JSON object: {line.strip()[:40]!r}")
+            yield number, row
+
+
+class GenreMap:
+    """Genre name -> id, loaded once; unknown names are created as they appear."""
+
+    def __init__(self):
+        self.ids = dict(Genre.objects.values_list("name", "pk"))
+
+    def __getitem__(self, name):
+        if name not in self.ids:
+            self.ids[name] = Genre.objects.get_or_create(name=name)[0].pk
+        return self.ids[name]
+
+
+class _Upsert:
+    """
+    INSERT ... ON CONFLICT (isbn) DO UPDATE for the product table, run with
+    executemany. The statement is what bulk_create(update_conflicts=True)
+    emits, but values are adapted by one converter per column instead of the
+    per-value field preparation that makes bulk_create the bottleneck here.
+    """
+
+    def __init__(self, update_existing):
+        ops = connection.ops
+        self.fields = [f for f in Product._meta.concrete_fields if not f.primary_key]
+        on_conflict = OnConflict.UPDATE if update_existing else OnConflict.IGNORE
+        update_columns = [Product._meta.get_field(name).column for name in UPDATE_FIELDS]
+        self.sql = "%s %s (%s) VALUES (%s) %s" % (
+            ops.insert_statement(on_conflict=on_conflict),
+            ops.quote_name(Product._meta.db_table),
+            ", ".join(ops.quote_name(f.column) for f in self.fields),
+            ", ".join(["%s"] * len(self.fields)),
+            ops.on_conflict_suffix_sql(self.fields, on_conflict, update_columns, ["isbn"]),
+        )
+        # created_at is stamped (and adapted) once per chunk, not per row
+        self.converters = [None if f.attname == "created_at" else self._converter(f) for f in self.fields]
+        # columns an import does not carry start at the model's defaults
+        self.defaults = {f.attname: f.get_default() for f in self.fields}
+
+    @staticmethod
+    def _converter(field):
+        ops = connection.ops
+        internal_type = field.get_internal_type()
+        if internal_type == "DecimalField":
+            return lambda v: ops.adapt_decimalfield_value(v, field.max_digits, field.decimal_places)
+        if internal_type == "DateField":
+            return ops.adapt_datefield_value
+        if internal_type == "DateTimeField":
+            return ops.adapt_datetimefield_value
+        return None
+
+    def rows(self, products):
+        defaults = {**self.defaults, "created_at": connection.ops.adapt_datetimefield_value(timezone.now())}
+        columns = [(f.attname, convert) for f, convert in zip(self.fields, self.converters)]
+        for values in products:
+            values = {**defaults, **values}
+            yield [
+                convert(values[name]) if convert and values[name] is not None else values[name]
+                for name, convert in columns
+            ]
+
+    def execute(self, products):
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, self.rows(products))
+
+
+def _write_chunk(rows, upsert, slugs, update_existing, stats):
+    """Upsert one chunk of parsed rows (already unique by ISBN) in a transaction."""
+    with transaction.atomic():
+        existing = {
+            isbn: (title, author, slug)
+            for isbn, title, author, slug in Product.objects.filter(isbn__in=list(rows))
+            .values_list("isbn", "title", "author", "slug")
+        }
+        batch = []
+        for isbn, values in rows.items():
+            if isbn in existing:
+                if not update_existing:
+                    continue
+                title, author, slug = existing[isbn]
+                # the slug follows title and author, as in Product.save
+                if (title, author) != (values["title"], values["author"]):
+                    slug = slugs.allocate(base_slug(values["title"], values["author"]))
+            else:
+                slug = slugs.allocate(base_slug(values["title"], values["author"]))
+            values["slug"] = slug
+            batch.append(values)
+        upsert.execute(batch)
+    updated = sum(isbn in existing for isbn in rows) if update_existing else 0
+    stats.updated += updated
+    stats.created += len(batch) - updated
+
+
+def import_catalog(stream, fmt, chunk_size=IMPORT_CHUNK_SIZE, update_existing=True, defer_search_index=False):
+    """
+    Upsert the products in `stream` by ISBN; returns ImportStats. With
+    `defer_search_index` the full-text index is dropped for the duration and
+    rebuilt once at the end, which roughly halves the time of a large load;
+    search returns an error meanwhile.
+    """
+    search = get_search_backend()
+    if defer_search_index:
+        search.uninstall()
+    try:
+        return _import(stream, fmt, chunk_size, update_existing)
+    finally:
+        if defer_search_index:
+            search.install()  # recreates the index and backfills it
+
+
+def _import(stream, fmt, chunk_size, update_existing):
+    stats = ImportStats()
+    genres = GenreMap()
+    # every existing slug, read once; later chunks see the slugs earlier ones took
+    slugs = SlugAllocator()
+    upsert = _Upsert(update_existing)
+    chunk = {}
+    for number, row in read_rows(stream, fmt):
+        try:
+            if isinstance(row, RowError):
+                raise row
+            values = parse_row(row)
+        except (RowError, InvalidOperation) as exc:
+            stats.errors.append((number, str(exc)))
+            continue
+        values["genre_id"] = genres[values.pop("genre")]
+        # a later row for the same ISBN wins
+        chunk[values["isbn"]] = values
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, upsert, slugs, update_existing, stats)
+            chunk = {}
+    if chunk:
+        _write_chunk(chunk, upsert, slugs, update_existing, stats)
+    # bulk writes send no post_save
+    bump_generation()
+    return stats
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def stream_catalog(fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the whole catalog, ordered by ISBN, as CSV or JSONL text lines."""
+    header = [name for name, _ in COLUMNS]
+    rows = (
+        Product.objects.order_by("isbn")
+        .values_list(*[lookup for _, lookup in COLUMNS])
+        .iterator(chunk_size=chunk_size)
+    )
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_cell(value) for value in row])
+        return
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({name: _cell(value) for name, value in zip(header, row)}) + "\n"
+
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from admin_panel import catalog_cache
+
+class Command(BaseCommand):
+    help = 'Prints the catalog response cache hit/miss counters; --invalidate also drops every cached response'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true', help='Bump the catalog generation')
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            catalog_cache.bump_generation()
+        stats = catalog_cache.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_ratio']:.1%} hit ratio), {stats['waits']} waited on a recompute; "
+            f"generation {stats['generation']}."
+        ))
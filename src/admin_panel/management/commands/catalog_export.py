@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.catalog_io import EXPORT_CHUNK_SIZE, FORMATS, stream_catalog
+
+class Command(BaseCommand):
+    help = 'Streams the whole catalog to a CSV or JSONL file in the columns catalog_import reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='File to write, or - for stdout (default)')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, or csv on stdout')
+        parser.add_argument('--batch-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else path.rpartition('.')[2].lower())
+        if fmt not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {path!r}; pass --format {'/'.join(FORMATS)}")
+
+        if path == '-':
+            for line in stream_catalog(fmt, chunk_size=options['batch_size']):
+                self.stdout.write(line, ending='')
+            return
+
+        rows = -1 if fmt == 'csv' else 0  # the CSV header is not a product
+        with open(path, 'w', newline='', encoding='utf-8') as out:
+            for line in stream_catalog(fmt, chunk_size=options['batch_size']):
+                out.write(line)
+                rows += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {rows} products to {path}."))
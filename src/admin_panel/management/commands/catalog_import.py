@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.catalog_io import FORMATS, IMPORT_CHUNK_SIZE, import_catalog
+
+class Command(BaseCommand):
+    help = 'Upserts products by ISBN from a CSV or JSONL file (see admin_panel.catalog_io for the columns)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows per transaction')
+        parser.add_argument('--insert-only', action='store_true', help='Skip rows whose ISBN already exists')
+        parser.add_argument(
+            '--defer-search-index', action='store_true',
+            help='Drop the search index during the import and rebuild it once at the end (search is down meanwhile)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rpartition('.')[2].lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {path!r}; pass --format {'/'.join(FORMATS)}")
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            stats = import_catalog(
+                stream, fmt, chunk_size=options['batch_size'], update_existing=not options['insert_only'],
+                defer_search_index=options['defer_search_index'],
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        for line, error in stats.errors:
+            self.stderr.write(f"Line {line}: {error}")
+        rate = stats.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.imported} products ({stats.created} created, {stats.updated} updated, "
+            f"{len(stats.errors)} rejected) in {elapsed:.1f}s ({rate:,.0f}/s)."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admin_panel.search import get_search_backend
+
+class Command(BaseCommand):
+    help = 'Recreates the product full-text search index and repopulates it from the catalog'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.install()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index with {type(backend).__name__}."))
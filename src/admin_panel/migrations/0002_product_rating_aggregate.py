@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="rating",
+            field=models.FloatField(
+                default=0,
+                help_text="Average stars (rating_sum / rating_count), kept in sync by add_rating/remove_rating",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Number of approved reviews folded into rating_sum"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_sum",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Sum of stars over all approved reviews"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:40
+
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from admin_panel.search import get_search_backend
+
+    get_search_backend(schema_editor.connection).install()
+
+
+def uninstall_search_index(apps, schema_editor):
+    from admin_panel.search import get_search_backend
+
+    get_search_backend(schema_editor.connection).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0002_product_rating_aggregate"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
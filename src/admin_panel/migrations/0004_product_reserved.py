@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0003_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="reserved",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Units held by active stock reservations (orders awaiting payment)",
+            ),
+        ),
+    ]
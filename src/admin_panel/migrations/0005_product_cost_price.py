@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0004_product_reserved"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="cost_price",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="What one unit costs us; unset means DEFAULT_COST_RATIO of the sale price",
+                max_digits=10,
+                null=True,
+            ),
+        ),
+    ]
@@ -1,7 +1,12 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
 from django.db import models
 from django.utils.text import slugify
-from django.db import transaction
-from django.db.models import F
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .catalog_cache import bump_generation
 # Create your models here.
 
 # Order Model
@@ -41,6 +46,74 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+def base_slug(title, author):
+    """What a product's slug is derived from, before any "-<n>" suffix."""
+    return slugify(f"{title}-{author}")
+
+
+class SlugAllocator:
+    """
+    Hands out unique slugs for base slugs ("title-author"). A taken base gets
+    its family's highest numeric suffix + 1 ("base-<n>"), so allocation is a
+    dict lookup once the existing slugs are known.
+
+    With `bases`, only those families are read: each base itself and the
+    index range of slugs starting with "base-", a few hundred bases per
+    query; only those bases may then be allocated. Without it the whole slug
+    column is read once, which is what a bulk import of thousands of products
+    wants.
+    """
+    chunk_size = 200
+
+    def __init__(self, bases=None, exclude_pk=None):
+        self.used = set()
+        self.max_suffix = {}
+        existing = Product.objects.all()
+        if exclude_pk is not None:
+            existing = existing.exclude(pk=exclude_pk)
+        if bases is None:
+            self._load(existing)
+            return
+        bases = list(dict.fromkeys(bases))
+        for start in range(0, len(bases), self.chunk_size):
+            family = Q()
+            for base in bases[start:start + self.chunk_size]:
+                # "-" sorts right before ".", so this is every slug starting with "base-"
+                family |= Q(slug=base) | Q(slug__gte=f"{base}-", slug__lt=f"{base}.")
+            self._load(existing.filter(family))
+
+    def _load(self, existing):
+        for slug in existing.values_list("slug", flat=True).iterator():
+            self._claim(slug)
+
+    def _claim(self, slug):
+        self.used.add(slug)
+        head, _, suffix = slug.rpartition("-")
+        if suffix.isdigit():
+            self.max_suffix[head] = max(self.max_suffix.get(head, 0), int(suffix))
+
+    def allocate(self, base):
+        slug = base
+        while slug in self.used:
+            self.max_suffix[base] = self.max_suffix.get(base, 0) + 1
+            slug = f"{base}-{self.max_suffix[base]}"
+        self._claim(slug)
+        return slug
+
+
+class ProductQuerySet(models.QuerySet):
+    def assign_slugs(self, products):
+        """
+        Give every (unsaved) product its unique slug in one pass, for bulk
+        imports that bypass Product.save; returns `products`.
+        """
+        products = list(products)
+        allocator = SlugAllocator({product.base_slug() for product in products})
+        for product in products:
+            product.slug = allocator.allocate(product.base_slug())
+        return products
+
+
 class Product(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
@@ -49,6 +122,10 @@ class Product(models.Model):
         max_digits=5, decimal_places=2, default=0,
         help_text="Percentage off the base price (0–100)"
     )
+    cost_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        help_text="What one unit costs us; unset means DEFAULT_COST_RATIO of the sale price"
+    )
     stock = models.IntegerField()
     isbn = models.CharField(max_length=13, unique=True)
     genre = models.ForeignKey(
@@ -66,6 +143,24 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True, blank=True)
     ordered_number = models.PositiveIntegerField(default=0)
+    reserved = models.PositiveIntegerField(
+        default=0,
+        help_text="Units held by active stock reservations (orders awaiting payment)"
+    )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        help_text="Sum of stars over all approved reviews"
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of approved reviews folded into rating_sum"
+    )
+    rating = models.FloatField(
+        default=0,
+        help_text="Average stars (rating_sum / rating_count), kept in sync by add_rating/remove_rating"
+    )
+
+    objects = ProductQuerySet.as_manager()
 
     def decrease_stock(self, quantity):
         """
@@ -88,18 +183,76 @@ class Product(models.Model):
         Product.objects.filter(pk=self.pk).update(stock=F('stock') + quantity)
         self.refresh_from_db(fields=['stock'])
 
+    @property
+    def available_stock(self):
+        """Units that can still be sold: stock minus active reservations."""
+        return self.stock - self.reserved
+
+    def unit_cost(self, unit_price):
+        """What one unit sold at `unit_price` costs us: cost_price, else DEFAULT_COST_RATIO of the price."""
+        if self.cost_price is not None:
+            return self.cost_price
+        return (unit_price * settings.DEFAULT_COST_RATIO).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+    def add_rating(self, stars, count=1):
+        """
+        Atomically fold `count` reviews totalling `stars` into the rating aggregate.
+        """
+        with transaction.atomic():
+            Product.objects.filter(pk=self.pk).update(
+                rating_sum=F('rating_sum') + stars,
+                rating_count=F('rating_count') + count,
+            )
+            # the UPDATE above holds the row lock until commit, so this read is consistent
+            self.refresh_from_db(fields=['rating_sum', 'rating_count'])
+            self.rating = (
+                round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0
+            )
+            Product.objects.filter(pk=self.pk).update(rating=self.rating)
+            # the catalog shows the rating; queryset updates send no post_save
+            bump_generation()
+
+    def remove_rating(self, stars, count=1):
+        """
+        Atomically take `count` reviews totalling `stars` back out of the rating aggregate.
+        """
+        self.add_rating(-stars, -count)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # what the stored slug was derived from; save() skips the slug while it holds
+        instance._slug_source = (instance.__dict__.get("title"), instance.__dict__.get("author"))
+        return instance
+
+    def base_slug(self):
+        return base_slug(self.title, self.author)
+
+    def _slug_is_current(self, update_fields):
+        if update_fields is not None:
+            return not {"title", "author"} & set(update_fields)
+        return bool(self.slug) and getattr(self, "_slug_source", None) == (self.title, self.author)
+
     def save(self, *args, **kwargs):
-        # Always regenerate slug from title and author, ensuring uniqueness
-        base_slug = slugify(f"{self.title}-{self.author}")
-        slug_candidate = base_slug
-        num = 1
-        
-        # Exclude current instance when checking for uniqueness
-        while Product.objects.filter(slug=slug_candidate).exclude(pk=self.pk).exists():
-            slug_candidate = f"{base_slug}-{num}"
-            num += 1
-        self.slug = slug_candidate
-        super().save(*args, **kwargs)
+        # the slug follows title and author; it is (re)allocated only when they change
+        if self._slug_is_current(kwargs.get("update_fields")):
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "slug"}
+        for attempt in range(3):
+            base = self.base_slug()
+            self.slug = SlugAllocator([base], exclude_pk=self.pk).allocate(base)
+            try:
+                # a savepoint, so a concurrent save that took the same slug can be retried
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                if attempt == 2 or not Product.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
+                    raise
+        self._slug_source = (self.title, self.author)
 
     def __str__(self):
         return self.title
\ No newline at end of file
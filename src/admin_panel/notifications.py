@@ -0,0 +1,138 @@
+"""
+Discount notifications for wishlisters, sent off the request path.
+
+set_discount calls schedule_discount_notification(); after the commit the
+notify_discount task (admin_panel.tasks) walks the product's wishlisters with
+a chunked iterator and sends the emails over one SMTP connection, in batches
+of DISCOUNT_NOTIFY_BATCH_SIZE. Recipients are throttled per mail provider
+(the domain of their address) so a popular book does not trip a provider's
+inbound rate limits, and the run is debounced: it waits out
+DISCOUNT_NOTIFY_DEDUP_WINDOW, so repeated discount changes within it notify
+wishlisters once, with the discount in force at the end.
+"""
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+from wishlist.models import WishlistItem
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+
+def _dedup_key(product_id):
+    return f"discount-notify:{product_id}"
+
+
+def schedule_discount_notification(product):
+    """
+    Queue the wishlister notification for `product` once its discount commits,
+    debounced: the task runs when the dedup window ends and reads the discount
+    then, so every change inside the window is covered by that one email.
+    Returns False if a run is already pending for this window.
+    """
+    from .tasks import notify_discount
+
+    window = settings.DISCOUNT_NOTIFY_DEDUP_WINDOW.total_seconds()
+    if not cache.add(_dedup_key(product.pk), True, window):
+        return False
+    transaction.on_commit(lambda: _enqueue(notify_discount, product.pk, window))
+    return True
+
+
+def _enqueue(task, product_id, countdown):
+    # runs after the response's commit: a broker outage must not turn the
+    # already-saved discount into a 500, and the next change may try again
+    try:
+        task.apply_async((product_id,), countdown=countdown)
+    except Exception as exc:
+        cache.delete(_dedup_key(product_id))
+        logger.error("Could not queue discount notification for product %s: %s", product_id, exc)
+
+
+class ProviderThrottle:
+    """At most `rate` messages per second to each mail provider (0 = unlimited)."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = {}
+
+    def wait(self, address):
+        if not self.interval:
+            return
+        provider = address.rpartition("@")[2].lower()
+        now = self.clock()
+        slot = max(now, self.next_slot.get(provider, now))
+        if slot > now:
+            self.sleep(slot - now)
+        self.next_slot[provider] = slot + self.interval
+
+
+def discount_message(product, user, new_price):
+    return EmailMessage(
+        subject="Product Discounted 🎉",
+        body=(
+            f"Hi {user.username},\n\n"
+            f"The product “{product.title}” you wish-listed "
+            f"is now discounted by {product.discount_percent}%.\n"
+            f"New price: ${new_price}.\n\n"
+            "Happy shopping!"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+
+
+def send_discount_notifications(product_id, after=0, batch_size=None, throttle=None):
+    """
+    Email every wishlister of the product (WishlistItem pk > `after`) about
+    its current discount. Returns (sent, last WishlistItem pk handled); a
+    failure mid-way raises with the progress of whole batches kept in
+    `exc.resume_after`. The SMTP backend gives no count for a batch it fails
+    part-way through, so a retry resends that whole batch: wishlisters in it
+    who were already emailed get the message twice, nobody before it does.
+    """
+    batch_size = batch_size or settings.DISCOUNT_NOTIFY_BATCH_SIZE
+    throttle = throttle or ProviderThrottle(settings.DISCOUNT_NOTIFY_RATE_PER_PROVIDER)
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or not product.discount_percent:
+        return 0, after
+
+    new_price = (
+        product.price * (Decimal("100") - product.discount_percent) / Decimal("100")
+    ).quantize(product.price)
+    wishlisters = (
+        WishlistItem.objects
+        .filter(product=product, pk__gt=after)
+        .exclude(user__email="")
+        .select_related("user")
+        .only("pk", "user__username", "user__email")
+        .order_by("pk")
+    )
+
+    sent = 0
+    batch = []
+    # one SMTP session for the whole fan-out instead of one per recipient
+    with get_connection() as connection:
+        try:
+            for item in wishlisters.iterator(chunk_size=batch_size):
+                throttle.wait(item.user.email)
+                batch.append(discount_message(product, item.user, new_price))
+                if len(batch) == batch_size:
+                    sent += connection.send_messages(batch) or 0
+                    after, batch = item.pk, []
+            if batch:
+                sent += connection.send_messages(batch) or 0
+                after = item.pk
+        except Exception as exc:
+            exc.resume_after = after
+            raise
+    return sent, after
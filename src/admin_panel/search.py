@@ -0,0 +1,358 @@
+"""
+Full-text search over the product catalog.
+
+The index covers title, author, description, publisher and ISBN and is kept in
+sync by database triggers on admin_panel_product, so every write path
+(Product.save, delete, bulk_create, queryset.update) updates it in the same
+transaction.  Pick a backend with settings.PRODUCT_SEARCH_BACKEND (dotted path);
+by default it follows the database vendor.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# (column, weight) — higher weight ranks matches in that column above the rest
+INDEXED_FIELDS = (
+    ("title", 10.0),
+    ("author", 8.0),
+    ("description", 1.0),
+    ("publisher", 3.0),
+    ("isbn", 10.0),
+)
+
+
+def tokenize(query):
+    """Split free text into lower-cased word tokens, dropping any query syntax."""
+    return TOKEN_RE.findall((query or "").lower())
+
+
+class BaseSearchBackend:
+    """
+    Interface every search backend implements.
+    """
+    mark_start = "<mark>"
+    mark_end = "</mark>"
+    # what the engines insert around matches: private-use code points that no
+    # product text contains, swapped for the tags once the text is escaped
+    raw_mark_start = "\ue000"
+    raw_mark_end = "\ue001"
+
+    def __init__(self, connection=None):
+        self.connection = connection or default_connection
+
+    def install(self):
+        """Create the index structures if missing; backfill when newly created."""
+
+    def uninstall(self):
+        """Drop the index structures."""
+
+    def rebuild(self):
+        """Repopulate the whole index from admin_panel_product."""
+
+    def ranked_ids(self, query, limit, queryset=None):
+        """
+        Return [(product_id, score), …] best match first, at most `limit` rows,
+        counting only products in `queryset` (all products if None).
+        """
+        raise NotImplementedError
+
+    def highlight(self, query, product_ids):
+        """Return {product_id: {field: HTML-escaped text with <mark>ed matches}}."""
+        return {}
+
+    def markup(self, text):
+        """HTML-escape engine output, then turn its raw match markers into tags."""
+        if text is None:
+            return None
+        return (
+            escape(text)
+            .replace(self.raw_mark_start, self.mark_start)
+            .replace(self.raw_mark_end, self.mark_end)
+        )
+
+    @staticmethod
+    def restriction(queryset):
+        """(sql, params) of the pk subquery for `queryset`, or None if unrestricted."""
+        if queryset is None or not queryset.query.where:
+            return None
+        return queryset.order_by().values("pk").query.sql_with_params()
+
+    def filter(self, queryset, query, limit=None):
+        """
+        Restrict `queryset` to products matching `query`, annotated with
+        `search_rank` and ordered best match first.
+        """
+        if not tokenize(query):
+            return queryset
+        limit = limit or settings.PRODUCT_SEARCH_MAX_RESULTS
+        # the queryset's own restrictions go into the ranked query, so rows it
+        # would drop afterwards cannot use up the limit
+        hits = self.ranked_ids(query, limit, queryset)
+        if not hits:
+            return queryset.none()
+        rank = Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in hits],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(pk__in=[pk for pk, _ in hits])
+                    .annotate(search_rank=rank)
+                    .order_by("-search_rank", "pk")
+        )
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """
+    Index-less fallback for vendors without a native full-text engine.
+    Equivalent to the old SearchFilter: every token must appear in some field.
+    """
+
+    def filter(self, queryset, query, limit=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        for token in tokens:
+            match = Q()
+            for field, _ in INDEXED_FIELDS:
+                match |= Q(**{f"{field}__icontains": token})
+            queryset = queryset.filter(match)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def ranked_ids(self, query, limit, queryset=None):
+        from .models import Product
+        queryset = Product.objects.all() if queryset is None else queryset
+        qs = self.filter(queryset, query).values_list("pk", flat=True)[:limit]
+        return [(pk, 0.0) for pk in qs]
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 external-content table over admin_panel_product.
+    Ranked with bm25(), prefix-indexed for 2 and 3 character prefixes.
+    """
+    table = "admin_panel_product_fts"
+
+    def _columns(self):
+        return ", ".join(field for field, _ in INDEXED_FIELDS)
+
+    def _values(self, alias):
+        return ", ".join(f"{alias}.{field}" for field, _ in INDEXED_FIELDS)
+
+    def _exists(self, cursor):
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.table]
+        )
+        return cursor.fetchone() is not None
+
+    def install(self):
+        cols, t = self._columns(), self.table
+        with self.connection.cursor() as cursor:
+            created = not self._exists(cursor)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {t} USING fts5("
+                f"{cols}, content='admin_panel_product', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            # Triggers live on admin_panel_product, so SQLite drops them whenever a
+            # migration rebuilds that table; IF NOT EXISTS lets post_migrate restore them.
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {t}_ai AFTER INSERT ON admin_panel_product BEGIN "
+                f"INSERT INTO {t}(rowid, {cols}) VALUES (new.id, {self._values('new')}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {t}_ad AFTER DELETE ON admin_panel_product BEGIN "
+                f"INSERT INTO {t}({t}, rowid, {cols}) VALUES ('delete', old.id, {self._values('old')}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {t}_au AFTER UPDATE OF {cols} ON admin_panel_product BEGIN "
+                f"INSERT INTO {t}({t}, rowid, {cols}) VALUES ('delete', old.id, {self._values('old')}); "
+                f"INSERT INTO {t}(rowid, {cols}) VALUES (new.id, {self._values('new')}); END"
+            )
+        if created:
+            self.rebuild()
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {self.table}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def match_expression(self, query):
+        # every token quoted so no FTS syntax leaks through; only the last one,
+        # which may still be being typed, is prefix-matched
+        tokens = [f'"{token}"' for token in tokenize(query)]
+        tokens[-1] += "*"
+        return " ".join(tokens)
+
+    def ranked_ids(self, query, limit, queryset=None):
+        weights = ", ".join(str(weight) for _, weight in INDEXED_FIELDS)
+        where, params = f"{self.table} MATCH %s", [self.match_expression(query)]
+        restriction = self.restriction(queryset)
+        if restriction:
+            where += f" AND rowid IN ({restriction[0]})"
+            params += restriction[1]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, -bm25({self.table}, {weights}) AS score FROM {self.table} "
+                f"WHERE {where} ORDER BY score DESC LIMIT %s",
+                [*params, limit],
+            )
+            return cursor.fetchall()
+
+    def highlight(self, query, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids or not tokenize(query):
+            return {}
+        marks = f"'{self.raw_mark_start}', '{self.raw_mark_end}'"
+        snippets = []
+        for column, (field, _) in enumerate(INDEXED_FIELDS):
+            if field == "description":
+                snippets.append(f"snippet({self.table}, {column}, {marks}, '…', 24)")
+            else:
+                snippets.append(f"highlight({self.table}, {column}, {marks})")
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, {', '.join(snippets)} FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid IN ({placeholders})",
+                [self.match_expression(query), *product_ids],
+            )
+            rows = cursor.fetchall()
+        fields = [field for field, _ in INDEXED_FIELDS]
+        return {row[0]: dict(zip(fields, map(self.markup, row[1:]))) for row in rows}
+
+
+class PostgresFTSBackend(BaseSearchBackend):
+    """
+    Postgres tsvector side table with a GIN index, ranked with ts_rank().
+    Uses the 'simple' configuration since the catalog is multilingual.
+    """
+    table = "admin_panel_product_search"
+    # tsvector weight class per field, mirroring INDEXED_FIELDS' ordering
+    weight_classes = {"title": "A", "author": "B", "description": "D", "publisher": "C", "isbn": "A"}
+
+    def _document(self, alias):
+        return " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({alias}.{field}, '')), '{self.weight_classes[field]}')"
+            for field, _ in INDEXED_FIELDS
+        )
+
+    def install(self):
+        t = self.table
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [t])
+            created = cursor.fetchone()[0] is None
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {t} ("
+                f"product_id bigint PRIMARY KEY REFERENCES admin_panel_product(id) "
+                f"ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                f"document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {t}_document_idx ON {t} USING GIN (document)")
+            cursor.execute(
+                f"CREATE OR REPLACE FUNCTION {t}_sync() RETURNS trigger AS $$ BEGIN "
+                f"INSERT INTO {t} (product_id, document) VALUES (NEW.id, {self._document('NEW')}) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document; "
+                f"RETURN NULL; END $$ LANGUAGE plpgsql"
+            )
+            cursor.execute(f"DROP TRIGGER IF EXISTS {t}_sync ON admin_panel_product")
+            cursor.execute(
+                f"CREATE TRIGGER {t}_sync AFTER INSERT OR UPDATE OF "
+                f"{', '.join(field for field, _ in INDEXED_FIELDS)} ON admin_panel_product "
+                f"FOR EACH ROW EXECUTE FUNCTION {t}_sync()"
+            )
+        if created:
+            self.rebuild()
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {self.table}_sync ON admin_panel_product")
+            cursor.execute(f"DROP FUNCTION IF EXISTS {self.table}_sync()")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (product_id, document) "
+                f"SELECT p.id, {self._document('p')} FROM admin_panel_product p"
+            )
+
+    def tsquery(self, query):
+        tokens = tokenize(query)
+        tokens[-1] += ":*"
+        return " & ".join(tokens)
+
+    def ranked_ids(self, query, limit, queryset=None):
+        where, params = "s.document @@ q", [self.tsquery(query)]
+        restriction = self.restriction(queryset)
+        if restriction:
+            where += f" AND s.product_id IN ({restriction[0]})"
+            params += restriction[1]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT s.product_id, ts_rank(s.document, q) AS score "
+                f"FROM {self.table} s, to_tsquery('simple', %s) q "
+                f"WHERE {where} ORDER BY score DESC LIMIT %s",
+                [*params, limit],
+            )
+            return cursor.fetchall()
+
+    def highlight(self, query, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids or not tokenize(query):
+            return {}
+        headlines = []
+        for field, _ in INDEXED_FIELDS:
+            options = f"StartSel={self.raw_mark_start}, StopSel={self.raw_mark_end}"
+            if field != "description":
+                options += ", HighlightAll=true"
+            headlines.append(f"ts_headline('simple', p.{field}, q, '{options}')")
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT p.id, {', '.join(headlines)} "
+                f"FROM admin_panel_product p, to_tsquery('simple', %s) q "
+                f"WHERE p.id = ANY(%s)",
+                [self.tsquery(query), product_ids],
+            )
+            rows = cursor.fetchall()
+        fields = [field for field, _ in INDEXED_FIELDS]
+        return {row[0]: dict(zip(fields, map(self.markup, row[1:]))) for row in rows}
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresFTSBackend,
+}
+
+
+def get_search_backend(connection=None):
+    connection = connection or default_connection
+    path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    backend_class = (
+        import_string(path) if path
+        else VENDOR_BACKENDS.get(connection.vendor, LikeSearchBackend)
+    )
+    return backend_class(connection)
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter: answers ?search= from the
+    full-text index instead of LIKE '%term%' scans.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return get_search_backend().filter(queryset, query)
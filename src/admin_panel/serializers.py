@@ -1,16 +1,18 @@
 from rest_framework import serializers
 from .models import Product, Order, User, Genre
-from django.db.models import Avg
 
 class ProductSerializer(serializers.ModelSerializer):
     cover_image = serializers.ImageField(required=True)
-    rating = serializers.SerializerMethodField()
+    # denormalized on Product and maintained by the review views
+    rating = serializers.FloatField(read_only=True)
     genre_name = serializers.CharField(source="genre.name", read_only=True)
+    available_stock = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
-        fields = "__all__"
-        read_only_fields = ("price",)
+        # cost is internal: sales managers set it through set_price
+        exclude = ("cost_price",)
+        read_only_fields = ("price", "rating_sum", "rating_count", "reserved")
 
     def validate_isbn(self, value):
         """Ensure ISBN is exactly 13 digits."""
@@ -18,19 +20,17 @@ class ProductSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("ISBN must be exactly 13 digits.")
         return value
 
-    def get_rating(self, obj):
-        avg = (
-            obj.reviews
-               .filter(approved=True)
-               .aggregate(Avg('stars'))
-               .get('stars__avg')
-        )
-        return round(avg or 0, 2)
+class ProductSearchResultSerializer(ProductSerializer):
+    search_rank = serializers.FloatField(read_only=True)
+    highlights = serializers.SerializerMethodField()
+
+    def get_highlights(self, obj):
+        return self.context.get("highlights", {}).get(obj.pk, {})
 
 class ProductPriceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = ("price",)
+        fields = ("price", "cost_price")
 
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
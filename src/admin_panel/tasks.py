@@ -0,0 +1,29 @@
+import logging
+
+from celery import shared_task
+
+from .notifications import ProviderThrottle, send_discount_notifications
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=5)
+def notify_discount(self, product_id, after=0):
+    """Email the product's wishlisters about its discount; retries resume after the last batch sent."""
+    # eager runs happen inside the set_discount request: no provider pacing
+    # sleeps and no back-to-back retries there
+    throttle = ProviderThrottle(0) if self.request.is_eager else None
+    try:
+        sent, _ = send_discount_notifications(product_id, after=after, throttle=throttle)
+    except Exception as exc:
+        if self.request.is_eager or self.request.retries >= self.max_retries:
+            logger.error("Discount notification for product %s failed: %s", product_id, exc)
+            return None
+        resume_after = getattr(exc, "resume_after", after)
+        raise self.retry(
+            exc=exc,
+            args=(product_id, resume_after),
+            countdown=60 * 2 ** self.request.retries,
+        )
+    logger.info("Discount notification for product %s sent to %s wishlisters", product_id, sent)
+    return sent
@@ -1,10 +1,33 @@
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework.request import Request
+from rest_framework.response import Response
 from django.urls import reverse
 from admin_panel.models import Product, Genre
 from orders.models import Order
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.files.uploadedfile import SimpleUploadedFile
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+import threading
+import time
+from admin_panel import catalog_cache
+from admin_panel.views import product_detail_by_slug
+from admin_panel.notifications import ProviderThrottle, send_discount_notifications
+from admin_panel.tasks import notify_discount
+from admin_panel.catalog_io import import_catalog
+from django.core.management import call_command
+import io
+import json
+import os
+import tempfile
+from wishlist.models import WishlistItem
 
 UserAuth = get_user_model()
 
@@ -104,3 +127,466 @@ class AdminPanelTests(APITestCase):
         url = reverse('user-list')
         response = self.client_pm.get(url)
         self.assertEqual(response.status_code, 200)
+
+
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        self.genre, _ = Genre.objects.get_or_create(name="Test Genre")
+        self.dune = self._product("Dune", "Frank Herbert", "9780441172719", "Desert planet politics and spice.")
+        self.hobbit = self._product("The Hobbit", "J. R. R. Tolkien", "9780547928227", "A hobbit leaves the Shire.")
+        self.unpriced = self._product("Dune Messiah", "Frank Herbert", "9780593098233", "Sequel.", price=None)
+
+    def _product(self, title, author, isbn, description, price=20.00):
+        return Product.objects.create(
+            title=title, author=author, price=price, stock=5, isbn=isbn,
+            genre=self.genre, description=description, publisher="Ace Books",
+            publication_date="2025-01-01", pages=200, language="EN",
+        )
+
+    def test_search_endpoint_prefix_and_highlight(self):
+        response = self.client.get(reverse('product-search'), {"q": "herb"})
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        # unpriced products stay hidden, as in the list endpoint
+        self.assertEqual([r["id"] for r in results], [self.dune.id])
+        self.assertIn("<mark>Herbert</mark>", results[0]["highlights"]["author"])
+
+    def test_unpriced_matches_do_not_use_up_the_limit(self):
+        for n in range(3):
+            self._product("Dune Dune Dune", "Frank Herbert", f"978000000010{n}", "Dune.", price=None)
+        response = self.client.get(reverse('product-search'), {"q": "dune", "limit": 1})
+        self.assertEqual([r["id"] for r in response.data["results"]], [self.dune.id])
+
+    def test_highlights_escape_product_text(self):
+        book = self._product("Dune <script>", "Frank & Co", "9780000000200", "x")
+        response = self.client.get(reverse('product-search'), {"q": "dune script"})
+        result = next(r for r in response.data["results"] if r["id"] == book.id)
+        self.assertEqual(result["highlights"]["title"], "<mark>Dune</mark> &lt;<mark>script</mark>&gt;")
+        self.assertEqual(result["highlights"]["author"], "Frank &amp; Co")
+
+    def test_search_by_isbn(self):
+        response = self.client.get(reverse('product-search'), {"q": "9780547928227"})
+        self.assertEqual([r["id"] for r in response.data["results"]], [self.hobbit.id])
+
+    def test_list_search_param_uses_index(self):
+        response = self.client.get(reverse('product-list'), {"search": "shire"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["id"] for p in response.data], [self.hobbit.id])
+
+    def test_index_follows_update_and_delete(self):
+        self.dune.title = "Arrakis"
+        self.dune.save()
+        response = self.client.get(reverse('product-search'), {"q": "arrakis"})
+        self.assertEqual([r["id"] for r in response.data["results"]], [self.dune.id])
+        response = self.client.get(reverse('product-search'), {"q": "dune"})
+        self.assertEqual(response.data["results"], [])
+
+        self.hobbit.delete()
+        response = self.client.get(reverse('product-search'), {"q": "hobbit"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_results_paginate_by_rank(self):
+        self._product("Herbal Remedies", "Ann Herbst", "9780000000001", "Herbs.")
+        response = self.client.get(reverse('product-list'), {"search": "herb", "page_size": 1})
+        self.assertEqual(len(response.data), 1)
+        next_url = response["Link"].split('<')[-1].split('>')[0]
+        self.assertIn("cursor=", next_url)
+        second = self.client.get(next_url)
+        self.assertEqual(len(second.data), 1)
+        self.assertNotEqual(second.data[0]["id"], response.data[0]["id"])
+
+
+class DiscountNotificationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.sm_user = UserAuth.objects.create_user(username="sm", email="sm@example.com", password="testpass")
+        sm_group, _ = Group.objects.get_or_create(name="sales manager")
+        self.sm_user.groups.add(sm_group)
+        self.client.force_authenticate(self.sm_user)
+
+        genre, _ = Genre.objects.get_or_create(name="Test Genre")
+        self.product = Product.objects.create(
+            title="Dune", author="Frank Herbert", price=40.00, stock=5, isbn="9780441172719",
+            genre=genre, description="d", publisher="Ace Books",
+            publication_date="2025-01-01", pages=200, language="EN", slug="dune",
+        )
+        for n in range(5):
+            fan = UserAuth.objects.create_user(
+                username=f"fan{n}", email=f"fan{n}@{'gmail.com' if n % 2 else 'example.com'}"
+            )
+            WishlistItem.objects.create(user=fan, product=self.product)
+        self.url = reverse('product-set-discount', kwargs={"slug": self.product.slug})
+
+    def _discount(self, percent):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {"discount": percent}, format="json")
+
+    @override_settings(DISCOUNT_NOTIFY_BATCH_SIZE=2, DISCOUNT_NOTIFY_RATE_PER_PROVIDER=0)
+    def test_wishlisters_emailed_in_batches_over_one_connection(self):
+        real_send = EmailBackend.send_messages
+        with mock.patch("admin_panel.notifications.get_connection", wraps=get_connection) as opened, \
+                mock.patch.object(EmailBackend, "send_messages", autospec=True, side_effect=real_send) as sent:
+            response = self._discount(25)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual([len(call.args[1]) for call in sent.call_args_list], [2, 2, 1])
+        self.assertEqual(len({m.to[0] for m in mail.outbox}), 5)
+        self.assertTrue(all(len(m.to) == 1 for m in mail.outbox))
+        self.assertIn("New price: $30.00.", mail.outbox[0].body)
+
+    @override_settings(DISCOUNT_NOTIFY_RATE_PER_PROVIDER=0)
+    def test_changes_within_window_are_debounced_into_one_run(self):
+        with mock.patch.object(notify_discount, "apply_async") as queued:
+            self._discount(10)
+            self._discount(20)
+            queued.assert_called_once_with((self.product.pk,), countdown=3600)
+            self.assertEqual(mail.outbox, [])
+
+            # the run at the window's end emails the discount in force by then
+            notify_discount.apply(args=queued.call_args.args[0])
+            self.assertEqual(len(mail.outbox), 5)
+            self.assertIn("discounted by 20", mail.outbox[0].body)
+
+            cache.clear()  # the window has passed
+            self._discount(30)
+            self.assertEqual(queued.call_count, 2)
+
+    def test_no_notification_without_discount(self):
+        self._discount(0)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(DISCOUNT_NOTIFY_BATCH_SIZE=2, DISCOUNT_NOTIFY_RATE_PER_PROVIDER=0)
+    def test_failed_batch_resumes_without_resending(self):
+        real_send = EmailBackend.send_messages
+        calls = []
+
+        def flaky(backend, messages):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise OSError("connection reset")
+            return real_send(backend, messages)
+
+        Product.objects.filter(pk=self.product.pk).update(discount_percent=25)
+        with mock.patch.object(EmailBackend, "send_messages", autospec=True, side_effect=flaky):
+            with self.assertRaises(OSError) as ctx:
+                send_discount_notifications(self.product.pk)
+        self.assertEqual(len(mail.outbox), 2)
+
+        sent, _ = send_discount_notifications(self.product.pk, after=ctx.exception.resume_after)
+        self.assertEqual(sent, 3)
+        self.assertEqual(len({m.to[0] for m in mail.outbox}), 5)
+
+    def test_eager_run_in_request_is_not_throttled(self):
+        # default DISCOUNT_NOTIFY_RATE_PER_PROVIDER: paced, these 24 gmail.com
+        # recipients would keep the request waiting for over two seconds
+        for n in range(5, 27):
+            fan = UserAuth.objects.create_user(username=f"fan{n}", email=f"fan{n}@gmail.com")
+            WishlistItem.objects.create(user=fan, product=self.product)
+
+        started = time.monotonic()
+        response = self._discount(25)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(mail.outbox), 27)
+
+    @override_settings(DISCOUNT_NOTIFY_RATE_PER_PROVIDER=0)
+    def test_eager_failure_is_not_retried_in_request(self):
+        with mock.patch.object(EmailBackend, "send_messages", autospec=True,
+                               side_effect=OSError("connection refused")) as sent:
+            response = self._discount(25)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sent.call_count, 1)
+
+    def test_throttle_spaces_messages_per_provider(self):
+        clock = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        throttle = ProviderThrottle(2, clock=lambda: clock[0], sleep=sleep)
+        for address in ("a@gmail.com", "b@example.com", "c@GMAIL.com", "d@gmail.com"):
+            throttle.wait(address)
+        # example.com is not held up by gmail.com's budget
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.pm_user = UserAuth.objects.create_user(username="pm", email="pm@example.com", password="testpass")
+        self.pm_user.groups.add(Group.objects.get_or_create(name="product manager")[0])
+        self.sm_user = UserAuth.objects.create_user(username="sm", email="sm@example.com", password="testpass")
+        self.sm_user.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+
+        genre, _ = Genre.objects.get_or_create(name="Test Genre")
+        self.product = Product.objects.create(
+            title="Dune", author="Frank Herbert", price=40.00, stock=5, isbn="9780441172719",
+            genre=genre, description="d", publisher="Ace Books",
+            publication_date="2025-01-01", pages=200, language="EN",
+        )
+
+    def _as(self, user):
+        client = APIClient()
+        client.force_authenticate(UserAuth.objects.get(pk=user.pk))
+        return client
+
+    def test_second_read_is_served_without_queries(self):
+        url = reverse('product-detail', kwargs={"slug": self.product.slug})
+        first = self.client.get(url)
+        self.assertEqual(first["X-Catalog-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second["X-Catalog-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(catalog_cache.stats()["hits"], 1)
+        self.assertEqual(catalog_cache.stats()["misses"], 1)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        url = reverse('product-list')
+        self.client.get(url, {"page_size": 1})
+        self.assertEqual(self.client.get(url, {"page_size": 2})["X-Catalog-Cache"], "MISS")
+        self.assertEqual(self.client.get(url, {"page_size": 1})["X-Catalog-Cache"], "HIT")
+
+    def test_writes_invalidate_cached_reads(self):
+        detail = reverse('product-detail', kwargs={"slug": self.product.slug})
+        # shadowed by the router's detail route, so called directly
+        by_slug = lambda: product_detail_by_slug(APIRequestFactory().get(detail), slug=self.product.slug)
+        self.client.get(detail)
+        self.assertEqual(by_slug()["X-Catalog-Cache"], "MISS")
+
+        self._as(self.sm_user).post(reverse('product-set-price', kwargs={"slug": self.product.slug}), {"price": "50.00"}, format="json")
+        self.assertEqual(self.client.get(detail).data["price"], "50.00")
+        self.assertEqual(by_slug().data["price"], "50.00")
+
+        self._as(self.sm_user).post(reverse('product-set-discount', kwargs={"slug": self.product.slug}), {"discount": 10}, format="json")
+        self.assertEqual(self.client.get(detail).data["discount_percent"], "10.00")
+
+        self._as(self.pm_user).post(reverse('product-adjust-stock', kwargs={"slug": self.product.slug}), {"change": 3}, format="json")
+        self.assertEqual(self.client.get(detail).data["stock"], 8)
+
+        self.product.add_rating(4)
+        self.assertEqual(self.client.get(detail).data["rating"], 4.0)
+
+    def test_if_none_match_answers_304_until_the_catalog_changes(self):
+        url = reverse('product-list')
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(catalog_cache.stats()["not_modified"], 1)
+
+        self.product.title = "Dune (Deluxe)"
+        self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_concurrent_misses_compute_once(self):
+        request = APIRequestFactory().get("/api/products/")
+        request = Request(request)
+        calls = []
+        computed = threading.Event()
+
+        def slow():
+            calls.append(1)
+            computed.wait(5)
+            return Response({"ok": True})
+
+        leader = threading.Thread(target=catalog_cache.cached_response, args=(request, "test", slow))
+        leader.start()
+        while not calls:
+            time.sleep(0.01)
+        follower = []
+        waiter = threading.Thread(target=lambda: follower.append(catalog_cache.cached_response(request, "test", slow)))
+        waiter.start()
+        time.sleep(0.1)
+        computed.set()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(follower[0]["X-Catalog-Cache"], "HIT")
+        self.assertEqual(catalog_cache.stats()["waits"], 1)
+
+
+class SlugAllocationTests(APITestCase):
+    def setUp(self):
+        self.genre, _ = Genre.objects.get_or_create(name="Test Genre")
+
+    def _product(self, n, title="Dune", author="Frank Herbert", **fields):
+        return Product(
+            title=title, author=author, price=10, stock=1, isbn=f"97800000{n:05d}", genre=self.genre,
+            description="d", publisher="p", publication_date="2025-01-01", pages=100, language="EN",
+            **fields,
+        )
+
+    def test_duplicates_cost_one_lookup_each(self):
+        for n in range(5):
+            self._product(n).save()
+        self.assertEqual(
+            sorted(Product.objects.values_list("slug", flat=True)),
+            ["dune-frank-herbert", "dune-frank-herbert-1", "dune-frank-herbert-2",
+             "dune-frank-herbert-3", "dune-frank-herbert-4"],
+        )
+        # the 6th duplicate: one slug lookup and the insert (inside SAVEPOINT … RELEASE)
+        with self.assertNumQueries(4):
+            self._product(5).save()
+        self.assertTrue(Product.objects.filter(slug="dune-frank-herbert-5").exists())
+
+    def test_slug_kept_unless_title_or_author_change(self):
+        product = self._product(0)
+        product.save()
+        product.price = 12
+        with self.assertNumQueries(1):
+            product.save(update_fields=["price"])
+        product = Product.objects.get(pk=product.pk)
+        product.stock = 3
+        with self.assertNumQueries(1):
+            product.save()
+
+        product.title = "Dune Messiah"
+        product.save()
+        self.assertEqual(Product.objects.get(pk=product.pk).slug, "dune-messiah-frank-herbert")
+
+    def test_natural_slug_that_looks_like_a_suffix_is_not_reused(self):
+        self._product(0).save()
+        self._product(1, title="Dune", author="Frank Herbert 2").save()  # dune-frank-herbert-2
+        self._product(2).save()
+        self.assertEqual(Product.objects.get(isbn="9780000000002").slug, "dune-frank-herbert-3")
+
+    def test_assign_slugs_for_bulk_import(self):
+        self._product(0).save()
+        products = [self._product(n) for n in range(1, 4)] + [self._product(4, title="Emma", author="Jane Austen")]
+        with CaptureQueriesContext(connection) as ctx:
+            Product.objects.assign_slugs(products)
+        # one query, reading just the two families rather than the whole slug column
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn("WHERE", ctx.captured_queries[0]["sql"])
+        Product.objects.bulk_create(products)
+        self.assertEqual(
+            [p.slug for p in products],
+            ["dune-frank-herbert-1", "dune-frank-herbert-2", "dune-frank-herbert-3", "emma-jane-austen"],
+        )
+
+
+class CatalogImportExportTests(APITestCase):
+    HEADER = "isbn,title,author,genre,price,discount_percent,stock,publication_date,pages,language\n"
+
+    def _import(self, text, fmt="csv", **kwargs):
+        return import_catalog(io.StringIO(text), fmt, **kwargs)
+
+    def test_csv_import_creates_products_and_genres(self):
+        stats = self._import(
+            self.HEADER
+            + "978-0-00-000001-1,Dune,Frank Herbert,Sci-Fi,12.50,10,5,1965-08-01,412,EN\n"
+            + "9780000000028,Emma,Jane Austen,Classics,8.00,,3,1815-12-23,474,EN\n"
+        )
+        self.assertEqual((stats.created, stats.updated, stats.errors), (2, 0, []))
+        dune = Product.objects.get(isbn="9780000000011")
+        self.assertEqual(dune.slug, "dune-frank-herbert")
+        self.assertEqual(dune.genre.name, "Sci-Fi")
+        self.assertEqual(str(dune.discount_percent), "10.00")
+        self.assertEqual(Product.objects.get(isbn="9780000000028").genre.name, "Classics")
+
+    def test_upsert_by_isbn_keeps_slug_unless_title_changes(self):
+        self._import(self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,0,5,1965-08-01,412,EN\n")
+        stats = self._import(self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,9.99,0,7,1965-08-01,412,EN\n")
+        self.assertEqual((stats.created, stats.updated), (0, 1))
+        dune = Product.objects.get(isbn="9780000000011")
+        self.assertEqual((str(dune.price), dune.stock, dune.slug), ("9.99", 7, "dune-frank-herbert"))
+
+        self._import(self.HEADER + "9780000000011,Dune Messiah,Frank Herbert,Sci-Fi,9.99,0,7,1969-01-01,256,EN\n")
+        self.assertEqual(Product.objects.get(isbn="9780000000011").slug, "dune-messiah-frank-herbert")
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_insert_only_skips_existing_isbns(self):
+        self._import(self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,0,5,1965-08-01,412,EN\n")
+        stats = self._import(
+            self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,1.00,0,5,1965-08-01,412,EN\n",
+            update_existing=False,
+        )
+        self.assertEqual((stats.created, stats.updated), (0, 0))
+        self.assertEqual(str(Product.objects.get(isbn="9780000000011").price), "12.50")
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        stats = self._import(
+            '{"isbn": "123", "title": "Short", "author": "A", "genre": "G", "stock": 1, '
+            '"publication_date": "2020-01-01", "pages": 1}\n'
+            "not json\n"
+            '{"isbn": "9780000000011", "title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi", '
+            '"price": "12.50", "stock": 5, "publication_date": "1965-08-01", "pages": 412}\n'
+            '{"isbn": "9780000000028", "title": "Emma", "author": "Jane Austen", "genre": "Classics", '
+            '"stock": 3, "publication_date": "23/12/1815", "pages": 474}\n',
+            fmt="jsonl",
+        )
+        self.assertEqual(stats.created, 1)
+        self.assertEqual([line for line, _ in stats.errors], [1, 2, 4])
+        self.assertIn("13 digits", stats.errors[0][1])
+        self.assertEqual(list(Product.objects.values_list("isbn", flat=True)), ["9780000000011"])
+
+    def test_jsonl_lines_that_are_not_objects_are_rejected_per_row(self):
+        stats = self._import(
+            '123\n[1, 2]\n"x"\nnull\n'
+            '{"isbn": "9780000000011", "title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi", '
+            '"price": "12.50", "stock": 5, "publication_date": "1965-08-01", "pages": 412}\n',
+            fmt="jsonl",
+        )
+        self.assertEqual(stats.created, 1)
+        self.assertEqual([line for line, _ in stats.errors], [1, 2, 3, 4])
+        self.assertIn("not a JSON object", stats.errors[0][1])
+
+    def test_out_of_range_numbers_are_rejected_per_row(self):
+        row = "{isbn},Book,Author,Sci-Fi,{price},{discount},{stock},2020-01-01,{pages},EN\n"
+        bad = [
+            {"price": "1e20"}, {"price": "NaN"}, {"price": "-1"}, {"price": "9.999"},
+            {"discount": "NaN"}, {"stock": "-3"}, {"pages": "-10"},
+        ]
+        text = self.HEADER + "".join(
+            row.format(**{"isbn": f"97800000000{n:02d}", "price": "10", "discount": "0", "stock": "1",
+                          "pages": "100", **fields})
+            for n, fields in enumerate(bad)
+        ) + row.format(isbn="9780000000999", price="10", discount="0", stock="1", pages="100")
+        stats = self._import(text)
+        self.assertEqual(stats.created, 1)
+        self.assertEqual([line for line, _ in stats.errors], list(range(2, 2 + len(bad))))
+        # the catalog still reads
+        self.assertEqual(self.client.get(reverse("product-list")).status_code, 200)
+
+    def test_import_invalidates_catalog_cache(self):
+        before = catalog_cache.generation()
+        self._import(self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,0,5,1965-08-01,412,EN\n")
+        self.assertNotEqual(catalog_cache.generation(), before)
+
+    def test_export_round_trips_through_import(self):
+        self._import(
+            self.HEADER
+            + "9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,10,5,1965-08-01,412,EN\n"
+            + "9780000000028,Emma,Jane Austen,Classics,8.00,0,3,1815-12-23,474,EN\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.jsonl")
+            call_command("catalog_export", path, stdout=io.StringIO())
+            with open(path) as exported:
+                rows = [json.loads(line) for line in exported]
+            self.assertEqual([row["isbn"] for row in rows], ["9780000000011", "9780000000028"])
+            self.assertEqual(rows[0]["genre"], "Sci-Fi")
+
+            Product.objects.all().delete()
+            out = io.StringIO()
+            call_command("catalog_import", path, stdout=out)
+        self.assertIn("Imported 2 products (2 created, 0 updated, 0 rejected)", out.getvalue())
+        emma = Product.objects.get(isbn="9780000000028")
+        self.assertEqual((emma.title, str(emma.price), emma.pages), ("Emma", "8.00", 474))
+
+    def test_csv_export_to_stdout(self):
+        self._import(self.HEADER + "9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,0,5,1965-08-01,412,EN\n")
+        out = io.StringIO()
+        call_command("catalog_export", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("isbn,title,author,genre,"))
+        self.assertTrue(lines[1].startswith("9780000000011,Dune,Frank Herbert,Sci-Fi,12.50,"))
@@ -1,4 +1,4 @@
-from rest_framework import viewsets, filters, permissions, status
+from rest_framework import viewsets, permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -11,17 +11,22 @@ from rest_framework.parsers import JSONParser
 from django.db import transaction
 from django.db.models import F
 from decimal import Decimal
-from django.core.mail import send_mail
-from django.conf import settings
 
 from .models import Product, User, Genre
-from .serializers import ProductSerializer, UserSerializer, GenreSerializer, ProductPriceSerializer
+from .serializers import (
+    ProductSerializer, UserSerializer, GenreSerializer, ProductPriceSerializer,
+    ProductSearchResultSerializer,
+)
+from . import catalog_cache
+from .notifications import schedule_discount_notification
+from .search import ProductSearchFilter, get_search_backend
 from orders.models import Order, OrderItem
 from orders.serializers import OrderSerializer
 from cart.models import Cart
-from wishlist.models import WishlistItem
 
+from e_commerce_app.pagination import KeysetPagination
 from users.permissions import IsProductManager, IsSalesManager, IsCustomer, IsProductManagerOrSalesManager
+from users.roles import PRODUCT_MANAGER, SALES_MANAGER, has_role
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ProductViewSet(viewsets.ModelViewSet):
@@ -30,8 +35,10 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     lookup_field = 'slug'
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'description']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('created_at', 'id')
+    # ?search= is answered by the full-text index (title, author, description, publisher, isbn)
+    filter_backends = [ProductSearchFilter]
     ordering = ['-ordered_number']
 
     # default fallback
@@ -41,6 +48,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     permission_classes_by_action = {
         "list":       [permissions.AllowAny],
         "retrieve":   [permissions.AllowAny],
+        "search":     [permissions.AllowAny],
         "create":     [permissions.IsAuthenticated, IsProductManager],
         "update":     [permissions.IsAuthenticated, IsProductManager],
         "partial_update": [permissions.IsAuthenticated, IsProductManager],
@@ -54,10 +62,37 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "search"]:
             return qs.filter(price__isnull=False)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(request, "product-list", lambda: super(ProductViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(request, "product-detail", lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs))
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        GET /api/products/search/?q=<text>&limit=<n>
+        Ranked full-text matches with <mark>-highlighted title/author/publisher/isbn
+        and a description snippet. The last word is prefix-matched (search-as-you-type).
+        """
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        backend = get_search_backend()
+        products = list(backend.filter(self.get_queryset(), query, limit=limit)[:limit]) if query.strip() else []
+        highlights = backend.highlight(query, [p.pk for p in products])
+        serializer = ProductSearchResultSerializer(
+            products, many=True, context={"request": request, "highlights": highlights}
+        )
+        return Response({"query": query, "results": serializer.data})
+
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated, IsSalesManager])
     def pending(self, request):
         pending = self.get_queryset().filter(price__isnull=True)
@@ -73,9 +108,10 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = self.get_object()
         serializer = ProductPriceSerializer(product, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        product.price = serializer.validated_data["price"]
-        product.save(update_fields=["price"])
-        return Response(ProductSerializer(product).data)
+        for field, value in serializer.validated_data.items():
+            setattr(product, field, value)
+        product.save(update_fields=list(serializer.validated_data))
+        return Response({**ProductSerializer(product).data, "cost_price": serializer.data["cost_price"]})
     
     @action(
          detail=True,
@@ -87,7 +123,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     def set_discount(self, request, slug=None):
         """
         POST /api/products/{slug}/set_discount/  { "discount": <number 0–100> }
-        Records a percentage discount on the product and emails all wishlisters.
+        Records a percentage discount on the product and queues an email to its wishlisters.
         """
         product = self.get_object()
         discount = Decimal(request.data.get("discount", 0))
@@ -101,29 +137,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         product.discount_percent = discount
         product.save(update_fields=["discount_percent"])
 
-        # compute the new price for notification
-        new_price = (product.price * (Decimal("100") - discount) / Decimal("100")).quantize(product.price)
-
         if discount > Decimal("0"):
-            # email everyone who has this in their wishlist
-            wish_items = WishlistItem.objects.filter(product=product).select_related("user")
-
-            for item in wish_items:
-                try:
-                    send_mail(
-                        subject="Product Discounted 🎉",
-                        message=(
-                            f"Hi {item.user.username},\n\n"
-                            f"The product “{product.title}” you wish-listed "
-                            f"is now discounted by {discount}%.\n"
-                            f"New price: ${new_price}.\n\n"
-                            "Happy shopping!"
-                        ),
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[item.user.email],
-                    )
-                except Exception as e:
-                    print(f"MAIL FAILED: {e}")
+            # wishlisters are emailed by a background task once this commits
+            schedule_discount_notification(product)
 
         return Response(ProductSerializer(product).data)
 
@@ -171,6 +187,8 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=400
             )
 
+        # a queryset update sends no post_save, so the catalog is invalidated here
+        catalog_cache.bump_generation()
         new_stock = Product.objects.get(slug=slug).stock
         return Response({"message": "Stock updated", "stock": new_stock})
 
@@ -207,9 +225,9 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        if user.groups.filter(name__in=['product manager', 'sales manager']).exists() or user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(user=user)
+        if has_role(user, PRODUCT_MANAGER, SALES_MANAGER) or user.is_staff:
+            return Order.objects.with_items()
+        return Order.objects.filter(user=user).with_items()
 
     def perform_create(self, serializer):
         # Handle custom creation via PlaceOrderView – prevent direct creation here
@@ -221,6 +239,8 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 def product_detail_by_slug(request, slug):
-    product = get_object_or_404(Product, slug=slug)
-    serializer = ProductSerializer(product)
-    return Response(serializer.data)
+    def detail():
+        product = get_object_or_404(Product, slug=slug)
+        serializer = ProductSerializer(product)
+        return Response(serializer.data)
+    return catalog_cache.cached_response(request, "product-detail-slug", detail)
@@ -0,0 +1,7 @@
+"""
+Performance benchmarks. Run from src/, e.g.
+
+    python -m benchmarks.bench_search --rows 1000000
+
+Each script builds its own throwaway test database, so db.sqlite3 is never touched.
+"""
@@ -0,0 +1,90 @@
+"""
+Guest-to-user cart merge for guest carts of 1, 50 and 500 lines, half of
+which overlap with products already in the user's cart. Compares the old
+per-line loop that ran inside CartView.get with cart.merge.merge_guest_cart.
+
+    python -m benchmarks.bench_cart_merge
+"""
+import argparse
+import time
+from datetime import date
+from decimal import Decimal
+
+from benchmarks.common import report, scratch_database
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from admin_panel.models import Genre, Product
+from cart.merge import merge_guest_cart
+from cart.models import Cart, CartItem
+
+
+def legacy_merge(session_key, user):
+    """The loop CartView.get ran on every read before the set-based merge."""
+    with transaction.atomic():
+        guest_cart = Cart.objects.filter(session_key=session_key, is_active=True, user__isnull=True).first()
+        if guest_cart:
+            user_cart, _ = Cart.objects.get_or_create(user=user, is_active=True)
+            for item in guest_cart.items.all():
+                existing = user_cart.items.filter(product=item.product).first()
+                if existing:
+                    existing.quantity += item.quantity
+                    existing.save()
+                else:
+                    item.cart = user_cart
+                    item.save()
+            guest_cart.is_active = False
+            guest_cart.save()
+
+
+def seed(products, user, lines, run):
+    """A guest cart of `lines` products; the user's cart already holds every other one."""
+    Cart.objects.filter(user=user).delete()
+    user_cart = Cart.objects.create(user=user, is_active=True)
+    guest_cart = Cart.objects.create(session_key=f"bench-{lines}-{run}", is_active=True)
+    CartItem.objects.bulk_create(
+        [CartItem(cart=guest_cart, product=p, quantity=2) for p in products[:lines]]
+        + [CartItem(cart=user_cart, product=p, quantity=1) for p in products[:lines:2]]
+    )
+    return guest_cart.session_key
+
+
+def _time(merge, session_key, user):
+    start = time.perf_counter()
+    merge(session_key, user)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with scratch_database():
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        products = Product.objects.bulk_create([
+            Product(
+                title=f"Book {n}", author="Author", price=Decimal("12.50"), stock=1000,
+                isbn=f"{n:013d}", slug=f"book-{n}", genre=genre, description="d", publisher="p",
+                publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+            for n in range(max(args.lines))
+        ])
+        user = get_user_model().objects.create_user(username="shopper", email="shopper@example.com")
+
+        for lines in args.lines:
+            for label, merge in (("per-line loop", legacy_merge), ("set-based", merge_guest_cart)):
+                timings, queries = [], 0
+                for run in range(args.repeat):
+                    session_key = seed(products, user, lines, run)
+                    connection.queries_log.clear()  # keep the capture under the 9000-query log cap
+                    with CaptureQueriesContext(connection) as ctx:
+                        timings.append(_time(merge, session_key, user))
+                    queries = len(ctx.captured_queries)
+                report(f"merge {lines:>4} lines, {label} ({queries} queries)", timings)
+
+
+if __name__ == "__main__":
+    main()
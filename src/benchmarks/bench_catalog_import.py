@@ -0,0 +1,57 @@
+"""
+Throughput of manage.py catalog_import / catalog_export: a fresh load of N
+products, the same file again (every row an update), the reload with the
+search index deferred, and an export.
+
+    python -m benchmarks.bench_catalog_import --products 100000
+"""
+import argparse
+import io
+import time
+
+from benchmarks.common import scratch_database
+
+from admin_panel.catalog_io import import_catalog, stream_catalog
+
+GENRES = ["Fiction", "Non-Fiction", "Sci-Fi", "Biography", "Mystery", "Fantasy", "Horror", "Romance"]
+
+
+def catalog_csv(products):
+    lines = ["isbn,title,author,genre,price,discount_percent,stock,description,publisher,publication_date,pages,language"]
+    for n in range(products):
+        lines.append(
+            f"978{n:010d},Book {n},Author {n % 5000},{GENRES[n % len(GENRES)]},12.50,0,10,"
+            f"A book.,Publisher,2020-01-01,{100 + n % 900},EN"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def run(label, products, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<48} {elapsed:8.2f} s   {products / elapsed:12,.0f} products/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    text = catalog_csv(args.products)
+    with scratch_database():
+        def load(**kwargs):
+            stats = import_catalog(io.StringIO(text), "csv", chunk_size=args.batch_size, **kwargs)
+            assert stats.imported == args.products and not stats.errors
+
+        run("import (new products)", args.products, load)
+        run("import (all updates)", args.products, load)
+        run("import (all updates, search index deferred)", args.products,
+            lambda: load(defer_search_index=True))
+        run("export csv", args.products, lambda: sum(1 for _ in stream_catalog("csv")))
+        run("export jsonl", args.products, lambda: sum(1 for _ in stream_catalog("jsonl")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+What a frontend poll of an unchanged resource costs: bytes sent and server
+CPU per request, answered in full versus with If-None-Match (a 304). Covers
+the product list, the cart, the wishlist and the customer's order list.
+
+    python -m benchmarks.bench_conditional_get
+"""
+import argparse
+import time
+from datetime import date
+from decimal import Decimal
+
+from benchmarks.common import report, scratch_database
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from admin_panel.models import Genre, Product
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem
+from wishlist.models import WishlistItem
+
+
+def seed(user, products, lines, orders):
+    genre, _ = Genre.objects.get_or_create(name="Fiction")
+    catalog = Product.objects.bulk_create([
+        Product(
+            title=f"Book {n}", author="Author", price=Decimal("12.50"), discount_percent=Decimal("10"),
+            stock=1000, isbn=f"{n:013d}", slug=f"book-{n}", genre=genre, description="d" * 200,
+            publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+            cover_image=f"book_covers/{n}.jpg",
+        )
+        for n in range(products)
+    ])
+    cart = Cart.objects.create(user=user, is_active=True)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=2) for p in catalog[:lines]])
+    WishlistItem.objects.bulk_create([WishlistItem(user=user, product=p) for p in catalog[:lines]])
+    placed = Order.objects.bulk_create([Order(user=user, total_price=Decimal("37.50")) for _ in range(orders)])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=p, quantity=1, price_at_purchase=p.price,
+                  cost_at_purchase=p.unit_cost(p.price), product_title=p.title)
+        for order in placed for p in catalog[:3]
+    ])
+
+
+def poll(client, url, repeat, etag=None):
+    """(CPU seconds per request, bytes of the last response)."""
+    headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        response = client.get(url, **headers)
+        cpu.append(time.process_time() - start)
+    assert response.status_code == (304 if etag else 200), response.status_code
+    return cpu, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100, help="catalog size (one list page)")
+    parser.add_argument("--lines", type=int, default=50, help="cart lines and wishlist items")
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with scratch_database():
+        user = get_user_model().objects.create_user(username="poller", email="poller@example.com")
+        seed(user, args.products, args.lines, args.orders)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        endpoints = (
+            ("products", reverse("product-list")),
+            ("cart", reverse("cart")),
+            ("wishlist", "/api/wishlist/"),
+            ("my orders", reverse("my-orders")),
+        )
+        for label, url in endpoints:
+            etag = client.get(url)["ETag"]
+            full_cpu, full_bytes = poll(client, url, args.repeat)
+            cond_cpu, cond_bytes = poll(client, url, args.repeat, etag)
+            report(f"{label}: full body ({full_bytes} bytes)", full_cpu)
+            report(f"{label}: If-None-Match ({cond_bytes} bytes)", cond_cpu)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Resident memory while streaming GET /api/orders/export/orders.csv over a large
+synthetic order history (1M orders with one item each by default). RSS is
+sampled as the response is consumed; a streaming export keeps it flat.
+
+    python -m benchmarks.bench_export --orders 1000000
+"""
+import argparse
+import os
+import time
+from datetime import date
+from decimal import Decimal
+
+from benchmarks.common import scratch_database
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from admin_panel.models import Genre, Product
+from orders.models import Order, OrderItem
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+def seed(count, batch=20_000):
+    genre, _ = Genre.objects.get_or_create(name="Fiction")
+    product = Product.objects.create(
+        title="Bench Book", author="Author", price=Decimal("12.50"), stock=1_000_000,
+        isbn="9780000000000", slug="bench-book", genre=genre, description="d",
+        publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+    )
+    customer = get_user_model().objects.create_user(username="customer", email="customer@example.com")
+    for offset in range(0, count, batch):
+        with transaction.atomic():
+            orders = Order.objects.bulk_create(
+                [Order(user=customer, total_price=Decimal("25.00")) for _ in range(min(batch, count - offset))]
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=o, product=product, quantity=2, price_at_purchase=Decimal("12.50"),
+                          cost_at_purchase=Decimal("6.25"), product_title=product.title)
+                for o in orders
+            ])
+        connection.queries_log.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    with scratch_database():
+        started = time.perf_counter()
+        seed(args.orders)
+        print(f"seeded {args.orders} orders in {time.perf_counter() - started:.1f}s")
+
+        manager = get_user_model().objects.create_user(username="sales", email="sales@example.com")
+        manager.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        client = APIClient()
+        client.force_authenticate(manager)
+
+        baseline = rss_mb()
+        response = client.get(reverse("sales-export", args=["orders", "csv"]))
+        every = max(1, args.orders // args.samples)
+        lines = size = 0
+        next_sample = every
+        samples = []
+        started = time.perf_counter()
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+            if lines >= next_sample:
+                samples.append((lines, rss_mb()))
+                next_sample += every
+        elapsed = time.perf_counter() - started
+
+        print(f"exported {lines - 1} lines, {size / 2**20:.1f} MiB in {elapsed:.1f}s")
+        print(f"RSS before export {baseline:8.1f} MiB")
+        for done, rss in samples:
+            print(f"  after {done:>9} lines {rss:8.1f} MiB")
+        print(f"growth after the first sample: {samples[-1][1] - samples[0][1]:+.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Latency of POST /api/payment/process/<order_id>/ with the invoice pipeline run
+inline (eager Celery, the old synchronous behaviour) versus handed to a broker.
+
+The PDF render and the SMTP send are simulated with sleeps (WeasyPrint and a
+mail server are not needed); tune them to what production sees.
+
+    python -m benchmarks.bench_payment --render-ms 300 --smtp-ms 150
+"""
+import argparse
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from benchmarks.common import report, scratch_database
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from admin_panel.models import Genre, Product
+from e_commerce_app.celery import app as celery_app
+from orders import reservations
+from orders.models import Order, OrderItem
+
+CARD = {"card_number": "4111111111111111", "expiry": "12/99", "cvv": "123"}
+
+
+def seed_orders(user, count):
+    genre, _ = Genre.objects.get_or_create(name="Fiction")
+    product = Product.objects.create(
+        title="Bench Book", author="Author", price=Decimal("12.50"), stock=1_000_000,
+        isbn="9780000000000", slug="bench-book", genre=genre, description="d",
+        publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+    )
+    orders = []
+    for _ in range(count):
+        order = Order.objects.create(user=user, total_price=Decimal("25.00"))
+        OrderItem.objects.create(order=order, product=product, quantity=2, price_at_purchase=Decimal("12.50"))
+        reservations.reserve(order, {product: 2})
+        orders.append(order)
+    return orders
+
+
+def pay_all(client, orders):
+    timings = []
+    for order in orders:
+        start = time.perf_counter()
+        response = client.post(reverse("process-payment", kwargs={"order_id": order.pk}), CARD, format="json")
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--render-ms", type=float, default=300, help="simulated WeasyPrint render time")
+    parser.add_argument("--smtp-ms", type=float, default=150, help="simulated SMTP round trip")
+    args = parser.parse_args()
+
+    def slow_render(order):
+        time.sleep(args.render_ms / 1000)
+        return b"%PDF-1.7 bench"
+
+    def slow_send(*_args):
+        time.sleep(args.smtp_ms / 1000)
+
+    User = get_user_model()
+    with scratch_database(), tempfile.TemporaryDirectory() as media_root, \
+            override_settings(MEDIA_ROOT=media_root), \
+            patch("invoices.pdf_utils.generate_invoice_pdf", slow_render), \
+            patch("invoices.tasks.send_invoice_email", slow_send):
+        user = User.objects.create_user(username="payer", email="payer@example.com")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for label, eager in (("inline invoice (eager)", True), ("queued invoice (broker)", False)):
+            # the app was configured from CELERY_* settings, so override those keys
+            celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=eager, CELERY_BROKER_URL="memory://")
+            report(f"payment, {label}", pay_all(client, seed_orders(user, args.repeat)))
+            Order.objects.filter(user=user).delete()
+            Product.objects.all().delete()
+
+
+if __name__ == "__main__":
+    main()
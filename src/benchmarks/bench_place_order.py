@@ -0,0 +1,60 @@
+"""
+Latency and query count of POST /api/orders/place/ for carts of 1, 50 and 500 lines.
+
+    python -m benchmarks.bench_place_order
+"""
+import argparse
+from datetime import date
+from decimal import Decimal
+
+from benchmarks.common import report, scratch_database, timed
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from admin_panel.models import Genre, Product
+from cart.models import Cart, CartItem
+
+
+def seed_cart(user, lines):
+    genre, _ = Genre.objects.get_or_create(name="Fiction")
+    products = Product.objects.bulk_create([
+        Product(
+            title=f"Book {user.pk}-{n}", author="Author", price=Decimal("12.50"),
+            discount_percent=Decimal("10"), stock=1_000_000, isbn=f"{user.pk:04d}{n:09d}",
+            slug=f"book-{user.pk}-{n}", genre=genre, description="d", publisher="p",
+            publication_date=date(2020, 1, 1), pages=100, language="EN",
+        )
+        for n in range(lines)
+    ])
+    cart = Cart.objects.create(user=user, is_active=True)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=2) for p in products])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    User = get_user_model()
+    with scratch_database():
+        url = reverse("place-order")
+        for lines in args.lines:
+            user = User.objects.create_user(username=f"bench{lines}", email=f"bench{lines}@example.com")
+            seed_cart(user, lines)
+            client = APIClient()
+            client.force_authenticate(user)
+
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.post(url)
+            assert response.status_code == 201, response.data
+
+            report(f"place order, {lines:>4} cart lines ({len(ctx.captured_queries)} queries)",
+                   timed(lambda: client.post(url), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
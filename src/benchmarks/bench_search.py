@@ -0,0 +1,99 @@
+"""
+Full-text index vs. the old SearchFilter LIKE scan on a synthetic catalog.
+
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import random
+import time
+from datetime import date
+from functools import reduce
+from itertools import accumulate
+from operator import and_
+
+from benchmarks.common import (
+    make_vocabulary, report, scratch_database, timed, zipf_weights,
+)
+from django.db import transaction
+from django.db.models import Q
+
+from admin_panel.models import Genre, Product
+from admin_panel.search import get_search_backend
+
+
+def seed_catalog(rows, vocabulary, batch_size, seed):
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(zipf_weights(len(vocabulary))))
+    genre, _ = Genre.objects.get_or_create(name="Fiction")
+
+    def words(k):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=k))
+
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        batch = [
+            Product(
+                title=words(3).title(),
+                author=words(2).title(),
+                description=words(30),
+                publisher=words(1).title(),
+                isbn=f"978{n:010d}",
+                slug=f"bench-{n}",
+                price=10,
+                stock=10,
+                genre=genre,
+                publication_date=date(2020, 1, 1),
+                pages=100,
+                language="EN",
+            )
+            for n in range(offset, min(offset + batch_size, rows))
+        ]
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+    return time.perf_counter() - start
+
+
+def like_scan(query):
+    # what filters.SearchFilter(search_fields=['title', 'description']) compiled to
+    terms = [Q(title__icontains=t) | Q(description__icontains=t) for t in query.split()]
+    return Product.objects.filter(price__isnull=False).filter(reduce(and_, terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with scratch_database():
+        vocabulary = make_vocabulary(args.vocabulary, seed=args.seed)
+        elapsed = seed_catalog(args.rows, vocabulary, args.batch_size, args.seed)
+        print(f"seeded {args.rows} products in {elapsed:.1f}s (index maintained by triggers)")
+
+        backend = get_search_backend()
+        base = Product.objects.filter(price__isnull=False)
+        queries = {
+            "common term": vocabulary[0],
+            "mid-frequency term": vocabulary[len(vocabulary) // 50],
+            "rare term": vocabulary[-1],
+            "two terms": f"{vocabulary[1]} {vocabulary[len(vocabulary) // 20]}",
+            "prefix": vocabulary[len(vocabulary) // 50][:4],
+        }
+        print(f"backend: {type(backend).__name__}\n")
+        for label, query in queries.items():
+            report(f"LIKE  first 20   [{label}]",
+                   timed(lambda: list(like_scan(query).values_list("id", flat=True)[:20]), args.repeat))
+            report(f"INDEX first 20   [{label}]",
+                   timed(lambda: list(backend.filter(base, query, limit=20).values_list("id", flat=True)), args.repeat))
+            report(f"LIKE  all rows   [{label}]",
+                   timed(lambda: like_scan(query).count(), args.repeat))
+            report(f"INDEX top 1000   [{label}]",
+                   timed(lambda: len(backend.ranked_ids(query, 1000)), args.repeat))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "e_commerce_app.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@contextmanager
+def scratch_database():
+    """
+    Create (and afterwards destroy) a migrated test database, exactly like the
+    test runner does, with the test environment (locmem email, testserver host). SQLite gets an on-disk temp file rather than the test
+    runner's in-memory database, so timings include real page I/O.
+    """
+    old_name = connection.settings_dict["NAME"]
+    scratch_dir = None
+    if connection.vendor == "sqlite":
+        scratch_dir = tempfile.mkdtemp(prefix="bench-")
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(scratch_dir, "bench.sqlite3")
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def timed(fn, repeat=5):
+    """Run `fn` `repeat` times, returning the wall-clock seconds of each run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings, unit="ms"):
+    scale = 1000 if unit == "ms" else 1
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(
+        f"{label:<48} median {statistics.median(timings) * scale:10.2f} {unit}"
+        f"   p95 {p95 * scale:10.2f} {unit}   (n={len(timings)})"
+    )
+
+
+def make_vocabulary(size, seed=0):
+    """Deterministic pseudo-words, so text has realistic term frequencies."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mir", "sen", "tha", "vel", "dor", "an", "is", "ur",
+                 "ben", "cor", "fal", "gri", "hol", "jen", "mar", "nor", "pel", "ros"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
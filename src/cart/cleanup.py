@@ -0,0 +1,58 @@
+"""
+Garbage collection for carts and sessions nobody will come back to:
+
+* guest carts older than GUEST_CART_TTL whose session is gone or expired,
+* inactive carts (merged into a user's cart at login, or checked out),
+* expired database sessions.
+
+Rows are deleted `batch_size` at a time, each batch in its own short
+transaction, so the sweep never holds SQLite's write lock for long.
+"""
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Cart
+
+
+def _delete_in_batches(queryset, batch_size, reclaimed):
+    """Delete what `queryset` matches, `batch_size` rows per transaction; tally rows per model in `reclaimed`."""
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return
+            # cascades (a cart's items) go in the same batch
+            _, per_model = queryset.model.objects.filter(pk__in=pks).delete()
+            reclaimed.update(per_model)
+
+
+def _session_model():
+    """The Session model if sessions are stored in the database, else None."""
+    backend = settings.SESSION_ENGINE.rsplit(".", 1)[-1]
+    if not apps.is_installed("django.contrib.sessions") or backend not in ("db", "cached_db"):
+        return None
+    from django.contrib.sessions.models import Session
+    return Session
+
+
+def collect_garbage(batch_size=500, now=None):
+    """Run every sweep; returns the rows deleted per model label, e.g. {"cart.Cart": 12, ...}."""
+    now = now or timezone.now()
+    reclaimed = Counter()
+
+    Session = _session_model()
+
+    abandoned = Cart.objects.filter(user__isnull=True, created_at__lt=now - settings.GUEST_CART_TTL)
+    if Session is not None:
+        live = Session.objects.filter(expire_date__gte=now).values("session_key")
+        abandoned = abandoned.exclude(session_key__in=live)
+    _delete_in_batches(abandoned, batch_size, reclaimed)
+    _delete_in_batches(Cart.objects.filter(is_active=False), batch_size, reclaimed)
+
+    if Session is not None:
+        _delete_in_batches(Session.objects.filter(expire_date__lt=now), batch_size, reclaimed)
+    return dict(reclaimed)
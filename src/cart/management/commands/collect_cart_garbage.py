@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from cart.cleanup import collect_garbage
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned guest carts, inactive carts and expired sessions in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+
+    def handle(self, *args, **options):
+        reclaimed = collect_garbage(batch_size=options['batch_size'])
+        for label, count in sorted(reclaimed.items()):
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Reclaimed {sum(reclaimed.values())} rows."))
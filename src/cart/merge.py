@@ -0,0 +1,33 @@
+from django.db import transaction
+
+from .models import Cart, CartItem
+
+
+@transaction.atomic
+def merge_guest_cart(session_key, user):
+    """
+    Move the guest cart of `session_key` into `user`'s active cart, set-based:
+    one INSERT ... ON CONFLICT copies the guest lines over, adding the guest
+    quantity to products the user's cart already holds, then the guest lines
+    are deleted and the guest cart is retired. Runs once per login (see
+    users.signals); returns the number of guest lines merged.
+    """
+    if not session_key:
+        return 0
+    guest_cart = (
+        Cart.objects.select_for_update()
+        .filter(session_key=session_key, is_active=True, user__isnull=True)
+        .first()
+    )
+    if guest_cart is None:
+        return 0
+
+    guest_items = CartItem.objects.filter(cart=guest_cart)
+    merged = guest_items.count()
+    if merged:
+        user_cart, _ = Cart.objects.get_or_create(user=user, is_active=True)
+        CartItem.objects.add_from(user_cart, guest_cart)
+        guest_items.delete()
+
+    Cart.objects.filter(pk=guest_cart.pk).update(is_active=False)
+    return merged
@@ -0,0 +1,14 @@
+class GuestSessionMiddleware:
+    """
+    Remember the session key a request arrived with as
+    request.guest_session_key. django.contrib.auth.login() cycles the key
+    before it sends user_logged_in, so the guest cart (stored under the old
+    key) is looked up through this attribute by users.signals.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.guest_session_key = request.session.session_key
+        return self.get_response(request)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:47
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """Fold duplicate (cart, product) lines into the oldest one, summing quantities."""
+    CartItem = apps.get_model("cart", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart_id", "product_id")
+        .annotate(lines=Count("id"), keep=Min("id"), quantity=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for group in duplicates:
+        lines = CartItem.objects.filter(cart_id=group["cart_id"], product_id=group["product_id"])
+        lines.filter(pk=group["keep"]).update(quantity=group["quantity"])
+        lines.exclude(pk=group["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product"
+            ),
+        ),
+    ]
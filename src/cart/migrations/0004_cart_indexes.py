@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0003_cartitem_unique_cart_product"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["user", "is_active"], name="cart_user_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["session_key", "is_active"], name="cart_session_active_idx"
+            ),
+        ),
+    ]
@@ -1,13 +1,116 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models
 from django.conf import settings
+from django.db.models import ExpressionWrapper, F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
 from admin_panel.models import Product  
 
+MONEY = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+def discounted_unit_price(product="product"):
+    """
+    SQL expression for a product's unit price after its discount, rounded to
+    cents: price * (100 - discount_percent) / 100. `product` is the lookup
+    path to the product. Used for both the cart display and the order total,
+    so the two always agree.
+    """
+    price = Coalesce(F(f"{product}__price"), Value(Decimal("0")), output_field=MONEY)
+    discount = Coalesce(F(f"{product}__discount_percent"), Value(Decimal("0")), output_field=MONEY)
+    return Round(
+        ExpressionWrapper(price * (Value(Decimal("100")) - discount) / Value(Decimal("100")), output_field=MONEY),
+        2,
+        output_field=MONEY,
+    )
+
+
+class CartItemQuerySet(models.QuerySet):
+    def _upsert(self, select_sql, params, override=False, returning=False):
+        """INSERT (cart_id, product_id, quantity) rows from `select_sql`, folding conflicts into the existing line."""
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        quantity = "excluded.quantity" if override else f"{table}.quantity + excluded.quantity"
+        sql = (
+            f"INSERT INTO {table} (cart_id, product_id, quantity) {select_sql} "
+            f"ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {quantity}"
+        )
+        if returning:
+            sql += " RETURNING quantity"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0] if returning else cursor.rowcount
+
+    def add(self, cart, product, quantity, override=False):
+        """
+        Add `quantity` of `product` to `cart` (or set it, with override) in one
+        INSERT ... ON CONFLICT statement, so concurrent requests can neither
+        duplicate the line nor lose an increment. Returns the new quantity.
+        """
+        return self._upsert(
+            "VALUES (%s, %s, %s)", [cart.pk, product.pk, quantity],
+            override=override, returning=True,
+        )
+
+    def add_from(self, cart, source_cart):
+        """Fold every line of `source_cart` into `cart`, adding quantities where both hold the product."""
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+        # the WHERE keeps SQLite from reading ON CONFLICT as a join constraint
+        return self._upsert(
+            f"SELECT %s, product_id, SUM(quantity) FROM {table} WHERE cart_id = %s GROUP BY product_id",
+            [cart.pk, source_cart.pk],
+        )
+
+    def with_pricing(self):
+        """Lines with their product joined in and `unit_price` / `line_total` annotated."""
+        return self.select_related("product").annotate(
+            unit_price=discounted_unit_price(),
+            line_total=ExpressionWrapper(discounted_unit_price() * F("quantity"), output_field=MONEY),
+        )
+
+
+class CartQuerySet(models.QuerySet):
+    def active_for(self, user):
+        """`user`'s active cart, the oldest should there be more than one; None if none."""
+        # is_active is fixed by the filter; naming it lets cart_user_active_idx
+        # serve the ORDER BY instead of the planner falling back to the user_id index
+        return self.filter(user=user, is_active=True).order_by("is_active", "pk").first()
+
+    def with_pricing(self):
+        """
+        Carts with a `total` annotation and their priced lines prefetched: two
+        queries however many lines the cart holds.
+        """
+        totals = (
+            CartItem.objects.filter(cart=OuterRef("pk"))
+            .with_pricing()
+            .values("cart")
+            .annotate(total=Sum("line_total"))
+            .values("total")
+        )
+        return self.annotate(
+            total=Coalesce(Subquery(totals, output_field=MONEY), Value(Decimal("0")), output_field=MONEY)
+        ).prefetch_related(
+            Prefetch("items", queryset=CartItem.objects.with_pricing().order_by("pk"))
+        )
+
+
 class Cart(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # CartView.get_cart looks the active cart up by owner or by session
+            models.Index(fields=["user", "is_active"], name="cart_user_active_idx"),
+            models.Index(fields=["session_key", "is_active"], name="cart_session_active_idx"),
+        ]
+
     def __str__(self):
         if self.user:
             return f"Cart of {self.user.username}"
@@ -18,6 +121,10 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
-    @property
-    def total_price(self):
-        return self.quantity * self.product.price
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="unique_cart_product"),
+        ]
+
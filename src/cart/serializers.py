@@ -1,9 +1,9 @@
-from decimal import Decimal
 from rest_framework import serializers
 from .models import Cart, CartItem
 from admin_panel.models import Product
 
 class CartItemSerializer(serializers.ModelSerializer):
+    # expects items from CartItem.objects.with_pricing() (see Cart.objects.with_pricing)
     product_title = serializers.CharField(source='product.title', read_only=True)
     product_price = serializers.DecimalField(
         source='product.price', max_digits=10, decimal_places=2, read_only=True
@@ -17,8 +17,13 @@ class CartItemSerializer(serializers.ModelSerializer):
         decimal_places=2,
         read_only=True
     )
-    # ◀ Compute the unit price after discount
-    discounted_price = serializers.SerializerMethodField()
+    # ◀ Unit price after discount, computed in SQL
+    discounted_price = serializers.DecimalField(
+        source='unit_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    total_price = serializers.DecimalField(
+        source='line_total', max_digits=10, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = CartItem
@@ -35,21 +40,18 @@ class CartItemSerializer(serializers.ModelSerializer):
             'stock',
         ]
 
-    def get_discounted_price(self, obj):
-        discount = obj.product.discount_percent or Decimal("0")
-        price = obj.product.price
-        return (
-            price * (Decimal("100") - discount) / Decimal("100")
-        ).quantize(Decimal("0.01"))
-
 
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
-    total = serializers.SerializerMethodField()
-
-    def get_total(self, obj):
-        return sum(item.total_price for item in obj.items.all())
+    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Cart
         fields = ['id', 'user', 'created_at', 'is_active', 'items', 'total']
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """One line of a batch cart update; same meaning as the fields CartView.post takes."""
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0)
+    override = serializers.BooleanField(default=False)
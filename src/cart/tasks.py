@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from .cleanup import collect_garbage
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def collect_cart_garbage(batch_size=500):
+    """Periodic sweep (CELERY_BEAT_SCHEDULE) of abandoned guest carts, inactive carts and expired sessions."""
+    reclaimed = collect_garbage(batch_size=batch_size)
+    logger.info("Cart garbage collection reclaimed %s", reclaimed or "nothing")
+    return reclaimed
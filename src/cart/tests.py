@@ -1,9 +1,29 @@
+import threading
+
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from admin_panel.models import Product, Genre
+from orders.models import Order
 from cart.models import Cart, CartItem
-from datetime import date
+from cart.cleanup import collect_garbage
+from cart.merge import merge_guest_cart
+from cart.middleware import GuestSessionMiddleware
+from django.conf import settings
+from django.contrib.auth import login
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.db import IntegrityError, connection, connections
+from django.test import TransactionTestCase
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
+from io import StringIO
+from decimal import Decimal
+from e_commerce_app.testing import QueryPlanAssertions
 
 User = get_user_model()
 
@@ -82,3 +102,388 @@ class CartTests(APITestCase):
         print("Cart Total:", res.data.get("total"))
         self.assertEqual(res.status_code, 200)
         self.assertEqual(float(res.data.get("total", 0)), 100.00)
+
+
+class CartMergeTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass123")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.products = [
+            Product.objects.create(
+                title=f"Merge Book {n}", author="Author", price=10, stock=1000,
+                isbn=f"97811111111{n:02d}", genre=self.genre, description="d",
+                publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+            for n in range(60)
+        ]
+        self.cart_url = reverse('cart')
+
+    def _guest_cart(self, client, lines):
+        for product in self.products[:lines]:
+            client.post(self.cart_url, {"product_id": product.id, "quantity": 2}, format='json')
+        return Cart.objects.get(session_key=client.session.session_key)
+
+    def test_login_merges_guest_cart(self):
+        user_cart = Cart.objects.create(user=self.user, is_active=True)
+        CartItem.objects.create(cart=user_cart, product=self.products[0], quantity=1)
+
+        client = APIClient()
+        guest_cart = self._guest_cart(client, 2)
+        response = client.post(reverse('token_obtain_pair'), {"username": "shopper", "password": "pass123"})
+        self.assertEqual(response.status_code, 200)
+
+        quantities = dict(CartItem.objects.filter(cart=user_cart).values_list("product_id", "quantity"))
+        self.assertEqual(quantities, {self.products[0].id: 3, self.products[1].id: 2})
+        guest_cart.refresh_from_db()
+        self.assertFalse(guest_cart.is_active)
+        self.assertFalse(guest_cart.items.exists())
+
+    def test_session_login_merges_guest_cart(self):
+        client = APIClient()
+        guest_cart = self._guest_cart(client, 2)
+        request = RequestFactory().post("/login/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = guest_cart.session_key
+
+        def log_in(request):
+            login(request, self.user, backend="django.contrib.auth.backends.ModelBackend")
+            self.assertNotEqual(request.session.session_key, guest_cart.session_key)
+            return HttpResponse()
+
+        SessionMiddleware(GuestSessionMiddleware(log_in))(request)
+
+        user_cart = Cart.objects.get(user=self.user, is_active=True)
+        self.assertEqual(user_cart.items.count(), 2)
+        guest_cart.refresh_from_db()
+        self.assertFalse(guest_cart.is_active)
+
+    def test_merge_query_count_does_not_grow_with_cart_size(self):
+        counts = []
+        for lines in (1, 50):
+            client = APIClient()
+            guest_cart = self._guest_cart(client, lines)
+            user_cart, _ = Cart.objects.get_or_create(user=self.user, is_active=True)
+            CartItem.objects.create(cart=user_cart, product=self.products[0], quantity=1)
+            with CaptureQueriesContext(connection) as ctx:
+                merge_guest_cart(guest_cart.session_key, self.user)
+            counts.append(len(ctx.captured_queries))
+            CartItem.objects.filter(cart=user_cart).delete()
+        self.assertEqual(counts[0], counts[1])
+
+    def test_cart_read_no_longer_merges(self):
+        client = APIClient()
+        guest_cart = self._guest_cart(client, 1)
+        client.force_authenticate(self.user)
+        response = client.get(self.cart_url)
+        self.assertEqual(response.data["items"], [])
+        guest_cart.refresh_from_db()
+        self.assertTrue(guest_cart.is_active)
+
+
+class CartPricingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pricer", email="pricer@example.com", password="pass123")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.products = [
+            Product.objects.create(
+                title=f"Priced Book {n}", author="Author", price=Decimal("12.50"), discount_percent=Decimal("15"),
+                stock=100, isbn=f"97822222222{n:02d}", genre=self.genre, description="d",
+                publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+            for n in range(20)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cart_url = reverse('cart')
+
+    def _fill(self, lines, quantity=3):
+        cart, _ = Cart.objects.get_or_create(user=self.user, is_active=True)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product=p, quantity=quantity) for p in self.products[:lines]]
+        )
+        return cart
+
+    def test_total_includes_discount(self):
+        self._fill(2)
+        data = self.client.get(self.cart_url).data
+        item = data["items"][0]
+        self.assertEqual(Decimal(item["discounted_price"]), Decimal(item["total_price"]) / 3)
+        self.assertEqual(
+            Decimal(data["total"]), sum(Decimal(line["total_price"]) for line in data["items"])
+        )
+        self.assertLess(Decimal(data["total"]), Decimal("12.50") * 6)
+
+    def test_cart_total_matches_order_total(self):
+        self._fill(5)
+        cart_total = Decimal(self.client.get(self.cart_url).data["total"])
+        response = self.client.post(reverse('place-order'))
+        self.assertEqual(response.status_code, 201, response.data)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_price, cart_total)
+
+    def test_read_query_count_does_not_grow_with_cart_size(self):
+        counts = []
+        for lines in (1, 20):
+            CartItem.objects.filter(cart__user=self.user).delete()
+            self._fill(lines)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(self.cart_url)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class CartBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="batcher", email="batcher@example.com", password="pass123")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.products = [
+            Product.objects.create(
+                title=f"Series Book {n}", author="Author", price=10, stock=5,
+                isbn=f"97833333333{n:02d}", genre=self.genre, description="d",
+                publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+            for n in range(30)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('cart-items')
+
+    def _quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list("product_id", "quantity"))
+
+    def test_batch_adds_updates_and_removes(self):
+        cart = Cart.objects.create(user=self.user, is_active=True)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=1)
+        CartItem.objects.create(cart=cart, product=self.products[1], quantity=1)
+        CartItem.objects.create(cart=cart, product=self.products[2], quantity=4)
+
+        response = self.client.patch(self.url, [
+            {"product_id": self.products[0].id, "quantity": 2},
+            {"product_id": self.products[1].id, "quantity": 0},
+            {"product_id": self.products[2].id, "quantity": 3, "override": True},
+            {"product_id": self.products[3].id, "quantity": 1},
+            {"product_id": self.products[3].id, "quantity": 1},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._quantities(), {
+            self.products[0].id: 3, self.products[2].id: 3, self.products[3].id: 2,
+        })
+        self.assertEqual(len(response.data["items"]), 3)
+
+    def test_insufficient_stock_rejects_whole_batch(self):
+        response = self.client.patch(self.url, [
+            {"product_id": self.products[0].id, "quantity": 1},
+            {"product_id": self.products[1].id, "quantity": 6},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product_ids"], [self.products[1].id])
+        self.assertEqual(self._quantities(), {})
+
+    def test_unknown_product_is_404(self):
+        response = self.client.patch(self.url, [{"product_id": 999999, "quantity": 1}], format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        Cart.objects.create(user=self.user, is_active=True)
+        counts = []
+        for lines in (2, 30):
+            CartItem.objects.filter(cart__user=self.user).delete()
+            operations = [{"product_id": p.id, "quantity": 1} for p in self.products[:lines]]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(self.url, operations, format='json')
+            self.assertEqual(len(response.data["items"]), lines)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class CartUpsertTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="upserter", email="upserter@example.com", password="pass123")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Upsert Book", author="Author", price=10, stock=5,
+            isbn="9784444444400", genre=self.genre, description="d",
+            publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+        )
+        self.cart = Cart.objects.create(user=self.user, is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_lines_are_rejected(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+
+    def test_add_increments_and_override_sets(self):
+        self.assertEqual(CartItem.objects.add(self.cart, self.product, 2), 2)
+        self.assertEqual(CartItem.objects.add(self.cart, self.product, 3), 5)
+        self.assertEqual(CartItem.objects.add(self.cart, self.product, 1, override=True), 1)
+        self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 1)
+
+    def test_rejected_add_leaves_no_line(self):
+        response = self.client.post(reverse('cart'), {"product_id": self.product.id, "quantity": 6}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+
+
+class CartConcurrencyTests(TransactionTestCase):
+    """Many threads adding to one cart at once; each thread gets its own DB connection."""
+
+    THREADS = 8
+    ADDS_PER_THREAD = 25
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="hammer", email="hammer@example.com", password="pass123")
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Hot Book", author="Author", price=10, stock=10000,
+            isbn="9785555555500", genre=genre, description="d",
+            publisher="p", publication_date=date(2020, 1, 1), pages=100, language="EN",
+        )
+        self.cart = Cart.objects.create(user=self.user, is_active=True)
+
+    def _hammer(self, add):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.ADDS_PER_THREAD):
+                    add()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_upserts_keep_one_line_and_every_increment(self):
+        self._hammer(lambda: CartItem.objects.add(self.cart, self.product, 1))
+        self.assertEqual(
+            list(CartItem.objects.filter(cart=self.cart).values_list("quantity", flat=True)),
+            [self.THREADS * self.ADDS_PER_THREAD],
+        )
+
+    def test_concurrent_add_to_cart_requests(self):
+        def add():
+            client = APIClient()
+            client.force_authenticate(User.objects.get(pk=self.user.pk))
+            response = client.post(reverse('cart'), {"product_id": self.product.id, "quantity": 1}, format='json')
+            assert response.status_code == 201, response.data
+
+        self._hammer(add)
+        self.assertEqual(
+            list(CartItem.objects.filter(cart=self.cart).values_list("quantity", flat=True)),
+            [self.THREADS * self.ADDS_PER_THREAD],
+        )
+
+
+class CartIndexPlanTests(QueryPlanAssertions, APITestCase):
+    def setUp(self):
+        users = [
+            User.objects.create_user(username=f"owner{n}", email=f"owner{n}@example.com", password="pass123")
+            for n in range(20)
+        ]
+        Cart.objects.bulk_create(
+            [Cart(user=user, is_active=active) for user in users for active in (False, False, True)]
+            + [Cart(session_key=f"guest-{n}", is_active=n % 3 == 0) for n in range(60)]
+        )
+        self.user = users[0]
+
+    def test_user_cart_lookup(self):
+        self.client.force_authenticate(self.user)
+        self.assertEndpointUsesIndex(lambda: self.client.get(reverse('cart')), "cart_cart", "cart_user_active_idx")
+
+    def test_guest_cart_lookup(self):
+        self.client.get(reverse('cart'))  # opens the session
+        self.assertEndpointUsesIndex(lambda: self.client.get(reverse('cart')), "cart_cart", "cart_session_active_idx")
+
+
+class CartGarbageCollectionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="keeper", email="keeper@example.com", password="pass123")
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Kept Book", author="Author", price=10, stock=10, isbn="9788888888800",
+            genre=genre, description="d", publisher="p", publication_date=date(2020, 1, 1),
+            pages=100, language="EN",
+        )
+        now = timezone.now()
+        Session.objects.create(session_key="live", session_data="", expire_date=now + timedelta(days=1))
+        Session.objects.create(session_key="expired", session_data="", expire_date=now - timedelta(days=1))
+
+        self.abandoned = [self._cart(session_key=f"gone-{n}", age=40) for n in range(5)]
+        self.expired_session = self._cart(session_key="expired", age=40)
+        self.live_session = self._cart(session_key="live", age=40)
+        self.recent_guest = self._cart(session_key="gone-new", age=1)
+        self.merged = self._cart(session_key="merged", age=1, is_active=False)
+        self.checked_out = self._cart(user=self.user, age=1, is_active=False)
+        self.user_cart = self._cart(user=self.user, age=400)
+
+    def _cart(self, age, **fields):
+        cart = Cart.objects.create(**fields)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        Cart.objects.filter(pk=cart.pk).update(created_at=timezone.now() - timedelta(days=age))
+        return cart
+
+    def test_collects_in_batches_and_reports(self):
+        reclaimed = collect_garbage(batch_size=2)
+
+        self.assertEqual(reclaimed, {"cart.Cart": 8, "cart.CartItem": 8, "sessions.Session": 1})
+        self.assertEqual(
+            set(Cart.objects.values_list("pk", flat=True)),
+            {self.live_session.pk, self.recent_guest.pk, self.user_cart.pk},
+        )
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+        self.assertEqual(collect_garbage(), {})
+
+    def test_command(self):
+        out = StringIO()
+        call_command("collect_cart_garbage", "--batch-size", "3", stdout=out)
+        self.assertIn("Reclaimed 17 rows.", out.getvalue())
+        self.assertEqual(Cart.objects.count(), 3)
+
+
+class CartConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="poller", email="poller@example.com", password="testpass")
+        self.client.force_authenticate(self.user)
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Poll Book", author="Author", price=Decimal("20.00"), stock=10, isbn="9785555555501",
+            genre=genre, description="d", publisher="p", publication_date=date(2020, 1, 1),
+            pages=100, language="EN",
+        )
+        self.client.post(reverse('cart'), {"product_id": self.product.id, "quantity": 1}, format='json')
+
+    def test_unchanged_cart_answers_304_without_pricing_it(self):
+        first = self.client.get(reverse('cart'))
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(reverse('cart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], etag)
+        # the cart lookup and the validator query; no pricing subqueries
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_cart_or_product_changes_change_the_etag(self):
+        etag = self.client.get(reverse('cart'))["ETag"]
+        self.client.post(reverse('cart'), {"product_id": self.product.id, "quantity": 1}, format='json')
+        response = self.client.get(reverse('cart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"][0]["quantity"], 2)
+
+        etag = response["ETag"]
+        Product.objects.filter(pk=self.product.pk).update(discount_percent=10)
+        response = self.client.get(reverse('cart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], "36.00")
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import CartView
+from .views import CartItemsBatchView, CartView
 
 urlpatterns = [
-    path('', CartView.as_view(), name='cart')
+    path('', CartView.as_view(), name='cart'),
+    path('items/', CartItemsBatchView.as_view(), name='cart-items'),
 ]
@@ -3,18 +3,19 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Cart, CartItem
 from admin_panel.models import Product
-from .serializers import CartSerializer
+from .serializers import CartOperationSerializer, CartSerializer
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import AllowAny
 from django.db.models import Q
 from django.db import transaction
+from e_commerce_app.conditional import conditional_response, etag_for, fingerprint
 
 class CartView(APIView):
     permission_classes = [AllowAny]
 
     def get_cart(self, request):
         if request.user.is_authenticated:
-            cart, _ = Cart.objects.get_or_create(user=request.user, is_active=True)
+            cart = Cart.objects.active_for(request.user) or Cart.objects.create(user=request.user, is_active=True)
         else:
             session_key = request.session.session_key
             if not session_key:
@@ -23,42 +24,25 @@ class CartView(APIView):
             cart, _ = Cart.objects.get_or_create(session_key=session_key, is_active=True)
         return cart
 
+    def cart_data(self, cart):
+        """Serialized cart, priced in SQL (one query for the total, one for the lines)."""
+        return CartSerializer(Cart.objects.with_pricing().get(pk=cart.pk)).data
+
+    def cart_etag(self, request, cart):
+        """Validator over every column the cart body shows, read in one query."""
+        lines = CartItem.objects.filter(cart=cart).order_by("pk").values_list(
+            "pk", "quantity", "product_id", "product__title", "product__price",
+            "product__discount_percent", "product__stock", "product__cover_image",
+        )
+        return etag_for(request, cart.pk, cart.user_id, cart.created_at, cart.is_active, fingerprint(lines))
+
     def get(self, request):
-        # Merge guest cart into user cart if JWT-authenticated
-        session_key = request.session.session_key
-        if session_key and request.user.is_authenticated:
-            with transaction.atomic():
-                try:
-                    guest_cart = Cart.objects.get(
-                        session_key=session_key,
-                        is_active=True,
-                        user__isnull=True
-                    )
-                except Cart.DoesNotExist:
-                    guest_cart = None
-
-                if guest_cart:
-                    user_cart, _ = Cart.objects.get_or_create(
-                        user=request.user,
-                        is_active=True
-                    )
-                    for item in guest_cart.items.all():
-                        existing = user_cart.items.filter(product=item.product).first()
-                        if existing:
-                            existing.quantity += item.quantity
-                            existing.save()
-                        else:
-                            item.cart = user_cart
-                            item.save()
-                    guest_cart.is_active = False
-                    guest_cart.save()
-
-        # Return the current cart (merged if applicable)
+        # a guest cart is merged once, at login (cart.merge via users.signals)
         cart = self.get_cart(request)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        return conditional_response(
+            request, self.cart_etag(request, cart), lambda: Response(self.cart_data(cart))
+        )
 
-    @transaction.atomic
     def post(self, request):
         cart = self.get_cart(request)
         product_id = request.data.get("product_id")
@@ -75,39 +59,93 @@ class CartView(APIView):
             item = CartItem.objects.filter(cart=cart, product=product).first()
             if item:
                 item.delete()
-                serializer = CartSerializer(cart)
-                return Response(serializer.data)
+                return Response(self.cart_data(cart))
             return Response({"message": "Item not found in cart"}, status=status.HTTP_404_NOT_FOUND)
 
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-
-        if created:
-            if product.stock < quantity:
+        # one atomic upsert, so concurrent adds can't duplicate the line or lose an
+        # increment. It opens its own short transaction: on SQLite a write as the
+        # first statement waits for the lock, where a read-then-write would fail
+        with transaction.atomic():
+            new_quantity = CartItem.objects.add(cart, product, quantity, override=override)
+            if product.available_stock < new_quantity:
+                transaction.set_rollback(True)
                 return Response(
                     {"error": "Not enough stock available for this product."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        else:
-            if override:
-                if product.stock < quantity:
-                    return Response(
-                        {"error": "Not enough stock available for this product."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                item.quantity = quantity
+
+        return Response(self.cart_data(cart), status=status.HTTP_201_CREATED)
+
+
+class CartItemsBatchView(CartView):
+    """
+    PATCH a list of {product_id, quantity, override} operations onto the cart
+    in one request. Operations apply in order with CartView.post's meaning
+    (quantity 0 removes the line, override sets it, otherwise it is added);
+    stock is checked for the resulting quantities with one product query and
+    nothing is written unless every line fits.
+    """
+    http_method_names = ["patch", "options"]
+
+    @transaction.atomic
+    def patch(self, request):
+        operations = CartOperationSerializer(data=request.data, many=True, allow_empty=False)
+        operations.is_valid(raise_exception=True)
+        cart = self.get_cart(request)
+
+        product_ids = {op["product_id"] for op in operations.validated_data}
+        products = Product.objects.in_bulk(product_ids)
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            return Response(
+                {"error": "Product not found.", "product_ids": missing},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        existing = {
+            item.product_id: item
+            for item in CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+        }
+        quantities = {product_id: item.quantity for product_id, item in existing.items()}
+        for op in operations.validated_data:
+            product_id, quantity = op["product_id"], op["quantity"]
+            if quantity == 0:
+                quantities.pop(product_id, None)
+            elif op["override"] or product_id not in quantities:
+                quantities[product_id] = quantity
             else:
-                new_quantity = item.quantity + quantity
-                if product.stock < new_quantity:
-                    return Response(
-                        {"error": "Not enough stock available for this product."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                item.quantity = new_quantity
-            item.save()
-
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+                quantities[product_id] += quantity
+
+        short = sorted(
+            product_id for product_id, quantity in quantities.items()
+            if products[product_id].available_stock < quantity
+        )
+        if short:
+            return Response(
+                {"error": "Not enough stock available for this product.", "product_ids": short},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        removed = [product_id for product_id in existing if product_id not in quantities]
+        changed = []
+        for product_id, item in existing.items():
+            if product_id in quantities and item.quantity != quantities[product_id]:
+                item.quantity = quantities[product_id]
+                changed.append(item)
+        added = [
+            CartItem(cart=cart, product=products[product_id], quantity=quantity)
+            for product_id, quantity in quantities.items()
+            if product_id not in existing
+        ]
+
+        if removed:
+            CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+        if changed:
+            CartItem.objects.bulk_update(changed, ["quantity"])
+        if added:
+            # a line a concurrent request inserted meanwhile takes the batch's quantity
+            CartItem.objects.bulk_create(
+                added, update_conflicts=True, unique_fields=["cart", "product"], update_fields=["quantity"]
+            )
+
+        return Response(self.cart_data(cart))
@@ -0,0 +1,9 @@
+"""pytest (via pytest-django): run Celery tasks in-process, as `manage.py test` does."""
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def celery_tasks_in_process():
+    from e_commerce_app.testing import run_tasks_in_process
+
+    run_tasks_in_process()
@@ -0,0 +1,168 @@
+"""
+Keyset (seek) pagination shared by the list endpoints.
+
+The response body stays a plain JSON list; paging metadata travels in headers
+instead (the frontend follows them with utils/pagination.ts):
+
+    Link: <https://…?cursor=…>; rel="next"
+    X-Total-Count: 1234          (only with ?count=true, served from a cached estimate)
+
+Pages are selected with WHERE (k1, k2, …) > (v1, v2, …) on the ordering keys
+rather than OFFSET, so fetching page N costs the same as fetching page 1 and
+rows inserted meanwhile never shift or duplicate entries across pages.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    # fallback when neither the queryset nor the view (keyset_ordering) picks one
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+    signing_salt = "e_commerce_app.pagination.cursor"
+
+    @property
+    def page_size(self):
+        return settings.PAGINATION_PAGE_SIZE
+
+    @property
+    def max_page_size(self):
+        return settings.PAGINATION_MAX_PAGE_SIZE
+
+    # ----- helpers ----------------------------------------------------------
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = [f for f in queryset.query.order_by if isinstance(f, str)]
+        if not ordering or len(ordering) != len(queryset.query.order_by):
+            ordering = list(getattr(view, "keyset_ordering", None) or self.ordering)
+        # the keys must be unique, so always finish on the primary key
+        if not any(f.lstrip("-") in ("pk", "id") for f in ordering):
+            ordering.append("-pk" if ordering[0].startswith("-") else "pk")
+        return ordering
+
+    def encode_cursor(self, ordering, values):
+        encoded = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+        payload = {"o": ordering, "v": json.loads(json.dumps(encoded, default=str))}
+        return signing.dumps(payload, salt=self.signing_salt, compress=True)
+
+    def decode_cursor(self, queryset, ordering, token):
+        try:
+            payload = signing.loads(token, salt=self.signing_salt)
+        except signing.BadSignature:
+            raise NotFound(self.invalid_cursor_message)
+        if payload.get("o") != ordering or len(payload.get("v", [])) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for field_name, raw in zip(ordering, payload["v"]):
+            name = field_name.lstrip("-")
+            try:
+                field = queryset.model._meta.pk if name == "pk" else queryset.model._meta.get_field(name)
+                values.append(field.to_python(raw))
+            except FieldDoesNotExist:
+                values.append(raw)  # annotation, e.g. search_rank
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def seek(self, ordering, values):
+        """(k1, k2, …) strictly after (v1, v2, …) in `ordering`, as a Q."""
+        condition = Q()
+        equal_prefix = Q()
+        for field_name, value in zip(ordering, values):
+            name = field_name.lstrip("-")
+            lookup = "lt" if field_name.startswith("-") else "gt"
+            condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def estimate_count(self, queryset):
+        """
+        Row count for ?count=true. Cached per query; on Postgres the planner's
+        estimate is used so no COUNT(*) ever runs.
+        """
+        queryset = queryset.order_by()
+        sql, params = queryset.query.sql_with_params()
+        key = "pagination-count:" + hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            connection = connections[queryset.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    count = int(plan[0]["Plan"]["Plan Rows"])
+            else:
+                count = queryset.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_SECONDS)
+        return count
+
+    # ----- BasePagination ---------------------------------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset, view)
+
+        self.total_count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("1", "true"):
+            self.total_count = self.estimate_count(queryset)
+
+        queryset = queryset.order_by(*ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.seek(ordering, self.decode_cursor(queryset, ordering, token)))
+
+        # one extra row tells us whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = None
+        if len(rows) > page_size:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(
+                ordering, [getattr(last, f.lstrip("-")) for f in ordering]
+            )
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        links = [f'<{self.get_first_link()}>; rel="first"']
+        next_link = self.get_next_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        headers = {"Link": ", ".join(links)}
+        if self.total_count is not None:
+            headers["X-Total-Count"] = str(self.total_count)
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
@@ -14,6 +14,7 @@ import os
 import sys
 from pathlib import Path
 from datetime import timedelta
+from decimal import Decimal
 from dotenv import load_dotenv
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -68,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cart.middleware.GuestSessionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,13 +96,19 @@ WSGI_APPLICATION = 'e_commerce_app.wsgi.application'
 
 # DATABASES
 # ------------------------------------------------------------------------------
-# Using SQLite 3 (db.sqlite3 lives at BASE_DIR / 'db.sqlite3')
+# Using SQLite 3 (db.sqlite3 lives at BASE_DIR / 'db.sqlite3' unless SQLITE_PATH is set)
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLITE_PATH: a volume the web, worker and beat containers share
+        'NAME': os.getenv("SQLITE_PATH") or BASE_DIR / 'db.sqlite3',
+        # file-backed like production (WAL, busy timeout), so concurrency tests see real
+        # locking instead of the in-memory shared cache's immediate "table is locked"
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
+# runs Celery tasks in-process for `manage.py test`; conftest.py does the same under pytest
+TEST_RUNNER = "e_commerce_app.testing.TestRunner"
 
 # AUTHENTICATION & PASSWORD VALIDATION
 # ------------------------------------------------------------------------------
@@ -132,15 +140,74 @@ USE_TZ = True
 # ------------------------------------------------------------------------------
 STATIC_URL = 'static/'
 
+# MEDIA (book covers, stored invoice PDFs)
+# ------------------------------------------------------------------------------
+# Uploaded and generated files stay out of the source tree; deployments point
+# MEDIA_ROOT at a volume the web and worker processes share
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT") or BASE_DIR.parent / "media")
+
 # REST FRAMEWORK
 # ------------------------------------------------------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.RoleClaimJWTAuthentication',
     ),
 }
 
+# CACHE
+# ------------------------------------------------------------------------------
+# Catalog responses, pagination counts and notification dedup markers. Point
+# CACHE_REDIS_URL at Redis in production so every process shares them; without
+# it each process keeps its own in-memory cache
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+
+# CATALOG CACHE (admin_panel.catalog_cache)
+# ------------------------------------------------------------------------------
+# Lifetime of a cached product list/detail response; writes invalidate sooner.
+# Stock moved by orders and refunds is not a catalog write and shows up after this
+CATALOG_CACHE_SECONDS = int(os.getenv("CATALOG_CACHE_SECONDS", "300"))
+# How long one request may hold the recompute lock of a key
+CATALOG_CACHE_LOCK_SECONDS = 10
+# How long other requests wait for that recompute before doing it themselves
+CATALOG_CACHE_WAIT_SECONDS = 2
+
+# PAGINATION (e_commerce_app.pagination.KeysetPagination)
+# ------------------------------------------------------------------------------
+PAGINATION_PAGE_SIZE = int(os.getenv("PAGINATION_PAGE_SIZE", "100"))
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv("PAGINATION_MAX_PAGE_SIZE", "1000"))
+# How long a ?count=true total is reused before it is recomputed
+PAGINATION_COUNT_CACHE_SECONDS = int(os.getenv("PAGINATION_COUNT_CACHE_SECONDS", "300"))
+
+# PRODUCT SEARCH
+# ------------------------------------------------------------------------------
+# Dotted path to a backend in admin_panel.search; None picks one for the DB vendor
+PRODUCT_SEARCH_BACKEND = os.getenv("PRODUCT_SEARCH_BACKEND") or None
+# Upper bound on ranked matches returned by a single search
+PRODUCT_SEARCH_MAX_RESULTS = int(os.getenv("PRODUCT_SEARCH_MAX_RESULTS", "1000"))
+
+# STOCK RESERVATIONS (orders.reservations)
+# ------------------------------------------------------------------------------
+# How long an unpaid order holds its stock before the sweeper gives it back
+STOCK_RESERVATION_TTL = timedelta(minutes=int(os.getenv("STOCK_RESERVATION_TTL_MINUTES", "15")))
+
+# SALES REPORTING (orders.reports)
+# ------------------------------------------------------------------------------
+# Unit cost of products without a cost_price, as a share of the sale price
+DEFAULT_COST_RATIO = Decimal(os.getenv("DEFAULT_COST_RATIO", "0.5"))
+
+# CART GARBAGE COLLECTION (cart.cleanup)
+# ------------------------------------------------------------------------------
+# Guest carts older than this, whose session has lapsed, are deleted
+GUEST_CART_TTL = timedelta(days=int(os.getenv("GUEST_CART_TTL_DAYS", "30")))
+
 # CORS
 # ------------------------------------------------------------------------------
 CORS_ALLOW_ALL_ORIGINS = False
@@ -149,6 +216,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 CORS_ALLOW_CREDENTIALS = True
+# pagination metadata travels in headers, which browsers hide unless exposed
+CORS_EXPOSE_HEADERS = ["Link", "X-Total-Count"]
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
@@ -163,13 +232,54 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ("Bearer",),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RoleTokenRefreshSerializer',
 }
+# Embed the user's roles (group names) in access tokens so permission checks on
+# JWT requests need no query. Group changes then apply at the next token refresh.
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "False") == "True"
 
 # CELERY (if used)
 # ------------------------------------------------------------------------------
-CELERY_BROKER_URL = "redis://localhost:6379"
+# Tasks go to the broker for the worker and beat services (docker-compose.yml,
+# k8s/backend-deployment.yaml). Test runs switch to in-process execution
+# themselves (e_commerce_app.testing); setting this to True for a local run
+# without a worker puts invoice rendering/emailing back on the payment request
+# (failures are then left to the relay, never retried inline).
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+# eager calls still open a producer, so they get kombu's in-process transport
+CELERY_BROKER_URL = os.getenv(
+    "CELERY_BROKER_URL", "memory://" if CELERY_TASK_ALWAYS_EAGER else "redis://localhost:6379/0"
+)
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+CELERY_BEAT_SCHEDULE = {
+    "expire-stock-reservations": {
+        "task": "orders.tasks.expire_stock_reservations",
+        "schedule": 60.0,
+    },
+    "relay-invoice-jobs": {
+        "task": "invoices.tasks.relay_invoice_jobs",
+        "schedule": 60.0,
+    },
+    "collect-cart-garbage": {
+        "task": "cart.tasks.collect_cart_garbage",
+        "schedule": 60.0 * 60,
+    },
+}
+
+# INVOICE PIPELINE (invoices.tasks)
+# ------------------------------------------------------------------------------
+# Seconds before the first retry of a failed render/email job (doubles each time)
+INVOICE_JOB_RETRY_DELAY = int(os.getenv("INVOICE_JOB_RETRY_DELAY", "30"))
+# Queued/running jobs untouched for this long are re-dispatched by the relay
+INVOICE_JOB_STALE_AFTER = timedelta(minutes=10)
+# Let the front server stream stored invoice PDFs: "X-Sendfile" (Apache/lighttpd,
+# absolute path) or "X-Accel-Redirect" (nginx, internal location + file name)
+INVOICE_PDF_SENDFILE_HEADER = os.getenv("INVOICE_PDF_SENDFILE_HEADER", "")
+INVOICE_PDF_ACCEL_REDIRECT_PREFIX = os.getenv("INVOICE_PDF_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+# Render processes for bulk invoice exports; None sizes the pool to the available cores
+INVOICE_EXPORT_WORKERS = int(os.getenv("INVOICE_EXPORT_WORKERS", "0")) or None
 
 # EMAIL (Gmail SMTP via .env)
 # ------------------------------------------------------------------------------
@@ -181,6 +291,18 @@ EMAIL_HOST_USER = os.getenv("EMAIL_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_PASS")
 DEFAULT_FROM_EMAIL = f"Book Store <{EMAIL_HOST_USER}>"
 
+# DISCOUNT NOTIFICATIONS (admin_panel.notifications)
+# ------------------------------------------------------------------------------
+# Emails handed to the SMTP connection per send_messages call
+DISCOUNT_NOTIFY_BATCH_SIZE = int(os.getenv("DISCOUNT_NOTIFY_BATCH_SIZE", "100"))
+# Messages per second to any one recipient provider (gmail.com, …); 0 = unlimited
+DISCOUNT_NOTIFY_RATE_PER_PROVIDER = float(os.getenv("DISCOUNT_NOTIFY_RATE_PER_PROVIDER", "10"))
+# Notifications are debounced by this window: the first change schedules one
+# run for the window's end, which emails the discount in force by then.
+# The dedup marker lives in the default cache, which must be shared between
+# web processes for this to hold across them
+DISCOUNT_NOTIFY_DEDUP_WINDOW = timedelta(minutes=int(os.getenv("DISCOUNT_NOTIFY_DEDUP_MINUTES", "60")))
+
 # DEFAULT PRIMARY KEY FIELD TYPE
 # ------------------------------------------------------------------------------
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
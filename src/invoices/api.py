@@ -1,16 +1,26 @@
+import logging
+import re
 from rest_framework import viewsets
+from rest_framework.decorators import action
 
-from invoices.pdf_utils import generate_invoice_pdf
+from invoices.bulk import ExportStats, stream_invoice_zip
+from invoices.pdf_utils import ensure_invoice_pdf
 from users.permissions import IsSalesManager
+from users.roles import SALES_MANAGER, has_role
+from e_commerce_app.pagination import KeysetPagination
 from .models import Invoice
-from .serializers import InvoiceSerializer
+from .serializers import InvoiceSerializer, InvoiceJobSerializer
 from datetime import datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+
+logger = logging.getLogger(__name__)
 
 class InvoiceViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -18,31 +28,116 @@ class InvoiceViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class  = InvoiceSerializer
     permission_classes = [IsAuthenticated, IsSalesManager]
+    pagination_class  = KeysetPagination
 
     def get_queryset(self):
-        qs = Invoice.objects.all().order_by("-created_at")
         s  = self.request.query_params.get("start")
         e  = self.request.query_params.get("end")
-        if s:
-            qs = qs.filter(created_at__date__gte=datetime.fromisoformat(s).date())
-        if e:
-            qs = qs.filter(created_at__date__lte=datetime.fromisoformat(e).date())
-        return qs
+        return Invoice.objects.created_between(
+            datetime.fromisoformat(s).date() if s else None,
+            datetime.fromisoformat(e).date() if e else None,
+        ).order_by("-created_at")
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        GET /api/invoices/export/?start=…&end=… — every matching invoice's PDF
+        in one ZIP, rendered on a process pool and streamed as it is built.
+        """
+        ids = list(self.get_queryset().filter(order__isnull=False).values_list("pk", flat=True))
+        stats = ExportStats()
+
+        def archive():
+            yield from stream_invoice_zip(ids, workers=settings.INVOICE_EXPORT_WORKERS, stats=stats)
+            logger.info("Invoice export for %s: %s", request.user, stats)
+
+        filename = f'invoices_{request.query_params.get("start", "all")}_{request.query_params.get("end", "all")}.zip'
+        return StreamingHttpResponse(
+            archive(),
+            content_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _byte_range(request, size, etag):
+    """
+    (start, end) for a single satisfiable `Range: bytes=…` header, None to send
+    the whole file, or False if the range cannot be satisfied.
+    """
+    header = request.META.get("HTTP_RANGE", "")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    match = RANGE_RE.match(header.strip())
+    if not match or (if_range and if_range != etag):
+        return None  # absent, multi-range or stale If-Range: full response
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1  # suffix range: the last N bytes
+    else:
+        return None
+    if start > end or start >= size:
+        return False
+    return start, end
+
 
 class MyInvoicePDF(APIView):
+    """
+    The invoice PDF is rendered once (invoices.pdf_utils.ensure_invoice_pdf) and
+    then served from storage with an ETag, byte ranges, and optionally handed
+    to the front web server via INVOICE_PDF_SENDFILE_HEADER.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk: int):
-        invoice = get_object_or_404(Invoice, pk=pk)
-        if invoice.order.user != request.user and request.user.groups.filter(name="sales manager").exists() == False:
+        invoice = get_object_or_404(Invoice.objects.select_related("order__user"), pk=pk)
+        if invoice.order.user != request.user and not has_role(request.user, SALES_MANAGER):
             return Response(status=403)
-        pdf_bytes = generate_invoice_pdf(invoice.order)
-        return HttpResponse(
-            pdf_bytes,
-            headers={"Content-Disposition": f'inline; filename="invoice_{pk}.pdf"'},
-            content_type="application/pdf",
-        )
-    
+        ensure_invoice_pdf(invoice)
+
+        etag = f'"{invoice.pdf_hash}"'
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f'inline; filename="invoice_{pk}.pdf"',
+        }
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified[header] = value
+            return not_modified
+
+        sendfile_header = settings.INVOICE_PDF_SENDFILE_HEADER
+        if sendfile_header:
+            response = HttpResponse(content_type="application/pdf", headers=headers)
+            if sendfile_header == "X-Accel-Redirect":
+                response[sendfile_header] = settings.INVOICE_PDF_ACCEL_REDIRECT_PREFIX + invoice.pdf_file.name
+            else:
+                response[sendfile_header] = invoice.pdf_file.path
+            return response
+
+        size = invoice.pdf_file.size
+        byte_range = _byte_range(request, size, etag)
+        if byte_range is False:
+            return HttpResponse(
+                status=416, headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"}
+            )
+
+        fh = invoice.pdf_file.open("rb")
+        if byte_range is None:
+            return FileResponse(fh, content_type="application/pdf", headers=headers)
+
+        start, end = byte_range
+        fh.seek(start)
+        chunk = fh.read(end - start + 1)
+        fh.close()
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return HttpResponse(chunk, status=206, content_type="application/pdf", headers=headers)
+
+
 class InvoiceHTMLView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -51,7 +146,7 @@ class InvoiceHTMLView(APIView):
         invoice = get_object_or_404(Invoice, pk=pk)
 
         # then enforce owner OR sales-manager
-        is_sales = request.user.groups.filter(name="sales manager").exists()
+        is_sales = has_role(request.user, SALES_MANAGER)
         if invoice.order.user != request.user and not is_sales:
             return Response(status=403)
 
@@ -61,3 +156,23 @@ class InvoiceHTMLView(APIView):
             {"order": invoice.order}
         )
         return HttpResponse(html, content_type="text/html")
+
+
+class InvoiceStatusView(APIView):
+    """
+    Progress of the async invoice pipeline (invoices.tasks) for one invoice:
+    whether the PDF is ready and the state of its render/email jobs.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk: int):
+        invoice = get_object_or_404(Invoice.objects.select_related("order"), pk=pk)
+        is_sales = has_role(request.user, SALES_MANAGER)
+        if invoice.order.user_id != request.user.id and not is_sales:
+            return Response(status=403)
+
+        return Response({
+            "invoice": invoice.pk,
+            "pdf_ready": bool(invoice.pdf_file),
+            "jobs": InvoiceJobSerializer(invoice.jobs.order_by("created_at", "id"), many=True).data,
+        })
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from invoices.bulk import ExportStats, default_workers, stream_invoice_zip
+from invoices.models import Invoice
+
+
+class Command(BaseCommand):
+    help = 'Exports the PDFs of all invoices created in a date range to a ZIP archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD), inclusive')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), inclusive')
+        parser.add_argument('--workers', type=int, default=default_workers(), help='Render processes (1 = in-process)')
+
+    def handle(self, *args, **options):
+        ids = list(
+            Invoice.objects.created_between(options['start'], options['end'])
+            .filter(order__isnull=False)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        stats = ExportStats()
+        with open(options['output'], 'wb') as out:
+            for chunk in stream_invoice_zip(ids, workers=options['workers'], stats=stats):
+                out.write(chunk)
+
+        for invoice_id, error in stats.failed:
+            self.stderr.write(f"Invoice #{invoice_id}: {error}")
+        self.stdout.write(self.style.SUCCESS(f"Exported {stats} to {options['output']}."))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from invoices.bulk import default_workers, render_invoices
+from invoices.models import Invoice
+
+
+class Command(BaseCommand):
+    help = 'Renders and stores the PDF of every invoice that has none (or, with --all, is out of date), in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=default_workers(), help='Render processes (1 = in-process)')
+        parser.add_argument('--all', action='store_true', help='Check every invoice, re-rendering stale PDFs')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.filter(order__isnull=False)
+        if not options['all']:
+            invoices = invoices.filter(Q(pdf_file="") | Q(pdf_file__isnull=True) | Q(pdf_hash=""))
+        ids = list(invoices.order_by('pk').values_list('pk', flat=True))
+
+        started = time.perf_counter()
+        rendered = failed = 0
+        for invoice_id, _name, did_render, error in render_invoices(ids, options['workers']):
+            if error:
+                failed += 1
+                self.stderr.write(f"Invoice #{invoice_id}: {error}")
+            elif did_render:
+                rendered += 1
+
+        elapsed = time.perf_counter() - started
+        rate = rendered / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} of {len(ids)} invoice PDFs in {elapsed:.1f}s "
+            f"({rate:.1f}/s, {failed} failed)."
+        ))
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="invoice",
+            name="pdf_file",
+            field=models.FileField(blank=True, null=True, upload_to="invoice_pdfs/"),
+        ),
+        migrations.CreateModel(
+            name="InvoiceJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "task",
+                    models.CharField(
+                        choices=[("render", "Render PDF"), ("email", "Email invoice")],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="jobs",
+                        to="invoices.invoice",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="invoices_in_status_798060_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="invoicejob",
+            constraint=models.UniqueConstraint(
+                fields=("invoice", "task"), name="unique_invoice_job_task"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0003_invoicejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="pdf_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0004_invoice_pdf_hash"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(fields=["created_at"], name="invoice_created_idx"),
+        ),
+    ]
@@ -1,11 +1,65 @@
 from django.db import models
 from django.conf import settings
+from e_commerce_app.dates import day_range_filter
 from orders.models import Order
 
+class InvoiceQuerySet(models.QuerySet):
+    def created_between(self, start=None, end=None):
+        """Invoices created on/after `start` and on/before `end` (dates; either may be None)."""
+        return self.filter(**day_range_filter("created_at", start, end))
+
+
 class Invoice(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name="invoice", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    pdf_file = models.FileField(upload_to="invoices/", null=True, blank=True)
+    pdf_file = models.FileField(upload_to="invoice_pdfs/", null=True, blank=True)
+    # content hash (invoices.pdf_utils.invoice_fingerprint) of the stored PDF; doubles as its ETag
+    pdf_hash = models.CharField(max_length=64, blank=True)
+
+    objects = InvoiceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at"], name="invoice_created_idx")]
 
     def __str__(self):
         return f"Invoice #{self.order.id}"
+
+
+class InvoiceJob(models.Model):
+    """
+    Outbox row for one step of the invoice pipeline (invoices.tasks). Rows are
+    written in the payment transaction and dispatched to Celery once it commits.
+    """
+    RENDER = "render"
+    EMAIL = "email"
+    TASK_CHOICES = [(RENDER, "Render PDF"), (EMAIL, "Email invoice")]
+
+    PENDING = "pending"
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="jobs")
+    task = models.CharField(max_length=16, choices=TASK_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["invoice", "task"], name="unique_invoice_job_task"),
+        ]
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    def __str__(self):
+        return f"{self.get_task_display()} for invoice #{self.invoice_id} ({self.status})"
@@ -1,11 +1,93 @@
-import tempfile
-from django.template.loader import render_to_string
+import hashlib
+import json
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.template.loader import get_template, render_to_string
 from weasyprint import HTML
 
+from .models import Invoice
+
+INVOICE_TEMPLATE = "invoices/invoice.html"
+
+
 def generate_invoice_pdf(order) -> bytes:
     """
     Renders an HTML template to PDF bytes for the given Order.
     """
-    html_string = render_to_string("invoices/invoice.html", {"order": order})
+    html_string = render_to_string(INVOICE_TEMPLATE, {"order": order})
     html = HTML(string=html_string)
     return html.write_pdf()
+
+
+@lru_cache(maxsize=None)
+def template_version() -> str:
+    """Hash of the invoice template source; editing the template invalidates every stored PDF."""
+    source = get_template(INVOICE_TEMPLATE).template.source
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def invoice_fingerprint(order) -> str:
+    """
+    Content hash of everything the invoice template shows for `order`, plus
+    the template version. Equal fingerprints mean byte-identical PDFs.
+    """
+    user = order.user
+    payload = [
+        template_version(),
+        order.pk,
+        order.status,
+        order.created_at.isoformat(),
+        str(order.total_price),
+        user.get_full_name(),
+        user.username,
+        user.email,
+        order.shipping_full_name,
+        order.shipping_address_line1,
+        order.shipping_address_line2,
+        order.shipping_city,
+        order.shipping_postal_code,
+        [
+            (item.product_title, item.quantity, str(item.price_at_purchase), item.refunded_quantity)
+            for item in order.items.order_by("pk")
+        ],
+    ]
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()
+
+
+def ensure_invoice_pdf(invoice) -> bool:
+    """
+    Make sure `invoice.pdf_file` holds the PDF for the order's current state,
+    rendering only when the fingerprint changed. Returns True if it rendered.
+    """
+    fingerprint = invoice_fingerprint(invoice.order)
+    storage = invoice.pdf_file.storage
+    if invoice.pdf_hash == fingerprint and invoice.pdf_file and storage.exists(invoice.pdf_file.name):
+        return False
+
+    previous = invoice.pdf_file.name if invoice.pdf_file else None
+    # the content hash is the key, so a PDF another worker already rendered is reused
+    name = invoice.pdf_file.field.generate_filename(
+        invoice, f"invoice_{invoice.order_id}_{fingerprint[:16]}.pdf"
+    )
+    rendered = not storage.exists(name)
+    if rendered:
+        name = storage.save(name, ContentFile(generate_invoice_pdf(invoice.order)))
+
+    invoice.pdf_file.name = name
+    invoice.pdf_hash = fingerprint
+    Invoice.objects.filter(pk=invoice.pk).update(pdf_file=name, pdf_hash=fingerprint)
+    if previous and previous != name:
+        storage.delete(previous)
+    return rendered
+
+
+def invalidate_invoice_pdf(order):
+    """Drop the stored PDF of `order`'s invoice (e.g. after a refund); it is re-rendered on demand."""
+    invoice = Invoice.objects.filter(order=order).exclude(pdf_file="").first()
+    if invoice is None:
+        return
+    name = invoice.pdf_file.name
+    Invoice.objects.filter(pk=invoice.pk).update(pdf_file="", pdf_hash="")
+    transaction.on_commit(lambda: invoice.pdf_file.storage.delete(name))
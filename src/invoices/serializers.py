@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Invoice
+from .models import Invoice, InvoiceJob
 
 class InvoiceSerializer(serializers.ModelSerializer):
     # 1) Pull customer name off the related Order → User
@@ -27,3 +27,9 @@ class InvoiceSerializer(serializers.ModelSerializer):
     def get_date(self, obj):
         # ensure we return "YYYY-MM-DD"
         return obj.created_at.date().isoformat()
+
+
+class InvoiceJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model  = InvoiceJob
+        fields = ['id', 'task', 'status', 'attempts', 'last_error', 'created_at', 'updated_at']
@@ -0,0 +1,141 @@
+"""
+Invoice pipeline: render the PDF, then email it, off the payment request.
+
+ProcessPaymentView calls enqueue_invoice_pipeline() inside its transaction,
+which writes one InvoiceJob outbox row per step. After the commit the render
+job is handed to Celery; a successful render hands over the email job. If the
+broker is unreachable the rows simply stay pending and relay_invoice_jobs
+(CELERY_BEAT_SCHEDULE) dispatches them later. With CELERY_TASK_ALWAYS_EAGER
+the same tasks run in-process, right after the commit, and a failure is left
+to the relay instead of being retried there and then.
+"""
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .email_utils import send_invoice_email
+from .models import InvoiceJob
+from .pdf_utils import ensure_invoice_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_invoice_pipeline(invoice):
+    """Record the render and email jobs for `invoice`; render is dispatched on commit."""
+    render_job, _ = InvoiceJob.objects.get_or_create(invoice=invoice, task=InvoiceJob.RENDER)
+    InvoiceJob.objects.get_or_create(invoice=invoice, task=InvoiceJob.EMAIL)
+    transaction.on_commit(lambda: dispatch(render_job))
+    return render_job
+
+
+def dispatch(job):
+    """Publish `job` to its Celery task. Returns False (job stays pending) if the broker is down."""
+    try:
+        JOB_TASKS[job.task].delay(job.pk)
+    except Exception:
+        logger.exception("Could not dispatch invoice job %s; the relay will retry it", job.pk)
+        return False
+    # a worker (or eager execution) may already have picked it up
+    InvoiceJob.objects.filter(pk=job.pk, status__in=[InvoiceJob.PENDING, InvoiceJob.QUEUED]).update(
+        status=InvoiceJob.QUEUED, updated_at=timezone.now()
+    )
+    return True
+
+
+def _start(job_id):
+    """Claim the job for this run; None if it already succeeded (redelivered message)."""
+    claimed = (
+        InvoiceJob.objects
+        .filter(pk=job_id)
+        .exclude(status=InvoiceJob.SUCCEEDED)
+        .update(status=InvoiceJob.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now())
+    )
+    if not claimed:
+        return None
+    return InvoiceJob.objects.select_related("invoice__order__user").get(pk=job_id)
+
+
+def _finish(job, status, error=""):
+    InvoiceJob.objects.filter(pk=job.pk).update(status=status, last_error=error, updated_at=timezone.now())
+
+
+def _retry_or_fail(task, job, exc):
+    if task.request.retries >= task.max_retries:
+        logger.error("Invoice job %s failed after %s attempts: %s", job.pk, job.attempts, exc)
+        _finish(job, InvoiceJob.FAILED, repr(exc))
+        return
+    _finish(job, InvoiceJob.QUEUED, repr(exc))
+    if task.request.is_eager:
+        # an eager retry would run at once, inside the payment request; leave
+        # the queued job for relay_invoice_jobs to pick up once it goes stale
+        logger.warning("Invoice job %s failed in-process, left for the relay: %s", job.pk, exc)
+        return
+    # exponential backoff: 30s, 60s, 120s, …
+    raise task.retry(exc=exc, countdown=settings.INVOICE_JOB_RETRY_DELAY * 2 ** task.request.retries)
+
+
+@shared_task(bind=True, max_retries=5)
+def render_invoice(self, job_id):
+    job = _start(job_id)
+    if job is None:
+        return
+    invoice = job.invoice
+    try:
+        ensure_invoice_pdf(invoice)
+    except Exception as exc:
+        return _retry_or_fail(self, job, exc)
+    _finish(job, InvoiceJob.SUCCEEDED)
+
+    email_job = invoice.jobs.filter(task=InvoiceJob.EMAIL, status=InvoiceJob.PENDING).first()
+    if email_job:
+        dispatch(email_job)
+
+
+@shared_task(bind=True, max_retries=5)
+def email_invoice(self, job_id):
+    job = _start(job_id)
+    if job is None:
+        return
+    invoice = job.invoice
+    try:
+        # no-op unless the order changed since the render job ran
+        ensure_invoice_pdf(invoice)
+        with invoice.pdf_file.open("rb") as fh:
+            pdf_bytes = fh.read()
+        send_invoice_email(invoice.order.user.email, pdf_bytes, invoice.order_id)
+    except Exception as exc:
+        return _retry_or_fail(self, job, exc)
+    _finish(job, InvoiceJob.SUCCEEDED)
+
+
+JOB_TASKS = {
+    InvoiceJob.RENDER: render_invoice,
+    InvoiceJob.EMAIL: email_invoice,
+}
+
+
+@shared_task
+def relay_invoice_jobs(batch_size=500):
+    """
+    Periodic outbox relay: dispatch jobs that never reached the broker, email
+    jobs whose render has finished, and queued/running jobs whose worker went
+    silent for INVOICE_JOB_STALE_AFTER. Returns how many were dispatched.
+    """
+    stale = timezone.now() - settings.INVOICE_JOB_STALE_AFTER
+    render_done = InvoiceJob.objects.filter(task=InvoiceJob.RENDER, status=InvoiceJob.SUCCEEDED)
+    # a worker died mid-run: make the job dispatchable again
+    InvoiceJob.objects.filter(status=InvoiceJob.RUNNING, updated_at__lt=stale).update(status=InvoiceJob.QUEUED)
+    jobs = (
+        InvoiceJob.objects
+        .filter(
+            Q(status=InvoiceJob.PENDING, task=InvoiceJob.RENDER)
+            | Q(status=InvoiceJob.PENDING, invoice_id__in=render_done.values("invoice_id"))
+            | Q(status=InvoiceJob.QUEUED, updated_at__lt=stale)
+        )
+        .order_by("created_at")[:batch_size]
+    )
+    return sum(dispatch(job) for job in jobs)
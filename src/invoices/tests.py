@@ -5,17 +5,27 @@ from admin_panel.models import Genre, Product
 from datetime import date, datetime, timedelta
 from django.utils import timezone
 from orders.models import Order, OrderItem
-from invoices.models import Invoice
+from invoices.models import Invoice, InvoiceJob
+from invoices.tasks import enqueue_invoice_pipeline, relay_invoice_jobs, render_invoice
 from rest_framework import status
 from django.contrib.auth.models import Group
 from decimal import Decimal
 from django.core import mail
+from django.core.management import call_command
+from io import StringIO
 from users.permissions import IsSalesManager
-from invoices.pdf_utils import generate_invoice_pdf
-from django.test import TestCase
+from invoices.pdf_utils import generate_invoice_pdf, invoice_fingerprint
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+import io
+import os
+import tempfile
+import zipfile
+from e_commerce_app.testing import QueryPlanAssertions
 
 User = get_user_model()
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="invoice-tests-"))
 class InvoiceTests(APITestCase):
     def setUp(self):
         # Create user groups
@@ -230,4 +240,273 @@ class InvoiceSerializerTests(APITestCase):
         """Test the customer field format in the serializer"""
         # This test might require mocking the serializer directly
         # or using a view that doesn't require sales manager permissions
-        pass
\ No newline at end of file
+        pass
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="invoice-tests-"), INVOICE_JOB_RETRY_DELAY=0)
+class InvoicePipelineTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="payer", email="payer@example.com", password="testpass")
+        self.stranger = User.objects.create_user(username="stranger", email="stranger@example.com", password="testpass")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Pipeline Book",
+            author="Author",
+            price=Decimal("40.00"),
+            stock=10,
+            genre=self.genre,
+            isbn="5555555555",
+            description="A test book.",
+            publisher="Test Publisher",
+            publication_date=date.today(),
+            pages=100,
+            language="English",
+        )
+        self.order = Order.objects.create(user=self.user, total_price=Decimal("40.00"), status="Processing")
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=1, price_at_purchase=Decimal("40.00"))
+        self.invoice = Invoice.objects.create(order=self.order)
+
+        self.client_user = APIClient()
+        self.client_user.force_authenticate(self.user)
+        self.status_url = reverse('invoice-status', kwargs={'pk': self.invoice.pk})
+
+    def _jobs(self):
+        return dict(self.invoice.jobs.values_list("task", "status"))
+
+    @patch("invoices.pdf_utils.generate_invoice_pdf", return_value=b"%PDF-1.7 test")
+    def test_pipeline_renders_and_emails_after_commit(self, _pdf):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_invoice_pipeline(self.invoice)
+            self.assertEqual(self._jobs(), {InvoiceJob.RENDER: InvoiceJob.PENDING, InvoiceJob.EMAIL: InvoiceJob.PENDING})
+
+        self.assertEqual(self._jobs(), {InvoiceJob.RENDER: InvoiceJob.SUCCEEDED, InvoiceJob.EMAIL: InvoiceJob.SUCCEEDED})
+        self.invoice.refresh_from_db()
+        self.assertTrue(self.invoice.pdf_file)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].attachments[0][1], b"%PDF-1.7 test")
+
+    @patch("invoices.tasks.send_invoice_email", side_effect=ConnectionError("smtp down"))
+    @patch("invoices.pdf_utils.generate_invoice_pdf", return_value=b"%PDF")
+    def test_failing_eager_email_is_left_to_the_relay(self, _pdf, send):
+        with self.assertLogs("invoices.tasks", level="WARNING"):
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_invoice_pipeline(self.invoice)
+
+        # one attempt in-process, no back-to-back retries in the caller's request
+        job = self.invoice.jobs.get(task=InvoiceJob.EMAIL)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(job.status, InvoiceJob.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("smtp down", job.last_error)
+
+        send.side_effect = None
+        InvoiceJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        relay_invoice_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, InvoiceJob.SUCCEEDED)
+        self.assertEqual(send.call_count, 2)
+
+    @patch("invoices.pdf_utils.generate_invoice_pdf", return_value=b"%PDF")
+    def test_relay_dispatches_jobs_the_broker_missed(self, _pdf):
+        with patch.object(render_invoice, "delay", side_effect=OSError("broker unreachable")), \
+                self.assertLogs("invoices.tasks", level="ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_invoice_pipeline(self.invoice)
+        self.assertEqual(self._jobs()[InvoiceJob.RENDER], InvoiceJob.PENDING)
+
+        relay_invoice_jobs()
+        self.assertEqual(self._jobs(), {InvoiceJob.RENDER: InvoiceJob.SUCCEEDED, InvoiceJob.EMAIL: InvoiceJob.SUCCEEDED})
+
+    def test_status_endpoint(self):
+        enqueue_invoice_pipeline(self.invoice)
+        response = self.client_user.get(self.status_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["pdf_ready"])
+        self.assertEqual([j["task"] for j in response.data["jobs"]], [InvoiceJob.RENDER, InvoiceJob.EMAIL])
+        self.assertEqual(response.data["jobs"][0]["status"], InvoiceJob.PENDING)
+
+    def test_status_endpoint_hidden_from_other_users(self):
+        client = APIClient()
+        client.force_authenticate(self.stranger)
+        response = client.get(self.status_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="invoice-tests-"))
+class InvoicePDFCacheTests(APITestCase):
+    PDF = b"%PDF-1.7 " + bytes(range(256))
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="testpass")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Cached Book",
+            author="Author",
+            price=Decimal("25.00"),
+            stock=10,
+            genre=self.genre,
+            isbn="7777777777",
+            description="A test book.",
+            publisher="Test Publisher",
+            publication_date=date.today(),
+            pages=100,
+            language="English",
+        )
+        self.order = Order.objects.create(user=self.user, total_price=Decimal("50.00"), status="Delivered")
+        self.item = OrderItem.objects.create(
+            order=self.order, product=self.product, quantity=2, price_at_purchase=Decimal("25.00")
+        )
+        self.invoice = Invoice.objects.create(order=self.order)
+
+        self.client_user = APIClient()
+        self.client_user.force_authenticate(self.user)
+        self.url = reverse('invoice-pdf', kwargs={'pk': self.invoice.pk})
+
+        patcher = patch("invoices.pdf_utils.generate_invoice_pdf", return_value=self.PDF)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pdf_is_rendered_once_and_stored(self):
+        first = self.client_user.get(self.url)
+        second = self.client_user.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(second.streaming_content), self.PDF)
+        self.assertEqual(self.render.call_count, 1)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.pdf_hash, invoice_fingerprint(self.order))
+        self.assertIn(self.invoice.pdf_hash[:16], self.invoice.pdf_file.name)
+        self.assertEqual(first["ETag"], f'"{self.invoice.pdf_hash}"')
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client_user.get(self.url)["ETag"]
+        response = self.client_user.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_byte_range(self):
+        response = self.client_user.get(self.url, HTTP_RANGE="bytes=0-8")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.content, self.PDF[:9])
+        self.assertEqual(response["Content-Range"], f"bytes 0-8/{len(self.PDF)}")
+
+        response = self.client_user.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(response.content, self.PDF[-4:])
+
+        response = self.client_user.get(self.url, HTTP_RANGE=f"bytes={len(self.PDF)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_order_change_rerenders(self):
+        self.client_user.get(self.url)
+        Order.objects.filter(pk=self.order.pk).update(status="Refunded")
+        self.client_user.get(self.url)
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_refund_invalidates_stored_pdf(self):
+        self.client_user.get(self.url)
+        self.invoice.refresh_from_db()
+        old_name = self.invoice.pdf_file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_user.post(
+                reverse('order-refund', kwargs={'order_id': self.order.pk}),
+                {"items": [{"order_item_id": self.item.pk, "quantity": 1}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+
+        self.invoice.refresh_from_db()
+        self.assertFalse(self.invoice.pdf_file)
+        self.assertFalse(self.invoice.pdf_file.storage.exists(old_name))
+
+    @override_settings(INVOICE_PDF_SENDFILE_HEADER="X-Accel-Redirect")
+    def test_sendfile_header(self):
+        response = self.client_user.get(self.url)
+        self.invoice.refresh_from_db()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + self.invoice.pdf_file.name)
+        self.assertEqual(response.content, b"")
+
+    def test_backfill_command_renders_missing_pdfs(self):
+        out = StringIO()
+        call_command("render_invoice_pdfs", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 1 of 1", out.getvalue())
+        self.invoice.refresh_from_db()
+        self.assertTrue(self.invoice.pdf_file)
+
+        call_command("render_invoice_pdfs", "--workers", "1", stdout=out)
+        self.assertEqual(self.render.call_count, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="invoice-tests-"), INVOICE_EXPORT_WORKERS=1)
+class InvoiceExportTests(APITestCase):
+    def setUp(self):
+        self.sales_group, _ = Group.objects.get_or_create(name="sales manager")
+        self.sales_manager = User.objects.create_user(username="sales", email="sales@example.com", password="testpass")
+        self.sales_manager.groups.add(self.sales_group)
+        self.customer = User.objects.create_user(username="buyer", email="buyer@example.com", password="testpass")
+
+        self.invoices = []
+        for days_ago in (40, 10, 5):
+            order = Order.objects.create(user=self.customer, total_price=Decimal("10.00"), status="Processing")
+            invoice = Invoice.objects.create(order=order)
+            Invoice.objects.filter(pk=invoice.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+            self.invoices.append(invoice)
+
+        self.client_sales = APIClient()
+        self.client_sales.force_authenticate(self.sales_manager)
+        self.url = reverse('invoice-export')
+
+        patcher = patch("invoices.pdf_utils.generate_invoice_pdf", side_effect=lambda order: b"%PDF " + str(order.pk).encode())
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _zip(self, response):
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_export_streams_zip_of_invoices_in_range(self):
+        start = (timezone.now() - timedelta(days=20)).date().isoformat()
+        response = self.client_sales.get(self.url, {"start": start})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertTrue(response.streaming)
+
+        archive = self._zip(response)
+        expected = sorted(f"invoice_{invoice.pk}.pdf" for invoice in self.invoices[1:])
+        self.assertEqual(sorted(archive.namelist()), expected)
+        self.assertEqual(archive.read(f"invoice_{self.invoices[1].pk}.pdf"), f"%PDF {self.invoices[1].order_id}".encode())
+
+    def test_export_lists_failed_renders(self):
+        self.render.side_effect = RuntimeError("broken template")
+        archive = self._zip(self.client_sales.get(self.url))
+        self.assertEqual(archive.namelist(), ["errors.txt"])
+        self.assertIn(b"broken template", archive.read("errors.txt"))
+
+    def test_export_requires_sales_manager(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        self.assertEqual(client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="invoice-export-"), "out.zip")
+        out = StringIO()
+        call_command("export_invoices", path, "--workers", "1", stdout=out)
+        self.assertIn("Exported 3 invoices", out.getvalue())
+        self.assertIn("invoices/s", out.getvalue())
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+
+
+class InvoiceIndexPlanTests(QueryPlanAssertions, APITestCase):
+    def setUp(self):
+        customer = User.objects.create_user(username="billed", email="billed@example.com", password="testpass")
+        orders = Order.objects.bulk_create([Order(user=customer, total_price=10) for _ in range(50)])
+        Invoice.objects.bulk_create([Invoice(order=order) for order in orders])
+        sales = User.objects.create_user(username="ledger", email="ledger@example.com", password="testpass")
+        sales.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        self.client.force_authenticate(sales)
+
+    def test_invoices_in_date_range(self):
+        today = timezone.localdate()
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('invoice-list'), {"start": today - timedelta(days=7), "end": today}),
+            "invoices_invoice", "invoice_created_idx",
+        )
@@ -2,7 +2,7 @@
 
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .api import InvoiceViewSet, InvoiceHTMLView, MyInvoicePDF
+from .api import InvoiceViewSet, InvoiceHTMLView, MyInvoicePDF, InvoiceStatusView
 
 router = DefaultRouter()
 # ──> registers:
@@ -19,4 +19,7 @@ urlpatterns = [
 
     # 3) inline PDF (browser will render or download)
     path('<int:pk>/pdf/',  MyInvoicePDF.as_view(),   name='invoice-pdf'),
+
+    # 4) render/email job status of the async invoice pipeline
+    path('<int:pk>/status/', InvoiceStatusView.as_view(), name='invoice-status'),
 ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Streaming CSV / NDJSON exports of sales data for sales managers.
+
+Rows come straight from `values_list(...).iterator(chunk_size=...)` (a
+server-side cursor on Postgres, chunked fetches on SQLite) and are written
+out in small batches, so memory stays flat however many rows match.
+"""
+import csv
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from e_commerce_app.dates import day_range_filter
+from invoices.models import Invoice
+
+from .models import OrderItem, Refund
+
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip
+LINES_PER_WRITE = 500     # rows per chunk handed to the response
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _order_lines(start, end):
+    """One row per order item, flattened with its order and customer."""
+    return (
+        OrderItem.objects.filter(**day_range_filter("order__created_at", start, end))
+        .annotate(line_total=ExpressionWrapper(
+            F("price_at_purchase") * F("quantity"), output_field=DecimalField(max_digits=12, decimal_places=2)
+        ))
+        .order_by("order_id", "pk")
+    )
+
+
+def _invoices(start, end):
+    return Invoice.objects.created_between(start, end).filter(order__isnull=False).order_by("pk")
+
+
+def _refunds(start, end):
+    return Refund.objects.filter(**day_range_filter("created_at", start, end)).order_by("pk")
+
+
+# dataset -> (queryset factory, [(column, lookup), ...])
+DATASETS = {
+    "orders": (_order_lines, [
+        ("order_id", "order_id"),
+        ("order_created_at", "order__created_at"),
+        ("order_status", "order__status"),
+        ("order_total", "order__total_price"),
+        ("customer", "order__user__username"),
+        ("customer_email", "order__user__email"),
+        ("item_id", "pk"),
+        ("product_id", "product_id"),
+        ("product_title", "product_title"),
+        ("quantity", "quantity"),
+        ("refunded_quantity", "refunded_quantity"),
+        ("unit_price", "price_at_purchase"),
+        ("line_total", "line_total"),
+    ]),
+    "invoices": (_invoices, [
+        ("invoice_id", "pk"),
+        ("created_at", "created_at"),
+        ("order_id", "order_id"),
+        ("order_status", "order__status"),
+        ("order_total", "order__total_price"),
+        ("customer", "order__user__username"),
+        ("customer_email", "order__user__email"),
+    ]),
+    "refunds": (_refunds, [
+        ("refund_id", "pk"),
+        ("created_at", "created_at"),
+        ("order_id", "order_id"),
+        ("item_id", "order_item_id"),
+        ("product_title", "order_item__product_title"),
+        ("quantity", "quantity"),
+        ("refund_amount", "refund_amount"),
+        ("customer", "order__user__username"),
+    ]),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+CENT = Decimal("0.01")
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # every exported decimal is money; computed columns come back unscaled on SQLite
+        return value.quantize(CENT)
+    return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def _ndjson_lines(header, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({name: _cell(value) for name, value in zip(header, row)}) + "\n"
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= LINES_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_export(dataset, fmt, start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield `dataset` rows created on `start` .. `end` (dates, inclusive) as CSV or NDJSON text chunks."""
+    queryset, columns = DATASETS[dataset]
+    header = [name for name, _ in columns]
+    rows = queryset(start, end).values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=chunk_size)
+    lines = _csv_lines(header, rows) if fmt == "csv" else _ndjson_lines(header, rows)
+    yield from _batched(lines)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from orders.reservations import expire_stale
+
+class Command(BaseCommand):
+    help = 'Releases the stock held by unpaid orders whose reservation has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Reservations expired per transaction')
+
+    def handle(self, *args, **options):
+        expired = expire_stale(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} stock reservations."))
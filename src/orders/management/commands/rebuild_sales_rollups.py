@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily sales rollups behind the revenue report from the order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD), inclusive')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), inclusive')
+
+    def handle(self, *args, **options):
+        days = rebuild(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {days} days."))
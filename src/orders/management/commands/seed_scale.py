@@ -0,0 +1,45 @@
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.seeding import seed
+
+class Command(BaseCommand):
+    help = 'Fills the database with deterministic synthetic customers, catalog, orders, reviews, carts and wishlists for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Customers to create')
+        parser.add_argument('--orders', type=int, default=10000, help='Orders to create (about 2.3 items each)')
+        parser.add_argument('--products', type=int, default=5000, help='Products to create')
+        parser.add_argument('--days', type=int, default=730, help='Days of order history, ending on --until')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day of history (YYYY-MM-DD); defaults to today')
+        parser.add_argument('--seed', type=int, default=0, help='0-999; same seed and --until, same data')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes generating rows')
+        parser.add_argument('--password', help='Password of every seeded customer (default: none, login disabled)')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['products'] < 1 or options['days'] < 1 or options['orders'] < 0:
+            raise CommandError('--users, --products and --days must be positive, --orders not negative')
+
+        started = time.perf_counter()
+
+        def progress(line):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {line}")
+
+        try:
+            stats = seed(
+                options['seed'], options['users'], options['orders'], options['products'], options['days'],
+                until=options['until'], workers=options['workers'], password=options['password'],
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        elapsed = time.perf_counter() - started
+        total = sum(stats.rows.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f}/s): "
+            + ", ".join(f"{count:,} {name.replace('_', ' ')}" for name, count in stats.rows.items())
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_stockreservation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at"], name="order_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderstatushistory",
+            index=models.Index(
+                fields=["status", "timestamp"], name="orderhistory_status_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="refundrequest",
+            index=models.Index(
+                fields=["status", "requested_at"], name="refundreq_status_req_idx"
+            ),
+        ),
+    ]
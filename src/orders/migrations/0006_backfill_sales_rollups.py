@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:30
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    DailySalesRollup = apps.get_model("orders", "DailySalesRollup")
+    OrderStatusHistory = apps.get_model("orders", "OrderStatusHistory")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Refund = apps.get_model("orders", "Refund")
+
+    days = defaultdict(lambda: {"revenue": Decimal("0"), "refunds": Decimal("0"), "units": 0, "orders": 0})
+    for row in (
+        OrderStatusHistory.objects.filter(status="Delivered")
+        .annotate(day=TruncDate("timestamp")).values("day")
+        .annotate(revenue=Sum("order__total_price"), orders=Count("order", distinct=True))
+    ):
+        days[row["day"]].update(revenue=row["revenue"] or Decimal("0"), orders=row["orders"])
+    for row in (
+        OrderItem.objects.filter(order__history__status="Delivered")
+        .annotate(day=TruncDate("order__history__timestamp")).values("day")
+        .annotate(units=Sum("quantity"))
+    ):
+        days[row["day"]]["units"] = row["units"] or 0
+    for row in Refund.objects.annotate(day=TruncDate("created_at")).values("day").annotate(refunds=Sum("refund_amount")):
+        days[row["day"]]["refunds"] = row["refunds"] or Decimal("0")
+
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(day=day, **totals) for day, totals in sorted(days.items())]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_dailysalesrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_cost(apps, schema_editor):
+    # no product has a cost_price yet, so every unit cost the default share of its price
+    DailySalesRollup = apps.get_model("orders", "DailySalesRollup")
+    DailySalesRollup.objects.update(cost=F("revenue") * settings.DEFAULT_COST_RATIO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_backfill_sales_rollups"),
+        ("admin_panel", "0005_product_cost_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailysalesrollup",
+            name="cost",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(backfill_cost, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:40
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_cost_at_purchase(apps, schema_editor):
+    # the best we know for past sales is today's cost, as the report used to compute it
+    OrderItem = apps.get_model("orders", "OrderItem")
+    items = list(OrderItem.objects.select_related("product").only("price_at_purchase", "product__cost_price"))
+    for item in items:
+        cost_price = item.product.cost_price
+        item.cost_at_purchase = cost_price if cost_price is not None else (
+            item.price_at_purchase * settings.DEFAULT_COST_RATIO
+        ).quantize(Decimal("0.01"), ROUND_HALF_UP)
+    OrderItem.objects.bulk_update(items, ["cost_at_purchase"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0007_dailysalesrollup_cost"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="cost_at_purchase",
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_cost_at_purchase, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="cost_at_purchase",
+            field=models.DecimalField(
+                decimal_places=2, max_digits=10,
+                help_text="Snapshot of the unit cost (Product.unit_cost) at time of purchase",
+            ),
+        ),
+    ]
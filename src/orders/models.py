@@ -5,6 +5,16 @@ from decimal import Decimal
 from django.utils import timezone
 from datetime import timedelta
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """
+        Eager-load everything OrderSerializer reads (customer, items and each
+        item's product), so serializing a page costs a fixed number of queries.
+        """
+        return self.select_related("user").prefetch_related(
+            models.Prefetch("items", queryset=OrderItem.objects.select_related("product"))
+        )
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ("Processing", "Processing"),
@@ -24,6 +34,12 @@ class Order(models.Model):
     shipping_postal_code    = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        # "my orders", newest first
+        indexes = [models.Index(fields=["user", "created_at"], name="order_user_created_idx")]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
 
@@ -32,6 +48,10 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField()
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
+    cost_at_purchase = models.DecimalField(
+        max_digits=10, decimal_places=2,
+        help_text="Snapshot of the unit cost (Product.unit_cost) at time of purchase"
+    )
 
     product_title = models.CharField(
         max_length=255,
@@ -41,6 +61,8 @@ class OrderItem(models.Model):
     def save(self, *args, **kwargs):
         if not self.pk:
             self.product_title = self.product.title
+            if self.cost_at_purchase is None:
+                self.cost_at_purchase = self.product.unit_cost(self.price_at_purchase)
         super().save(*args, **kwargs)
     
     @property
@@ -63,6 +85,56 @@ class OrderStatusHistory(models.Model):
     status    = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # RevenueReportView: orders that reached a status within a date range
+        indexes = [models.Index(fields=["status", "timestamp"], name="orderhistory_status_ts_idx")]
+
+class StockReservation(models.Model):
+    """
+    A time-limited hold on `quantity` units of a product for an unpaid order.
+    Active holds are mirrored in Product.reserved; see orders.reservations.
+    """
+    ACTIVE = "Active"
+    CONVERTED = "Converted"
+    RELEASED = "Released"
+    EXPIRED = "Expired"
+    STATUS_CHOICES = [
+        (ACTIVE, "Active"),
+        (CONVERTED, "Converted"),
+        (RELEASED, "Released"),
+        (EXPIRED, "Expired"),
+    ]
+    order      = models.ForeignKey(Order, related_name="reservations", on_delete=models.CASCADE)
+    product    = models.ForeignKey(Product, related_name="reservations", on_delete=models.CASCADE)
+    quantity   = models.PositiveIntegerField()
+    status     = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "expires_at"])]
+
+    def __str__(self):
+        return f"Reservation#{self.id} {self.quantity}x product#{self.product_id} [{self.status}]"
+
+class DailySalesRollup(models.Model):
+    """
+    Sales per calendar day (in TIME_ZONE), maintained by orders.rollups as
+    orders are delivered and refunded; the revenue report reads only these.
+    Revenue, cost and units are booked on the day an order is delivered,
+    refunds on the day they are made.
+    """
+    day      = models.DateField(unique=True)
+    revenue  = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # units at their cost at purchase (OrderItem.cost_at_purchase), booked when delivered
+    cost     = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds  = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units    = models.PositiveIntegerField(default=0)
+    orders   = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sales on {self.day}: {self.revenue} ({self.orders} orders)"
+
 class Refund(models.Model):
     """
     Records a refund against a single OrderItem.
@@ -90,5 +162,9 @@ class RefundRequest(models.Model):
     processed_at    = models.DateTimeField(null=True, blank=True)
     response_message= models.TextField(blank=True)
 
+    class Meta:
+        # the pending queue, oldest first (ListRefundRequestsView)
+        indexes = [models.Index(fields=["status", "requested_at"], name="refundreq_status_req_idx")]
+
     def __str__(self):
         return f"RefundRequest#{self.id} of {self.quantity}xItem#{self.order_item.id} [{self.status}]"
@@ -0,0 +1,60 @@
+"""
+Cost model and merchandising breakdowns for the revenue report.
+
+An order item's unit cost is snapshotted at purchase (OrderItem.cost_at_purchase,
+see Product.unit_cost), so later cost_price changes do not rewrite past profit.
+"""
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from e_commerce_app.dates import day_range_filter
+
+from .models import OrderItem
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# dimension -> (key lookup, label lookup) on OrderItem
+GROUP_BY = {
+    "product": ("product_id", "product__title"),
+    "genre": ("product__genre_id", "product__genre__name"),
+    "author": ("product__author", "product__author"),
+}
+MAX_TOP = 100
+
+
+def unit_cost(item=""):
+    """Expression for an order item's unit cost; `item` is the lookup prefix to the OrderItem (e.g. "items__")."""
+    return F(f"{item}cost_at_purchase")
+
+
+def breakdown(start, end, group_by, top=10):
+    """
+    Net revenue, cost and profit of items in orders delivered on `start` ..
+    `end`, per `group_by` dimension (see GROUP_BY), best sellers first, in a
+    single aggregate query. Refunded units count neither as revenue nor cost.
+    """
+    key, label = GROUP_BY[group_by]
+    kept = F("quantity") - F("refunded_quantity")
+    rows = (
+        OrderItem.objects.filter(
+            order__history__status="Delivered",
+            **day_range_filter("order__history__timestamp", start, end),
+        )
+        .values(key, label)
+        .annotate(
+            units=Sum(kept),
+            revenue=Sum(ExpressionWrapper(F("price_at_purchase") * kept, output_field=MONEY)),
+            cost=Sum(ExpressionWrapper(unit_cost() * kept, output_field=MONEY)),
+        )
+        .order_by("-revenue", key)[:min(top, MAX_TOP)]
+    )
+    return [
+        {
+            "key": row[key],
+            "label": row[label],
+            "units": row["units"] or 0,
+            "revenue": float(row["revenue"] or 0),
+            "cost": float(row["cost"] or 0),
+            "profit": float((row["revenue"] or 0) - (row["cost"] or 0)),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,118 @@
+"""
+Stock holds between order placement and payment.
+
+PlaceOrderView reserves what it sells, ProcessPaymentView converts the holds
+into real stock decrements, and holds that outlive settings.STOCK_RESERVATION_TTL
+are expired by the periodic sweeper (orders.tasks / `manage.py expire_reservations`)
+and, for the products involved, by checkout and payment themselves, so stock
+comes back even while no beat process is running.
+Product.reserved always equals the sum of that product's active holds, so
+availability is `stock - reserved` without touching the reservation table.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from admin_panel.models import Product
+from .models import StockReservation
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product):
+        self.product = product
+        super().__init__(f"Not enough stock for {product.title}")
+
+
+def _adjust_reserved(quantities, sign):
+    """Add (sign=1) or remove (sign=-1) {product_id: qty} from Product.reserved in one UPDATE."""
+    if not quantities:
+        return
+    delta = Case(
+        *[When(pk=pk, then=Value(sign * qty)) for pk, qty in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    Product.objects.filter(pk__in=quantities.keys()).update(reserved=F("reserved") + delta)
+
+
+def reserve(order, quantities):
+    """
+    Hold {product: qty} for `order`. The caller must have locked the product
+    rows and checked available_stock.
+    """
+    expires_at = timezone.now() + settings.STOCK_RESERVATION_TTL
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product=product, quantity=qty, expires_at=expires_at)
+        for product, qty in quantities.items()
+    ])
+    _adjust_reserved({product.pk: qty for product, qty in quantities.items()}, 1)
+
+
+@transaction.atomic
+def convert(order):
+    """
+    Turn the order's holds into stock decrements at payment time. Items whose
+    hold already expired are taken from the free (unreserved) stock instead.
+    Raises InsufficientStock, leaving the caller to roll back.
+    """
+    holds = list(order.reservations.select_for_update().filter(status=StockReservation.ACTIVE))
+    held = Counter()
+    for hold in holds:
+        held[hold.product_id] += hold.quantity
+
+    for item in order.items.select_related("product").order_by("product_id"):
+        from_hold = min(held[item.product_id], item.quantity)
+        held[item.product_id] -= from_hold
+        # stock - (reserved - from_hold) >= quantity: enough once our own hold is set aside
+        updated = Product.objects.filter(
+            pk=item.product_id,
+            stock__gte=F("reserved") - from_hold + item.quantity,
+        ).update(
+            stock=F("stock") - item.quantity,
+            reserved=F("reserved") - from_hold,
+            ordered_number=F("ordered_number") + item.quantity,
+        )
+        if not updated:
+            raise InsufficientStock(item.product)
+
+    StockReservation.objects.filter(pk__in=[h.pk for h in holds]).update(status=StockReservation.CONVERTED)
+
+
+@transaction.atomic
+def release(order, status=StockReservation.RELEASED):
+    """Give back every active hold of `order`; returns how many were released."""
+    holds = list(order.reservations.select_for_update().filter(status=StockReservation.ACTIVE))
+    return _close(holds, status)
+
+
+def expire_stale(batch_size=500, now=None, products=None):
+    """
+    Expire holds past their deadline in batches of `batch_size`, each in its
+    own short transaction. `products` (ids or a values("…_id") queryset)
+    limits the sweep to those products. Returns the number of holds expired.
+    """
+    now = now or timezone.now()
+    stale = StockReservation.objects.filter(status=StockReservation.ACTIVE, expires_at__lt=now)
+    if products is not None:
+        stale = stale.filter(product_id__in=products)
+    expired = 0
+    while True:
+        with transaction.atomic():
+            batch = list(stale.select_for_update(skip_locked=True).order_by("expires_at")[:batch_size])
+            if not batch:
+                return expired
+            expired += _close(batch, StockReservation.EXPIRED)
+
+
+def _close(holds, status):
+    if not holds:
+        return 0
+    quantities = Counter()
+    for hold in holds:
+        quantities[hold.product_id] += hold.quantity
+    StockReservation.objects.filter(pk__in=[h.pk for h in holds]).update(status=status)
+    _adjust_reserved(quantities, -1)
+    return len(holds)
@@ -0,0 +1,99 @@
+"""
+Maintenance of DailySalesRollup: incremental updates as orders are delivered
+and refunded (wired up in orders.signals), and a full rebuild from the raw
+order history for backfills and repairs (manage.py rebuild_sales_rollups).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from e_commerce_app.dates import day_range_filter
+
+from .models import DailySalesRollup, OrderItem, OrderStatusHistory, Refund
+from .reports import MONEY, unit_cost
+
+
+def _add(day, **amounts):
+    """Add `amounts` to the rollup row of `day`, creating it if needed."""
+    DailySalesRollup.objects.get_or_create(day=day)
+    DailySalesRollup.objects.filter(day=day).update(
+        **{field: F(field) + amount for field, amount in amounts.items()}
+    )
+
+
+def record_delivery(order, when):
+    """Book a delivered order's revenue, cost, units and count on the day of `when`."""
+    totals = order.items.aggregate(
+        units=Sum("quantity"),
+        cost=Sum(ExpressionWrapper(unit_cost() * F("quantity"), output_field=MONEY)),
+    )
+    _add(
+        timezone.localdate(when),
+        revenue=order.total_price, cost=totals["cost"] or Decimal("0"), units=totals["units"] or 0, orders=1,
+    )
+
+
+def record_refund(refund):
+    _add(timezone.localdate(refund.created_at), refunds=refund.refund_amount)
+
+
+@transaction.atomic
+def rebuild(start=None, end=None):
+    """
+    Recompute the rollup rows for `start` .. `end` (dates, inclusive; None =
+    unbounded) from the order history and refunds. Returns the rows written.
+    """
+    days = defaultdict(lambda: {
+        "revenue": Decimal("0"), "cost": Decimal("0"), "refunds": Decimal("0"), "units": 0, "orders": 0,
+    })
+
+    delivered = OrderStatusHistory.objects.filter(status="Delivered", **day_range_filter("timestamp", start, end))
+    for row in (
+        delivered.annotate(day=TruncDate("timestamp")).values("day")
+        .annotate(revenue=Sum("order__total_price"), orders=Count("order", distinct=True))
+    ):
+        days[row["day"]].update(revenue=row["revenue"] or Decimal("0"), orders=row["orders"])
+    # summed separately: joining the items would count each order's total once per item
+    for row in (
+        OrderItem.objects.filter(
+            order__history__status="Delivered",
+            **day_range_filter("order__history__timestamp", start, end),
+        )
+        .annotate(day=TruncDate("order__history__timestamp")).values("day")
+        .annotate(
+            units=Sum("quantity"),
+            cost=Sum(ExpressionWrapper(unit_cost() * F("quantity"), output_field=MONEY)),
+        )
+    ):
+        days[row["day"]].update(units=row["units"] or 0, cost=row["cost"] or Decimal("0"))
+    for row in (
+        Refund.objects.filter(**day_range_filter("created_at", start, end))
+        .annotate(day=TruncDate("created_at")).values("day")
+        .annotate(refunds=Sum("refund_amount"))
+    ):
+        days[row["day"]]["refunds"] = row["refunds"] or Decimal("0")
+
+    stale = DailySalesRollup.objects.all()
+    if start:
+        stale = stale.filter(day__gte=start)
+    if end:
+        stale = stale.filter(day__lte=end)
+    stale.delete()
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(day=day, **totals) for day, totals in sorted(days.items())]
+    )
+    return len(days)
+
+
+@transaction.atomic
+def add_totals(days):
+    """
+    Fold `days` ({date: {field: amount}}) into the rollup rows, for bulk loads
+    that write orders without going through the signals (orders.seeding).
+    """
+    for day, amounts in sorted(days.items()):
+        _add(day, **amounts)
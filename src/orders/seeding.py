@@ -0,0 +1,630 @@
+"""
+Synthetic shop data at benchmark scale (manage.py seed_scale).
+
+Generates what a running shop accumulates: customers with their profiles and
+"customer" group membership, genres and products, orders with their items and
+status history, refund requests and refunds, reviews, carts and wishlists.
+The shape is meant to be realistic enough for capacity planning:
+
+- product popularity is Zipfian (a few best sellers, a long tail), and so,
+  more mildly, is the number of orders per customer;
+- order dates follow a yearly season (November/December peak), a weekly
+  cycle, an evening peak and slow growth over the period;
+- an order's status follows from its age, and its history holds the
+  transitions the order views would have recorded (Shipped, Delivered,
+  Cancelled, Refunded).
+
+Generation is deterministic: every chunk of customers or orders draws from
+its own Random seeded with (seed, kind, chunk), and dates are relative to
+`until`, so a seed always produces the same rows whatever the worker count.
+Chunks are generated in forked worker processes and written in order by the
+parent, one transaction per chunk of executemany'd INSERTs with primary keys
+worked out up front. No model instances are built, no post_save fires and
+foreign keys are checked once at the end (as loaddata does), which is what
+makes the volume reachable. What checkout, the signals and add_rating would
+have kept up to date row by row - units sold (ordered_number), ratings and
+the daily sales rollups - is totalled by the generators and written once;
+sequences and the catalog cache generation are brought up to date too.
+
+Seeding assumes nothing else writes to the database meanwhile.
+"""
+import random
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from admin_panel.catalog_cache import bump_generation
+from admin_panel.models import Genre, Product
+from admin_panel.search import get_search_backend
+from cart.models import Cart, CartItem
+from reviews.models import Review
+from users.models import Profile, User
+from wishlist.models import WishlistItem
+
+from . import rollups
+from .models import Order, OrderItem, OrderStatusHistory, Refund, RefundRequest
+
+USER_CHUNK_SIZE = 10000
+ORDER_CHUNK_SIZE = 5000
+
+GENRES = [
+    "Fiction", "Non-Fiction", "Sci-Fi", "Fantasy", "Mystery", "Thriller", "Romance", "Horror",
+    "Biography", "History", "Science", "Poetry", "Children", "Self-Help", "Travel", "Cookbooks",
+]
+LANGUAGES = (["English"] * 70) + (["Turkish"] * 20) + ["German", "French", "Spanish"] * 3 + ["Italian"]
+FIRST_NAMES = [
+    "Ada", "Ali", "Ayse", "Berk", "Can", "Cem", "Deniz", "Derya", "Ece", "Elif", "Emre", "Eren",
+    "Hakan", "Irem", "Kaan", "Leyla", "Mehmet", "Merve", "Mert", "Nil", "Ozan", "Selin", "Sena", "Zeynep",
+    "Anna", "Ben", "Clara", "David", "Emma", "Felix", "Hannah", "Jonas", "Laura", "Lucas", "Maria", "Noah",
+]
+LAST_NAMES = [
+    "Acar", "Aydin", "Celik", "Demir", "Dogan", "Erdem", "Kaya", "Koc", "Kurt", "Ozturk", "Polat",
+    "Sahin", "Simsek", "Tekin", "Yildiz", "Yilmaz", "Brown", "Fischer", "Garcia", "Meyer", "Miller",
+    "Rossi", "Schmidt", "Smith",
+]
+CITIES = ["Istanbul", "Istanbul", "Istanbul", "Ankara", "Izmir", "Bursa", "Antalya", "Konya", "Adana", "Eskisehir"]
+STREETS = ["Ataturk Cd.", "Cumhuriyet Cd.", "Bagdat Cd.", "Istiklal Cd.", "Inonu Sk.", "Lale Sk.", "Gul Sk."]
+# reserved for documentation (RFC 2606), so a seeded shop can never email anyone
+EMAIL_DOMAINS = ["example.com", "example.net", "example.org", "mail.example.com", "inbox.example.net"]
+
+# relative order volume per calendar month, weekday (Monday first) and hour
+MONTH_WEIGHTS = [0.85, 0.8, 0.9, 0.9, 0.95, 0.9, 0.85, 0.95, 1.1, 1.0, 1.35, 1.6]
+WEEKDAY_WEIGHTS = [1.0, 0.95, 0.95, 1.0, 1.05, 1.2, 1.25]
+HOUR_WEIGHTS = [
+    2, 1, 1, 0.5, 0.5, 0.5, 1, 2, 3, 4, 5, 5, 6, 6, 5, 5, 5, 6, 7, 9, 10, 10, 8, 4,
+]
+GROWTH = 0.4  # the last day sees 40% more orders than the first, other things equal
+PRODUCT_SKEW = 1.1  # Zipf exponent of product popularity
+CUSTOMER_SKEW = 0.5  # ... and of orders per customer
+ITEMS_PER_ORDER = ([1, 2, 3, 4, 5, 6], [40, 25, 15, 10, 6, 4])
+QUANTITY = ([1, 2, 3, 4], [80, 14, 4, 2])
+STARS = ([1, 2, 3, 4, 5], [5, 7, 13, 30, 45])
+CANCEL_RATE = 0.03
+REFUND_REQUEST_RATE = 0.05
+REVIEW_RATE = 0.06
+CART_RATE = 0.3  # customers whose (always existing) active cart holds something
+WISHLIST_RATE = 0.4
+
+
+class _Insert:
+    """
+    executemany'd INSERT of ready value tuples, in `fields` order, into
+    `model`'s table: what bulk_create sends, without building instances.
+    """
+
+    def __init__(self, model, fields):
+        ops = connection.ops
+        columns = [model._meta.get_field(name).column for name in fields]
+        self.sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            ops.quote_name(model._meta.db_table),
+            ", ".join(ops.quote_name(column) for column in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+
+    def __call__(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, rows)
+
+
+def _timestamp(value):
+    """A naive UTC datetime as the text every backend accepts for a DateTimeField."""
+    return value.isoformat(" ")
+
+
+def _local_date(value):
+    """The day a naive UTC datetime falls on in TIME_ZONE (as TruncDate reads it)."""
+    return timezone.localdate(value.replace(tzinfo=dt_timezone.utc))
+
+
+def _cumulative(weights):
+    return list(accumulate(weights))
+
+
+def _zipf(n, skew):
+    return _cumulative(1 / rank ** skew for rank in range(1, n + 1))
+
+
+def _words(rng, count):
+    syllables = ["ka", "lo", "mir", "sen", "tha", "vel", "dor", "an", "is", "ur", "ben", "cor",
+                 "fal", "gri", "hol", "jen", "mar", "nor", "pel", "ros", "ti", "va"]
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class Plan:
+    """
+    Everything the chunk generators read: sizes, first primary keys, the
+    catalog and the sampling tables. Built by the parent before the workers
+    fork, so they inherit it instead of receiving it.
+    """
+
+    def __init__(self, seed, users, orders, days, until, products):
+        self.seed = seed
+        self.users = users
+        self.orders = orders
+        self.until = datetime.combine(until, datetime.min.time()) + timedelta(days=1)  # naive UTC
+        self.start = self.until - timedelta(days=days)
+        self.tag = f"seed{seed}"
+
+        rng = random.Random(f"{seed}:plan")
+        self.vocabulary = _words(rng, 2000)
+        # products: ids, what an order line records, popularity by shuffled rank
+        self.product_ids = [p.pk for p in products]
+        self.titles = [p.title for p in products]
+        self.unit_prices = [
+            (p.price * (100 - p.discount_percent) / 100).quantize(Decimal("0.01"), ROUND_HALF_UP)
+            for p in products
+        ]
+        self.unit_costs = [p.unit_cost(price) for p, price in zip(products, self.unit_prices)]
+        self.popular = list(range(len(products)))
+        rng.shuffle(self.popular)
+        self.product_weights = _zipf(len(products), PRODUCT_SKEW)
+        # customers: orders per customer by shuffled rank
+        self.buyers = list(range(users))
+        rng.shuffle(self.buyers)
+        self.buyer_weights = _zipf(users, CUSTOMER_SKEW)
+        # order days: season x weekday x growth
+        self.day_weights = _cumulative(
+            MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * (1 + GROWTH * n / days)
+            for n, day in ((n, self.start + timedelta(days=n)) for n in range(days))
+        )
+        self.days = list(range(days))
+        self.hour_weights = _cumulative(HOUR_WEIGHTS)
+
+        self.first_user_id = (User.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+        self.first_cart_id = (Cart.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+        self.first_order_id = (Order.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+        self.customer_group_id = Group.objects.get_or_create(name="customer")[0].pk
+
+    def chunks(self, total, size):
+        return range((total + size - 1) // size)
+
+    def user_id(self, n):
+        return self.first_user_id + n
+
+    def profile(self, n):
+        """(name, phone, address line 1, city, postal code) of customer `n`, derived from `n` alone."""
+        name = f"{FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+        phone = f"+90 5{(n * 7919) % 10 ** 9:09d}"
+        address = f"{STREETS[n % len(STREETS)]} No:{(n * 31) % 200 + 1}"
+        city = CITIES[(n // 7) % len(CITIES)]
+        postal = f"{(n * 104729) % 80000 + 10000}"
+        return name, phone, address, city, postal
+
+    def pick_products(self, rng, k):
+        """`k` distinct product indexes, by popularity (fewer if the catalog is that small)."""
+        chosen = dict.fromkeys(
+            self.popular[i] for i in rng.choices(range(len(self.popular)), cum_weights=self.product_weights, k=k)
+        )
+        return list(chosen)
+
+    def moment(self, rng, day):
+        """A naive UTC datetime on order day `day`, by hour of day."""
+        hour = rng.choices(range(24), cum_weights=self.hour_weights)[0]
+        return self.start + timedelta(days=day, hours=hour, seconds=rng.randrange(3600))
+
+
+# set by the parent before forking; see Plan
+_plan = None
+
+USER_FIELDS = ["id", "password", "is_superuser", "username", "first_name", "last_name", "email",
+               "is_staff", "is_active", "date_joined"]
+PROFILE_FIELDS = ["user", "name", "email", "phone_number", "address_line1", "address_line2", "city",
+                  "postal_code"]
+MEMBERSHIP_FIELDS = ["user", "group"]
+CART_FIELDS = ["id", "user", "is_active", "created_at"]
+CART_ITEM_FIELDS = ["cart", "product", "quantity"]
+WISHLIST_FIELDS = ["user", "product", "added_at"]
+ORDER_FIELDS = ["id", "user", "status", "total_price", "shipping_full_name", "shipping_phone_number",
+                "shipping_address_line1", "shipping_address_line2", "shipping_city", "shipping_postal_code",
+                "created_at"]
+ITEM_FIELDS = [
+    "id", "order", "product", "quantity", "price_at_purchase", "product_title", "refunded_quantity", "cost_at_purchase",
+]
+HISTORY_FIELDS = ["order", "status", "timestamp"]
+REFUND_REQUEST_FIELDS = ["order_item", "user", "quantity", "status", "requested_at", "processed_at",
+                         "response_message"]
+REFUND_FIELDS = ["order", "order_item", "quantity", "refund_amount", "created_at"]
+REVIEW_FIELDS = ["user", "product", "stars", "review_text", "created_at", "status", "approved"]
+SALES_FIELDS = ["revenue", "cost", "units", "orders", "refunds"]
+
+
+def user_chunk(index, password):
+    """Rows for customers index * USER_CHUNK_SIZE onwards, their profiles, carts and wishlists."""
+    plan = _plan
+    rng = random.Random(f"{plan.seed}:users:{index}")
+    rows = {"users": [], "profiles": [], "memberships": [], "carts": [], "cart_items": [], "wishlist": []}
+    first = index * USER_CHUNK_SIZE
+    for n in range(first, min(first + USER_CHUNK_SIZE, plan.users)):
+        user_id = plan.user_id(n)
+        name, phone, address, city, postal = plan.profile(n)
+        first_name, last_name = name.split(" ")
+        email = f"{plan.tag}.{n}@{EMAIL_DOMAINS[n % len(EMAIL_DOMAINS)]}"
+        joined = _timestamp(plan.start - timedelta(days=rng.randrange(365), seconds=rng.randrange(86400)))
+        rows["users"].append(
+            (user_id, password, False, f"{plan.tag}-{n}", first_name, last_name, email, False, True, joined)
+        )
+        rows["profiles"].append((user_id, name, email, phone, address, "", city, postal))
+        rows["memberships"].append((user_id, plan.customer_group_id))
+
+        cart_id = plan.first_cart_id + n
+        rows["carts"].append((cart_id, user_id, True, _timestamp(plan.until - timedelta(days=rng.randrange(30)))))
+        if rng.random() < CART_RATE:
+            for product in plan.pick_products(rng, rng.randint(1, 5)):
+                rows["cart_items"].append((cart_id, plan.product_ids[product], rng.choices(*QUANTITY)[0]))
+        if rng.random() < WISHLIST_RATE:
+            for product in plan.pick_products(rng, rng.randint(1, 10)):
+                added = _timestamp(plan.until - timedelta(days=rng.randrange(len(plan.days))))
+                rows["wishlist"].append((user_id, plan.product_ids[product], added))
+    return rows
+
+
+def order_chunk(index):
+    """
+    Rows for orders index * ORDER_CHUNK_SIZE onwards: the orders, their items
+    (ids relative to the chunk, see write_orders), history, refund requests,
+    refunds and the reviews their customers wrote; plus the chunk's sales per
+    local day and [units sold, approved stars, approved reviews] per product
+    id, for the rollups, ordered_number and ratings.
+    """
+    plan = _plan
+    rng = random.Random(f"{plan.seed}:orders:{index}")
+    first = index * ORDER_CHUNK_SIZE
+    count = min(ORDER_CHUNK_SIZE, plan.orders - first)
+    days = rng.choices(plan.days, cum_weights=plan.day_weights, k=count)
+    buyers = rng.choices(plan.buyers, cum_weights=plan.buyer_weights, k=count)
+    sizes = rng.choices(*ITEMS_PER_ORDER, k=count)
+    rows = {"orders": [], "items": [], "history": [], "refund_requests": [], "refunds": [], "reviews": []}
+    items, history, reviews = rows["items"], rows["history"], rows["reviews"]
+    sales = defaultdict(lambda: dict.fromkeys(SALES_FIELDS, 0))
+    tallies = defaultdict(lambda: [0, 0, 0])
+
+    for n in range(count):
+        order_id = plan.first_order_id + first + n
+        buyer = buyers[n]
+        user_id = plan.user_id(buyer)
+        created = plan.moment(rng, days[n])
+        lines, cost = [], 0
+        for product in plan.pick_products(rng, sizes[n]):
+            quantity = rng.choices(*QUANTITY)[0]
+            lines.append([len(items) + len(lines), order_id, plan.product_ids[product], quantity,
+                          plan.unit_prices[product], plan.titles[product], 0, plan.unit_costs[product]])
+            cost += plan.unit_costs[product] * quantity
+            tallies[plan.product_ids[product]][0] += quantity
+        total = sum(line[4] * line[3] for line in lines)
+
+        shipped = created + timedelta(hours=rng.randint(12, 72))
+        delivered = shipped + timedelta(hours=rng.randint(24, 144))
+        if rng.random() < CANCEL_RATE:
+            status, cancelled = "Cancelled", created + timedelta(hours=rng.randint(1, 48))
+            if cancelled < plan.until:
+                history.append((order_id, "Cancelled", _timestamp(cancelled)))
+            else:
+                status = "Processing"
+        elif shipped >= plan.until:
+            status = "Processing"
+        elif delivered >= plan.until:
+            status = "Shipped"
+            history.append((order_id, "Shipped", _timestamp(shipped)))
+        else:
+            status = "Delivered"
+            history.append((order_id, "Shipped", _timestamp(shipped)))
+            history.append((order_id, "Delivered", _timestamp(delivered)))
+            day = sales[_local_date(delivered)]
+            day["revenue"] += total
+            day["cost"] += cost
+            day["units"] += sum(line[3] for line in lines)
+            day["orders"] += 1
+            if rng.random() < REFUND_REQUEST_RATE:
+                status = _refund(rng, plan, rows, sales, rng.choice(lines), lines, user_id, delivered, status)
+            for line in lines:
+                if rng.random() < REVIEW_RATE:
+                    written = delivered + timedelta(days=rng.randint(2, 40), seconds=rng.randrange(86400))
+                    if written < plan.until:
+                        stars = rng.choices(*STARS)[0]
+                        text = " ".join(rng.choices(plan.vocabulary, k=rng.randint(8, 60))).capitalize() + "."
+                        if written > plan.until - timedelta(days=3):
+                            review_status, approved = "pending", True
+                        elif rng.random() < 0.9:
+                            review_status, approved = "approved", True
+                        else:
+                            review_status, approved = "rejected", False
+                        reviews.append((user_id, line[2], stars, text, _timestamp(written), review_status, approved))
+                        if approved:
+                            tallies[line[2]][1] += stars
+                            tallies[line[2]][2] += 1
+
+        name, phone, address, city, postal = plan.profile(buyer)
+        rows["orders"].append(
+            (order_id, user_id, status, total, name, phone, address, "", city, postal, _timestamp(created))
+        )
+        items.extend(tuple(line) for line in lines)
+    return rows, dict(sales), dict(tallies)
+
+
+def _refund(rng, plan, rows, sales, line, lines, user_id, delivered, status):
+    """A refund request on `line` (and its refund, if approved); returns the order's status."""
+    requested = delivered + timedelta(days=rng.randint(1, 25), seconds=rng.randrange(86400))
+    if requested >= plan.until:
+        return status
+    quantity = line[3] if rng.random() < 0.8 else rng.randint(1, line[3])
+    processed = requested + timedelta(hours=rng.randint(2, 72))
+    outcome = rng.random()
+    if processed >= plan.until or outcome >= 0.9:
+        rows["refund_requests"].append((line[0], user_id, quantity, "Pending", _timestamp(requested), None, ""))
+        return status
+    if outcome >= 0.75:
+        rows["refund_requests"].append(
+            (line[0], user_id, quantity, "Rejected", _timestamp(requested), _timestamp(processed),
+             "Outside our refund policy.")
+        )
+        return status
+    rows["refund_requests"].append(
+        (line[0], user_id, quantity, "Approved", _timestamp(requested), _timestamp(processed), "Refund approved.")
+    )
+    rows["refunds"].append((line[1], line[0], quantity, line[4] * quantity, _timestamp(processed)))
+    sales[_local_date(processed)]["refunds"] += line[4] * quantity
+    line[6] = quantity
+    # as ProcessRefundRequestView: the order is Refunded once nothing is left
+    if all(other[6] == other[3] for other in lines):
+        rows["history"].append((line[1], "Refunded", _timestamp(processed)))
+        return "Refunded"
+    return status
+
+
+def _generate(fn, indexes, workers, *args):
+    """
+    fn(index, *args) for each index, in order; with several workers the
+    chunks are generated in forked processes, a few ahead of the writer.
+    """
+    if workers <= 1:
+        for index in indexes:
+            yield fn(index, *args)
+        return
+    with ProcessPoolExecutor(workers, mp_context=get_context("fork")) as pool:
+        pending = deque()
+        for index in indexes:
+            pending.append(pool.submit(fn, index, *args))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class SeedStats:
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, name, count):
+        self.rows[name] = self.rows.get(name, 0) + count
+
+
+# seeded ISBNs are 979-0 (unassigned to publishers, so they cannot clash with a
+# real book), then the seed in three digits and the product number in six
+MAX_SEED = 999
+MAX_PRODUCTS = 10 ** 6 - 1
+
+
+def isbn_prefix(plan_seed):
+    return f"9790{plan_seed:03d}"
+
+
+def seed_catalog(plan_seed, products, until):
+    """Create any missing genres and `products` products (through bulk_create); returns them."""
+    rng = random.Random(f"{plan_seed}:catalog")
+    genres = [Genre.objects.get_or_create(name=name)[0] for name in GENRES]
+    genre_weights = _zipf(len(genres), 0.8)
+    vocabulary = _words(rng, 2000)
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(max(1, products // 4))]
+    publishers = [f"{word.capitalize()} Press" for word in rng.sample(vocabulary, 40)]
+    batch = []
+    for n in range(products):
+        price = Decimal(f"{min(max(rng.lognormvariate(2.7, 0.5), 3), 150):.0f}.99")
+        discount = Decimal(rng.choice([5, 10, 15, 20, 25, 30, 40])) if rng.random() < 0.15 else Decimal("0")
+        batch.append(Product(
+            title=" ".join(rng.sample(vocabulary, rng.randint(1, 4))).title(),
+            author=rng.choice(authors),
+            price=price,
+            discount_percent=discount,
+            cost_price=(price * Decimal(rng.uniform(0.45, 0.7))).quantize(Decimal("0.01")),
+            stock=rng.randint(0, 500),
+            isbn=f"{isbn_prefix(plan_seed)}{n:06d}",
+            genre=genres[rng.choices(range(len(genres)), cum_weights=genre_weights)[0]],
+            description=" ".join(rng.choices(vocabulary, k=rng.randint(30, 120))).capitalize() + ".",
+            publisher=rng.choice(publishers),
+            publication_date=until - timedelta(days=rng.randint(30, 365 * 40)),
+            cover_image="book_covers/sample_cover.jpg",
+            pages=rng.randint(80, 1200),
+            language=rng.choice(LANGUAGES),
+        ))
+    # indexed once at the end rather than row by row through the triggers
+    search = get_search_backend()
+    search.uninstall()
+    try:
+        return Product.objects.bulk_create(Product.objects.assign_slugs(batch), batch_size=1000)
+    finally:
+        search.install()
+
+
+def write_users(plan, stats, workers, password):
+    inserts = {
+        "users": _Insert(User, USER_FIELDS),
+        "profiles": _Insert(Profile, PROFILE_FIELDS),
+        "memberships": _Insert(User.groups.through, MEMBERSHIP_FIELDS),
+        "carts": _Insert(Cart, CART_FIELDS),
+        "cart_items": _Insert(CartItem, CART_ITEM_FIELDS),
+        "wishlist": _Insert(WishlistItem, WISHLIST_FIELDS),
+    }
+    for rows in _generate(user_chunk, plan.chunks(plan.users, USER_CHUNK_SIZE), workers, password):
+        with transaction.atomic():
+            for name, insert in inserts.items():
+                insert(rows[name])
+                stats.add(name, len(rows[name]))
+
+
+def write_orders(plan, stats, workers):
+    """Write the order chunks; returns their sales per day and tallies per product (see order_chunk)."""
+    inserts = {
+        "orders": _Insert(Order, ORDER_FIELDS),
+        "items": _Insert(OrderItem, ITEM_FIELDS),
+        "history": _Insert(OrderStatusHistory, HISTORY_FIELDS),
+        "refund_requests": _Insert(RefundRequest, REFUND_REQUEST_FIELDS),
+        "refunds": _Insert(Refund, REFUND_FIELDS),
+        "reviews": _Insert(Review, REVIEW_FIELDS),
+    }
+    sales = defaultdict(lambda: dict.fromkeys(SALES_FIELDS, 0))
+    tallies = defaultdict(lambda: [0, 0, 0])
+    next_item = (OrderItem.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+    for rows, chunk_sales, chunk_tallies in _generate(
+        order_chunk, plan.chunks(plan.orders, ORDER_CHUNK_SIZE), workers
+    ):
+        # item ids come relative to their chunk; refund requests and refunds point at them
+        base = next_item
+        rows["items"] = [(base + row[0],) + row[1:] for row in rows["items"]]
+        rows["refund_requests"] = [(base + row[0],) + row[1:] for row in rows["refund_requests"]]
+        rows["refunds"] = [(row[0], base + row[1]) + row[2:] for row in rows["refunds"]]
+        next_item += len(rows["items"])
+        with transaction.atomic():
+            for name, insert in inserts.items():
+                insert(rows[name])
+                stats.add(name, len(rows[name]))
+        for day, amounts in chunk_sales.items():
+            for field, amount in amounts.items():
+                sales[day][field] += amount
+        for product_id, counts in chunk_tallies.items():
+            tallies[product_id] = [a + b for a, b in zip(tallies[product_id], counts)]
+    return sales, tallies
+
+
+def write_product_totals(tallies):
+    """
+    Set ordered_number and the rating aggregate of the freshly seeded (so
+    unsold and unrated) products in `tallies`.
+    """
+    product = Product._meta
+    sql = "UPDATE %s SET %s = %%s, %s = %%s, %s = %%s, %s = %%s WHERE %s = %%s" % (
+        connection.ops.quote_name(product.db_table),
+        *(connection.ops.quote_name(product.get_field(name).column)
+          for name in ("ordered_number", "rating_sum", "rating_count", "rating", "id")),
+    )
+    # rounded as Product.add_rating does
+    rows = [
+        (units, stars, count, round(stars / count, 2) if count else 0, pk)
+        for pk, (units, stars, count) in tallies.items()
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+# written by write_users / write_orders
+BULK_MODELS = [
+    User, Profile, User.groups.through, Cart, CartItem, WishlistItem,
+    Order, OrderItem, OrderStatusHistory, RefundRequest, Refund, Review,
+]
+SEEDED_MODELS = [Product] + BULK_MODELS
+
+
+def _plain_indexes(models):
+    """(name, CREATE INDEX statement) of the non-unique indexes on `models`' tables (SQLite)."""
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            "AND tbl_name IN (%s)" % ", ".join(["%s"] * len(tables)),
+            tables,
+        )
+        return [(name, sql) for name, sql in cursor.fetchall() if not sql.upper().startswith("CREATE UNIQUE")]
+
+
+@contextmanager
+def _bulk_load():
+    """
+    Foreign keys checked once, after the load (as loaddata does). On SQLite
+    also: commits without fsync, a larger page cache, and the plain indexes
+    of the bulk tables dropped for the duration and recreated at the end -
+    one sort each instead of millions of random B-tree inserts; unique
+    indexes stay, so duplicates are still refused. None of this is done if
+    the caller holds a transaction, where SQLite cannot change the pragmas.
+    """
+    sqlite = connection.vendor == "sqlite" and not connection.in_atomic_block
+    indexes = _plain_indexes(BULK_MODELS) if sqlite else []
+    with connection.constraint_checks_disabled():
+        if sqlite:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous=OFF")
+                cursor.execute("PRAGMA cache_size=-262144")  # KiB
+                for name, _ in indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        try:
+            yield
+        finally:
+            if sqlite:
+                with connection.cursor() as cursor:
+                    for _, sql in indexes:
+                        cursor.execute(sql)
+                    cursor.execute("PRAGMA synchronous=NORMAL")  # as e_commerce_app sets it
+                    cursor.execute("PRAGMA cache_size=-2000")  # SQLite's default
+    connection.check_constraints(table_names=[model._meta.db_table for model in SEEDED_MODELS])
+
+
+def seed(seed, users, orders, products, days, until=None, workers=1, password=None, progress=None):
+    """
+    Seed the database; returns SeedStats (rows written per table). `progress`,
+    if given, is called with a line of text after each phase.
+    """
+    until = until or date.today()
+    report = progress or (lambda line: None)
+    stats = SeedStats()
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"--seed must be between 0 and {MAX_SEED}: it is part of every seeded ISBN")
+    if products > MAX_PRODUCTS:
+        raise ValueError(f"--products must be at most {MAX_PRODUCTS:,}: seeded ISBNs number them in six digits")
+    if (
+        User.objects.filter(username__startswith=f"seed{seed}-").exists()
+        or Product.objects.filter(isbn__startswith=isbn_prefix(seed)).exists()
+    ):
+        raise ValueError(f"Seed {seed} was already loaded here; pick another --seed or a fresh database")
+
+    catalog = seed_catalog(seed, products, until)
+    stats.add("products", len(catalog))
+    report(f"{len(catalog)} products")
+
+    global _plan
+    _plan = Plan(seed, users, orders, days, until, catalog)
+    try:
+        with _bulk_load():
+            write_users(_plan, stats, workers, make_password(password))
+            report(
+                f"{users} customers, {stats.rows['cart_items']} cart lines, "
+                f"{stats.rows['wishlist']} wishlist items"
+            )
+            sales, tallies = write_orders(_plan, stats, workers)
+            report(f"{orders} orders, {stats.rows['items']} order items, {stats.rows['reviews']} reviews")
+    finally:
+        _plan = None
+
+    write_product_totals(tallies)
+    rollups.add_totals(sales)
+    # rows inserted with explicit ids leave sequences behind on PostgreSQL and friends
+    statements = connection.ops.sequence_reset_sql(no_style(), [User, Cart, Order, OrderItem])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    bump_generation()
+    report("sales counts, ratings, sales rollups and catalog cache updated")
+    return stats
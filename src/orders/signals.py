@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Order, OrderStatusHistory, Refund
+from . import reservations, rollups
+
+
+@receiver(pre_delete, sender=Order)
+def release_order_reservations(sender, instance, **kwargs):
+    # the holds are cascade-deleted with the order; give their stock back first
+    reservations.release(instance)
+
+
+@receiver(post_save, sender=OrderStatusHistory)
+def roll_up_delivery(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.status == "Delivered":
+        rollups.record_delivery(instance.order, instance.timestamp)
+
+
+@receiver(post_save, sender=Refund)
+def roll_up_refund(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.record_refund(instance)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from . import reservations
+
+
+@shared_task
+def expire_stock_reservations(batch_size=500):
+    """Periodic sweep (CELERY_BEAT_SCHEDULE) returning stock held by unpaid orders past their TTL."""
+    return reservations.expire_stale(batch_size=batch_size)
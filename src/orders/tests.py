@@ -1,17 +1,33 @@
+import csv
+import json
+import tracemalloc
+
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from admin_panel.models import Genre, Product
-from datetime import date
+from datetime import date, datetime
 from cart.models import Cart, CartItem
 from orders.models import Order, OrderItem
 from rest_framework import status
 from django.contrib.auth.models import Group
-from orders.models import Order, OrderItem, RefundRequest, Refund
+from orders.models import DailySalesRollup, Order, OrderItem, OrderStatusHistory, RefundRequest, Refund, StockReservation
+from orders.reservations import expire_stale
+from orders.exports import stream_export
+from orders.rollups import rebuild
 
 from django.utils import timezone
 from decimal import Decimal
+from django.db.models import Sum
 from django.core import mail
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from datetime import timedelta
+from io import StringIO
+from e_commerce_app.testing import QueryPlanAssertions
 
 User = get_user_model()
 
@@ -54,6 +70,34 @@ class OrderTests(APITestCase):
         self.assertEqual(response.status_code, 201)
         self.assertTrue(Order.objects.filter(user=self.user).exists())
 
+    def test_place_order_snapshots_titles_and_total(self):
+        self.product.discount_percent = Decimal("10")
+        self.product.save()
+        cart = Cart.objects.create(user=self.user, is_active=True)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=3)
+
+        response = self.client_user.post(reverse('place-order'))
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_price, Decimal("135.00"))
+        item = order.items.get()
+        self.assertEqual(item.product_title, "Test Book")
+        self.assertEqual(item.price_at_purchase, Decimal("45.00"))
+        # no cost_price: DEFAULT_COST_RATIO of what the unit sold for
+        self.assertEqual(item.cost_at_purchase, Decimal("22.50"))
+
+    def test_place_order_uses_only_the_cart_the_user_sees(self):
+        cart = Cart.objects.create(user=self.user, is_active=True)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        stray = Cart.objects.create(user=self.user, is_active=True)
+        CartItem.objects.create(cart=stray, product=self.product, quantity=4)
+
+        response = self.client_user.post(reverse('place-order'))
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(list(order.items.values_list("quantity", flat=True)), [1])
+        self.assertEqual(order.total_price, Decimal("50.00"))
+
     def test_place_order_insufficient_stock(self):
         cart = Cart.objects.create(user=self.user, is_active=True)
         CartItem.objects.create(cart=cart, product=self.product, quantity=99)
@@ -227,3 +271,638 @@ class RefundRequestsTestCase(APITestCase):
 
         # Check email notification
         self.assertEqual(len(mail.outbox), 1)
+
+
+class OrderPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pager", email="pager@example.com", password="testpass")
+        self.orders = [Order.objects.create(user=self.user, total_price=10 + i) for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def _next_link(self, response):
+        for part in response.get("Link", "").split(","):
+            url, _, rel = part.partition(";")
+            if 'rel="next"' in rel:
+                return url.strip()[1:-1]
+        return None
+
+    def test_unchanged_order_list_answers_304(self):
+        etag = self.client.get(reverse('my-orders'), {"page_size": 2})["ETag"]
+        response = self.client.get(reverse('my-orders'), {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # another page is another representation
+        self.assertEqual(self.client.get(reverse('my-orders'), {"page_size": 3}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Order.objects.filter(pk=self.orders[0].pk).update(status="Shipped")
+        response = self.client.get(reverse('my-orders'), {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_renamed_product_changes_order_list_etag(self):
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        product = Product.objects.create(
+            title="Old Title", slug="old-title", isbn="1111111111111", genre=genre,
+            description="d", publisher="P", publication_date="2025-01-01", pages=10,
+            language="EN", price=Decimal("10.00"), stock=5,
+        )
+        OrderItem.objects.create(order=self.orders[0], product=product, quantity=1, price_at_purchase=Decimal("10.00"))
+        etag = self.client.get(reverse('my-orders'))["ETag"]
+
+        Product.objects.filter(pk=product.pk).update(title="New Title")
+        response = self.client.get(reverse('my-orders'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        titles = [i["product_title"] for o in response.data for i in o["items"]]
+        self.assertEqual(titles, ["New Title"])
+
+    def test_list_without_paging_params_gets_the_default_page(self):
+        with override_settings(PAGINATION_PAGE_SIZE=2):
+            response = self.client.get(reverse('my-orders'))
+        self.assertEqual(len(response.data), 2)
+        self.assertIsNotNone(self._next_link(response))
+
+    def test_pages_follow_keyset_cursor(self):
+        url = reverse('my-orders') + "?page_size=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 2)
+            seen += [o["id"] for o in response.data]
+            url = self._next_link(response)
+        # newest first, every order exactly once
+        self.assertEqual(seen, [o.id for o in reversed(self.orders)])
+
+    def test_new_rows_do_not_shift_pages(self):
+        response = self.client.get(reverse('my-orders'), {"page_size": 2})
+        first_page = [o["id"] for o in response.data]
+        Order.objects.create(user=self.user, total_price=99)
+
+        response = self.client.get(self._next_link(response))
+        self.assertEqual([o["id"] for o in response.data], [self.orders[2].id, self.orders[1].id])
+        self.assertNotIn(response.data[0]["id"], first_page)
+
+    def test_total_count_header(self):
+        response = self.client.get(reverse('my-orders'), {"count": "true", "page_size": 1})
+        self.assertEqual(response["X-Total-Count"], "5")
+        self.assertEqual(len(response.data), 1)
+
+    def test_tampered_cursor_rejected(self):
+        response = self.client.get(reverse('my-orders'), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderQueryCountTests(APITestCase):
+    """
+    Regression harness: listing orders must cost the same number of queries
+    however many orders (and items) are on the page.
+    """
+    page_sizes = (10, 1000)
+
+    def setUp(self):
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.products = [
+            Product.objects.create(
+                title=f"Book {i}", author="Author", price=Decimal("10.00"), stock=100,
+                genre=self.genre, isbn=f"97800000000{i:02d}", description="d",
+                publisher="p", publication_date=date.today(), pages=100, language="EN",
+            )
+            for i in range(3)
+        ]
+        self.customer = User.objects.create_user(username="buyer", email="buyer@example.com", password="testpass")
+        self.pm_user = User.objects.create_user(username="pm", email="pm@example.com", password="testpass")
+        pm_group, _ = Group.objects.get_or_create(name="product manager")
+        self.pm_user.groups.add(pm_group)
+
+    def seed_orders(self, count):
+        Order.objects.all().delete()
+        orders = Order.objects.bulk_create(
+            [Order(user=self.customer, total_price=Decimal("30.00")) for _ in range(count)]
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1,
+                      price_at_purchase=product.price, cost_at_purchase=5, product_title=product.title)
+            for order in orders for product in self.products
+        ])
+
+    def assertConstantQueries(self, user, url_name):
+        counts = []
+        for size in self.page_sizes:
+            self.seed_orders(size)
+            # a fresh user object per request, as real authentication gives
+            # (users.roles memoizes on it)
+            self.client.force_authenticate(User.objects.get(pk=user.pk))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(url_name), {"page_size": size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), size)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(
+            len(set(counts)), 1,
+            msg=f"{url_name}: query count grew with page size {dict(zip(self.page_sizes, counts))}",
+        )
+
+    def test_order_list_query_count_is_constant(self):
+        self.assertConstantQueries(self.pm_user, 'order-list')
+
+    def test_my_orders_query_count_is_constant(self):
+        self.assertConstantQueries(self.customer, 'my-orders')
+class StockReservationTests(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer", email="buyer@example.com", password="testpass")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="testpass")
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Scarce Book",
+            author="Author",
+            price=Decimal("30.00"),
+            stock=3,
+            genre=self.genre,
+            isbn="9999999999",
+            description="Only a few left.",
+            publisher="Test Publisher",
+            publication_date=date.today(),
+            pages=100,
+            language="English",
+        )
+        self.client_buyer = APIClient()
+        self.client_buyer.force_authenticate(self.buyer)
+        self.client_other = APIClient()
+        self.client_other.force_authenticate(self.other)
+
+    def _checkout(self, client, user, quantity):
+        cart = Cart.objects.create(user=user, is_active=True)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=quantity)
+        return client.post(reverse('place-order'))
+
+    def test_place_order_reserves_stock(self):
+        response = self._checkout(self.client_buyer, self.buyer, 2)
+        self.assertEqual(response.status_code, 201)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(self.product.reserved, 2)
+        self.assertEqual(self.product.available_stock, 1)
+        hold = StockReservation.objects.get(order_id=response.data["order_id"])
+        self.assertEqual(hold.status, StockReservation.ACTIVE)
+        self.assertEqual(hold.quantity, 2)
+
+    def test_reserved_stock_blocks_other_buyers(self):
+        self._checkout(self.client_buyer, self.buyer, 2)
+        response = self._checkout(self.client_other, self.other, 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Not enough stock', str(response.data))
+
+    def test_payment_converts_reservation(self):
+        order_id = self._checkout(self.client_buyer, self.buyer, 2).data["order_id"]
+        response = self.client_buyer.post(
+            reverse('process-payment', kwargs={'order_id': order_id}),
+            {"card_number": "4111111111111111", "expiry": "12/99", "cvv": "123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, msg=response.data)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertEqual(self.product.reserved, 0)
+        self.assertEqual(self.product.ordered_number, 2)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.CONVERTED)
+
+    def test_expired_reservation_is_released(self):
+        self._checkout(self.client_buyer, self.buyer, 3)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        call_command("expire_reservations", stdout=StringIO())
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved, 0)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.EXPIRED)
+        self.assertEqual(self._checkout(self.client_other, self.other, 3).status_code, 201)
+
+    def test_checkout_reclaims_lapsed_holds_without_the_sweeper(self):
+        self._checkout(self.client_buyer, self.buyer, 3)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        # no expire_reservations run: the other buyer's checkout expires the hold itself
+        self.assertEqual(self._checkout(self.client_other, self.other, 3).status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved, 3)
+        self.assertEqual(
+            sorted(StockReservation.objects.values_list("status", flat=True)),
+            sorted([StockReservation.ACTIVE, StockReservation.EXPIRED]),
+        )
+
+    def test_unexpired_reservation_is_kept(self):
+        self._checkout(self.client_buyer, self.buyer, 1)
+        self.assertEqual(expire_stale(), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved, 1)
+
+    def test_deleting_order_releases_reservation(self):
+        order_id = self._checkout(self.client_buyer, self.buyer, 2).data["order_id"]
+        Order.objects.get(pk=order_id).delete()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved, 0)
+        self.assertEqual(self.product.stock, 3)
+
+    def test_cancelling_unpaid_order_releases_without_restock(self):
+        order_id = self._checkout(self.client_buyer, self.buyer, 2).data["order_id"]
+        response = self.client_buyer.patch(
+            reverse('order-status-update', kwargs={'pk': order_id}), {"status": "Cancelled"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(self.product.reserved, 0)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.RELEASED)
+
+    def test_cancelling_order_paid_after_its_hold_expired_restocks(self):
+        order_id = self._checkout(self.client_buyer, self.buyer, 2).data["order_id"]
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        expire_stale()
+        response = self.client_buyer.post(
+            reverse('process-payment', kwargs={'order_id': order_id}),
+            {"card_number": "4111111111111111", "expiry": "12/99", "cvv": "123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+        response = self.client_buyer.patch(
+            reverse('order-status-update', kwargs={'pk': order_id}), {"status": "Cancelled"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(self.product.reserved, 0)
+
+
+class OrderIndexPlanTests(QueryPlanAssertions, APITestCase):
+    """The main query of each order endpoint seeks through its index on a seeded dataset."""
+
+    def setUp(self):
+        self.sales = User.objects.create_user(username="planner", email="planner@example.com", password="testpass")
+        self.sales.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        self.customers = [
+            User.objects.create_user(username=f"customer{n}", email=f"c{n}@example.com", password="testpass")
+            for n in range(5)
+        ]
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        product = Product.objects.create(
+            title="Plan Book", author="Author", price=10, stock=1000, isbn="9786666666600",
+            genre=genre, description="d", publisher="p", publication_date=date(2020, 1, 1),
+            pages=100, language="EN",
+        )
+        orders = Order.objects.bulk_create([
+            Order(user=user, total_price=10, status="Delivered") for user in self.customers for _ in range(20)
+        ])
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, price_at_purchase=10, cost_at_purchase=5, product_title="Plan Book")
+            for order in orders
+        ])
+        OrderStatusHistory.objects.bulk_create(
+            [OrderStatusHistory(order=order, status=s) for order in orders for s in ("Shipped", "Delivered")]
+        )
+        RefundRequest.objects.bulk_create([
+            RefundRequest(order_item=item, user=item.order.user, quantity=1, status=s)
+            for item, s in zip(items, ["Pending", "Approved", "Rejected"] * len(items))
+        ])
+        self.client.force_authenticate(self.sales)
+
+    def test_my_orders(self):
+        self.client.force_authenticate(self.customers[0])
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('my-orders')), "orders_order", "order_user_created_idx"
+        )
+
+    def test_revenue_report(self):
+        today = timezone.localdate()
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('revenue-report'), {"start": today - timedelta(days=7), "end": today}),
+            "orders_dailysalesrollup",  # the unique index on day
+        )
+
+    def test_sales_rollup_rebuild(self):
+        today = timezone.localdate()
+        with CaptureQueriesContext(connection) as ctx:
+            rebuild(today - timedelta(days=7), today)
+        queries = [q["sql"] for q in ctx.captured_queries]
+        self.assertIndexSeek(
+            self.main_query(queries, "orders_orderstatushistory"),
+            "orders_orderstatushistory", "orderhistory_status_ts_idx",
+        )
+
+    def test_pending_refund_requests(self):
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('refund-requests-list')),
+            "orders_refundrequest", "refundreq_status_req_idx",
+        )
+
+
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(username="roller", email="roller@example.com", password="testpass")
+        self.pm = User.objects.create_user(username="shipper", email="shipper@example.com", password="testpass")
+        self.pm.groups.add(Group.objects.get_or_create(name="product manager")[0])
+        self.sales = User.objects.create_user(username="analyst", email="analyst@example.com", password="testpass")
+        self.sales.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        product = Product.objects.create(
+            title="Rolled Book", author="Author", price=Decimal("20.00"), stock=100, isbn="9789999999900",
+            genre=genre, description="d", publisher="p", publication_date=date(2020, 1, 1),
+            pages=100, language="EN",
+        )
+        self.orders = []
+        for quantity in (1, 3):
+            order = Order.objects.create(user=self.customer, total_price=Decimal("20.00") * quantity, status="Shipped")
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, price_at_purchase=Decimal("20.00"))
+            self.orders.append(order)
+        self.today = timezone.localdate()
+
+    def _deliver(self, order):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.pm.pk))
+        response = client.patch(reverse('order-status-update', args=[order.pk]), {"status": "Delivered"}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def _refund_one(self, order):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        item = order.items.get()
+        response = client.post(
+            reverse('order-refund', args=[order.pk]),
+            {"items": [{"order_item_id": item.pk, "quantity": 1}]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def _rows(self):
+        return list(DailySalesRollup.objects.order_by("day").values("day", "revenue", "refunds", "units", "orders"))
+
+    def test_deliveries_and_refunds_update_the_rollup(self):
+        for order in self.orders:
+            self._deliver(order)
+        self._refund_one(self.orders[1])
+
+        self.assertEqual(self._rows(), [{
+            "day": self.today, "revenue": Decimal("80.00"), "refunds": Decimal("20.00"), "units": 4, "orders": 2,
+        }])
+
+    def test_rebuild_matches_incremental_rollup(self):
+        for order in self.orders:
+            self._deliver(order)
+        self._refund_one(self.orders[1])
+        incremental = self._rows()
+
+        DailySalesRollup.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_sales_rollups", stdout=out)
+        self.assertIn("1 days", out.getvalue())
+        self.assertEqual(self._rows(), incremental)
+
+    def test_report_reads_only_rollup_rows(self):
+        DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(
+                day=self.today - timedelta(days=n), revenue=Decimal("100.00"), cost=Decimal("50.00"), units=5, orders=2,
+            )
+            for n in range(365)
+        ])
+        self.client.force_authenticate(self.sales)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse('revenue-report'), {"start": self.today - timedelta(days=364), "end": self.today}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["revenue"], 36500.0)
+        self.assertEqual(response.data["profit"], 18250.0)
+        self.assertEqual(response.data["orders"], 730)
+        self.assertEqual(len(response.data["chart"]), 365)
+        tables = {
+            table for q in ctx.captured_queries
+            for table in ("orders_order\"", "orders_orderstatushistory", "orders_dailysalesrollup")
+            if table in q["sql"]
+        }
+        self.assertEqual(tables, {"orders_dailysalesrollup"})
+
+
+class SalesExportTests(APITestCase):
+    def setUp(self):
+        self.sales = User.objects.create_user(username="exporter", email="exporter@example.com", password="testpass")
+        self.sales.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        self.customer = User.objects.create_user(username="buyer", email="buyer@example.com", password="testpass")
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Exported, \"Quoted\" Book", author="Author", price=Decimal("12.50"), stock=10,
+            isbn="9781010101000", genre=genre, description="d", publisher="p",
+            publication_date=date(2020, 1, 1), pages=100, language="EN",
+        )
+        self.order = Order.objects.create(user=self.customer, total_price=Decimal("37.50"))
+        self.item = OrderItem.objects.create(
+            order=self.order, product=self.product, quantity=3, price_at_purchase=Decimal("12.50")
+        )
+        self.client.force_authenticate(self.sales)
+
+    def _get(self, dataset, fmt, **params):
+        response = self.client.get(reverse('sales-export', args=[dataset, fmt]), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def _seed(self, count):
+        orders = Order.objects.bulk_create([Order(user=self.customer, total_price=10) for _ in range(count)])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=o, product=self.product, quantity=1, price_at_purchase=10, cost_at_purchase=5, product_title="Bulk")
+            for o in orders
+        ])
+
+    def test_orders_csv_has_one_line_per_item(self):
+        rows = list(csv.DictReader(StringIO(self._get("orders", "csv"))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["product_title"], 'Exported, "Quoted" Book')
+        self.assertEqual(rows[0]["line_total"], "37.50")
+        self.assertEqual(rows[0]["customer"], "buyer")
+
+    def test_ndjson_and_date_filter(self):
+        Refund.objects.create(order=self.order, order_item=self.item, quantity=1, refund_amount=Decimal("12.50"))
+        today = timezone.localdate()
+        lines = self._get("refunds", "ndjson", start=today.isoformat(), end=today.isoformat()).splitlines()
+        self.assertEqual(json.loads(lines[0])["refund_amount"], "12.50")
+        tomorrow = (today + timedelta(days=1)).isoformat()
+        self.assertEqual(self._get("refunds", "ndjson", start=tomorrow), "")
+
+    def test_sales_manager_only(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(reverse('sales-export', args=["orders", "csv"]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_dataset_or_bad_date(self):
+        self.assertEqual(self.client.get(reverse('sales-export', args=["users", "csv"])).status_code, 404)
+        response = self.client.get(reverse('sales-export', args=["orders", "csv"]), {"start": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('sales-export', args=["orders", "csv"]), {"end": "2025-02-30"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Invalid end date", response.data["error"])
+
+    def test_memory_does_not_grow_with_row_count(self):
+        def peak(rows):
+            OrderItem.objects.all().delete()
+            self._seed(rows)
+            tracemalloc.start()
+            for _ in stream_export("orders", "csv", chunk_size=500):
+                pass
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak_bytes
+
+        small, large = peak(2000), peak(20000)
+        # ten times the rows, about the same peak: one fetch chunk is alive at a time
+        self.assertLess(large, small * 1.5)
+
+
+class SalesBreakdownTests(APITestCase):
+    def setUp(self):
+        self.sales = User.objects.create_user(username="merch", email="merch@example.com", password="testpass")
+        self.sales.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+        customer = User.objects.create_user(username="reader", email="reader@example.com", password="testpass")
+        fiction, _ = Genre.objects.get_or_create(name="Fiction")
+        poetry, _ = Genre.objects.get_or_create(name="Poetry")
+
+        def product(n, genre, author, cost_price):
+            return Product.objects.create(
+                title=f"Merch Book {n}", author=author, price=Decimal("20.00"), cost_price=cost_price,
+                stock=100, isbn=f"97812121212{n:02d}", genre=genre, description="d", publisher="p",
+                publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+
+        self.costed = product(1, fiction, "Ada", Decimal("5.00"))
+        self.uncosted = product(2, poetry, "Ben", None)
+        self.other = product(3, fiction, "Ben", Decimal("8.00"))
+        # (product, quantity, unit price, refunded)
+        lines = [(self.costed, 2, Decimal("20.00"), 1), (self.uncosted, 1, Decimal("30.00"), 0),
+                 (self.other, 4, Decimal("10.00"), 0)]
+        for product, quantity, price, refunded in lines:
+            order = Order.objects.create(user=customer, total_price=price * quantity, status="Shipped")
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity, price_at_purchase=price,
+                refunded_quantity=refunded,
+            )
+            OrderStatusHistory.objects.create(order=order, status="Delivered")
+        self.client.force_authenticate(self.sales)
+        today = timezone.localdate()
+        self.range = {"start": today - timedelta(days=1), "end": today}
+
+    def test_cost_uses_cost_price_or_default_ratio(self):
+        data = self.client.get(reverse('revenue-report'), self.range).data
+        # 2 x 5.00 + 1 x (50% of 30.00) + 4 x 8.00
+        self.assertEqual(data["cost"], 57.0)
+        self.assertEqual(data["profit"], data["revenue"] - 57.0)
+        point = data["chart"][0]
+        self.assertEqual(point["profit"], point["revenue"] - point["cost"])
+
+    def test_cost_price_change_does_not_rewrite_past_profit(self):
+        Product.objects.filter(pk__in=[self.costed.pk, self.uncosted.pk]).update(cost_price=Decimal("19.00"))
+        data = self.client.get(reverse('revenue-report'), {**self.range, "group_by": "product"}).data
+        # the chart still books each unit at its cost when bought, and the breakdown agrees
+        self.assertEqual(data["cost"], 57.0)
+        by_product = {row["key"]: row["cost"] for row in data["breakdown"]}
+        # less the refunded unit of the costed product
+        self.assertEqual(by_product, {self.costed.pk: 5.0, self.uncosted.pk: 15.0, self.other.pk: 32.0})
+
+    def test_breakdown_by_genre_nets_out_refunds(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('revenue-report'), {**self.range, "group_by": "genre"}).data
+        self.assertEqual(sum('"orders_orderitem"' in q["sql"] for q in ctx.captured_queries), 1)
+        by_genre = {row["label"]: row for row in data["breakdown"]}
+        # fiction: 1 kept unit at 20.00 (cost 5.00) + 4 at 10.00 (cost 8.00 each)
+        self.assertEqual(by_genre["Fiction"]["revenue"], 60.0)
+        self.assertEqual(by_genre["Fiction"]["cost"], 37.0)
+        self.assertEqual(by_genre["Fiction"]["profit"], 23.0)
+        self.assertEqual(by_genre["Fiction"]["units"], 5)
+        self.assertEqual(by_genre["Poetry"]["profit"], 15.0)
+
+    def test_top_n_by_author(self):
+        data = self.client.get(reverse('revenue-report'), {**self.range, "group_by": "author", "top": 1}).data
+        self.assertEqual(data["breakdown"], [
+            {"key": "Ben", "label": "Ben", "units": 5, "revenue": 70.0, "cost": 47.0, "profit": 23.0},
+        ])
+
+    def test_unknown_dimension(self):
+        response = self.client.get(reverse('revenue-report'), {**self.range, "group_by": "colour"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cost_price_is_set_by_sales_managers_and_not_public(self):
+        response = self.client.post(
+            reverse('product-set-price', args=[self.uncosted.slug]), {"cost_price": "12.00"}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["cost_price"], "12.00")
+        self.uncosted.refresh_from_db()
+        self.assertEqual(self.uncosted.cost_price, Decimal("12.00"))
+        self.assertEqual(self.uncosted.price, Decimal("20.00"))
+
+        public = APIClient().get(reverse('product-detail', args=[self.uncosted.slug]))
+        self.assertNotIn("cost_price", public.data)
+
+
+class SeedScaleTests(APITestCase):
+    options = ["--users", "40", "--orders", "300", "--products", "50", "--until", "2025-06-30", "--seed", "7"]
+
+    def seed(self, *extra):
+        call_command("seed_scale", *self.options, *extra, stdout=StringIO())
+
+    def fingerprint(self):
+        return (
+            list(Order.objects.order_by("created_at", "user__username").values_list(
+                "user__username", "status", "total_price", "created_at", "shipping_city")),
+            list(OrderItem.objects.order_by("order__created_at", "order__user__username", "product__isbn")
+                 .values_list("product__isbn", "quantity", "price_at_purchase", "refunded_quantity")),
+            sorted(Product.objects.values_list("isbn", "title", "price", "rating_sum", "rating_count")),
+            list(DailySalesRollup.objects.order_by("day").values_list("day", "revenue", "cost", "refunds", "units")),
+        )
+
+    def test_seeds_every_model_consistently(self):
+        self.seed("--workers", "1")
+        customers = User.objects.filter(username__startswith="seed7-")
+        self.assertEqual(customers.count(), 40)
+        self.assertEqual(customers.filter(profile__isnull=False, groups__name="customer").count(), 40)
+        self.assertEqual(Cart.objects.filter(user__in=customers, is_active=True).count(), 40)
+        self.assertEqual(Order.objects.count(), 300)
+        self.assertTrue(OrderItem.objects.count() > 300)
+        self.assertTrue(OrderStatusHistory.objects.filter(status="Delivered").exists())
+        self.assertTrue(RefundRequest.objects.exists())
+        until = datetime(2025, 7, 1, tzinfo=timezone.get_fixed_timezone(0))
+        self.assertFalse(Order.objects.filter(created_at__gte=until).exists())
+        for order in Order.objects.prefetch_related("items")[:50]:
+            self.assertEqual(order.total_price, sum(item.subtotal for item in order.items.all()))
+
+        sold = OrderItem.objects.values("product").annotate(units=Sum("quantity")).values_list("product", "units")
+        self.assertEqual(
+            dict(Product.objects.filter(ordered_number__gt=0).values_list("pk", "ordered_number")), dict(sold)
+        )
+
+        # what the rebuild commands derive from the rows is what seeding wrote
+        before = self.fingerprint()
+        call_command("rebuild_ratings", stdout=StringIO())
+        rebuild()
+        self.assertEqual(self.fingerprint(), before)
+
+    def test_same_seed_same_data_whatever_the_workers(self):
+        self.seed("--workers", "1")
+        first = self.fingerprint()
+        User.objects.filter(username__startswith="seed7-").delete()
+        Product.objects.all().delete()
+        DailySalesRollup.objects.all().delete()
+
+        self.seed("--workers", "2")
+        self.assertEqual(self.fingerprint(), first)
+
+    def test_refuses_to_load_a_seed_twice(self):
+        self.seed("--workers", "1")
+        with self.assertRaisesMessage(CommandError, "already loaded"):
+            self.seed("--workers", "1")
+
+    def test_refuses_seeds_and_sizes_its_isbns_cannot_hold(self):
+        with self.assertRaisesMessage(CommandError, "--seed must be between 0 and 999"):
+            call_command("seed_scale", "--seed", "1007", "--products", "5", stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "--products must be at most 999,999"):
+            call_command("seed_scale", "--products", "1000000", stdout=StringIO())
+        self.assertFalse(Product.objects.exists())
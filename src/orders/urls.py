@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import PlaceOrderView, OrderStatusUpdateView, MyRefundsView, OrderListView, OrderProductInfoView, OrderItemsView, MyOrderListView, RefundOrderView, CreateRefundRequestView, ListRefundRequestsView, ProcessRefundRequestView
-from .views import RevenueReportView
+from .views import RevenueReportView, SalesExportView
 
 
 urlpatterns = [
@@ -16,5 +16,6 @@ urlpatterns = [
     path("refund-requests/<int:pk>/process/",   ProcessRefundRequestView.as_view(),  name="refund-requests-process"),
     path("refunds/mine/", MyRefundsView.as_view(), name="my-refunds"),
     path("revenue-report/", RevenueReportView.as_view(), name="revenue-report"),
+    path("export/<slug:dataset>.<slug:fmt>", SalesExportView.as_view(), name="sales-export"),
 
 ]
\ No newline at end of file
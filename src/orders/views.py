@@ -1,9 +1,10 @@
+from collections import Counter
 from decimal import Decimal
 from django.utils import timezone, dateparse
+from django.http import Http404, StreamingHttpResponse
 from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models import F, Sum
-from django.db.models.functions import TruncDate
+from django.db.models import F
 from datetime import timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -12,16 +13,22 @@ from rest_framework import status, permissions
 from rest_framework.exceptions import PermissionDenied
 
 from users.permissions import IsProductManager, IsSalesManager
-from cart.models import Cart
+from e_commerce_app.conditional import conditional_response, etag_for, fingerprint
+from e_commerce_app.pagination import KeysetPagination
+from cart.models import Cart, CartItem
 from admin_panel.models import Product
+from invoices.pdf_utils import invalidate_invoice_pdf
+from payment.models import Transaction
 
 from .models import (
+    DailySalesRollup,
     Order,
     OrderItem,
     OrderStatusHistory,
     Refund,
     RefundRequest,
 )
+from . import exports, reports, reservations
 from .serializers import (
     OrderStatusUpdateSerializer,
     OrderSerializer,
@@ -69,22 +76,47 @@ class PlaceOrderView(APIView):
 
     @transaction.atomic
     def post(self, request):
-        cart = Cart.objects.filter(user=request.user, is_active=True).first()
-        if not cart or not cart.items.exists():
+        # the cart the cart views show, never every active cart the user has
+        cart = Cart.objects.active_for(request.user)
+        if cart is None:
             return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # check stock availability
-        for item in cart.items.select_related("product"):
-            if item.quantity > item.product.stock:
+        # hand back lapsed holds on these products first, whether or not the sweeper ran
+        reservations.expire_stale(products=CartItem.objects.filter(cart=cart).values("product_id"))
+
+        # cart lines, their products and discounted prices in one query; the product rows stay
+        # locked (in product-id order, so concurrent checkouts can't deadlock)
+        # until the order is committed
+        lines = list(
+            CartItem.objects
+            .filter(cart=cart)
+            .with_pricing()
+            .select_for_update(of=("product",))
+            .order_by("product_id")
+        )
+        if not lines:
+            return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # check stock and price every line before writing anything; units
+        # held by other unpaid orders are not available
+        needed = Counter()
+        for line in lines:
+            needed[line.product] += line.quantity
+        total = Decimal("0")
+        for line in lines:
+            product = line.product
+            if needed[product] > product.available_stock:
                 return Response(
-                    {"error": f"Not enough stock for {item.product.title}"},
+                    {"error": f"Not enough stock for {product.title}"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            # the same SQL expression the cart shows (cart.models.discounted_unit_price)
+            total += line.line_total
 
-        # create the order
+        # create the order with its final total in the initial insert
         order = Order.objects.create(
             user=request.user,
-            total_price=0,
+            total_price=total,
             shipping_full_name     = request.user.profile.name,
             shipping_phone_number  = request.user.profile.phone_number,
             shipping_address_line1 = request.user.profile.address_line1,
@@ -92,25 +124,21 @@ class PlaceOrderView(APIView):
             shipping_city          = request.user.profile.city,
             shipping_postal_code   = request.user.profile.postal_code,
         )
-        
-        total = Decimal("0")
-        for item in cart.items.select_related("product"):
-            purchase_price = (
-                item.product.price
-                * (Decimal("100") - item.product.discount_percent)
-                / Decimal("100")
-            ).quantize(Decimal("0.01"))
-
-            OrderItem.objects.create(
+
+        # bulk_create skips OrderItem.save, so the title and cost snapshots are filled here
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price_at_purchase=purchase_price,  # ▶︎ MODIFIED
+                product=line.product,
+                quantity=line.quantity,
+                price_at_purchase=line.unit_price,
+                cost_at_purchase=line.product.unit_cost(line.unit_price),
+                product_title=line.product.title,
             )
-            total += purchase_price * item.quantity
-
-        order.total_price = total
-        order.save()
+            for line in lines
+        ])
+        # hold the stock until payment (or until the reservation expires)
+        reservations.reserve(order, needed)
 
         return Response(
             {"message": "Order placed successfully", "order_id": order.id},
@@ -141,7 +169,11 @@ class OrderStatusUpdateView(APIView):
         order.status = new_status
         order.save()
 
-        if new_status == "Cancelled":
+        if new_status == "Cancelled" and not Transaction.objects.filter(order=order).exists():
+            # never paid: stock was only held, so hand the hold back
+            reservations.release(order)
+        elif new_status == "Cancelled":
+            # paid: convert() took the units from stock, whether or not a hold was still active
             for item in order.items.select_related("product").all():
                 Product.objects.filter(pk=item.product.pk).update(
                     stock=F("stock") + item.quantity
@@ -203,6 +235,9 @@ class RefundOrderView(APIView):
 
             total_refund += refund_amount
 
+        # the stored PDF shows refunded quantities and status; render it afresh next time
+        invalidate_invoice_pdf(order)
+
         if all(i.quantity == i.refunded_quantity for i in order.items.all()):
             Order.objects.filter(pk=order.pk).update(status="Refunded")
             OrderStatusHistory.objects.create(order=order, status="Refunded")
@@ -236,16 +271,30 @@ class MyRefundsView(APIView):
 
 class OrderListView(ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsProductManager]
-    queryset = Order.objects.all()
+    queryset = Order.objects.with_items()
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
 
 class MyOrderListView(ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user=self.request.user).with_items()
+
+    def list(self, request, *args, **kwargs):
+        # orders only change by status and refunded quantities once placed; the
+        # item lines also show the product's live title, so that counts too
+        orders = Order.objects.filter(user=request.user).order_by("-created_at", "-id").values_list("pk", "status")
+        items = OrderItem.objects.filter(order__user=request.user).order_by("pk").values_list(
+            "pk", "refunded_quantity", "product__title"
+        )
+        etag = etag_for(request, request.user.id, request.user.username, fingerprint(orders, items))
+        return conditional_response(request, etag, lambda: super(MyOrderListView, self).list(request, *args, **kwargs))
 
 
 class OrderItemsView(APIView):
@@ -291,14 +340,16 @@ class CreateRefundRequestView(APIView):
         return Response(RefundRequestSerializer(rr).data, status=status.HTTP_201_CREATED)
 
 
-class ListRefundRequestsView(APIView):
+class ListRefundRequestsView(ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsSalesManager]
+    serializer_class = RefundRequestSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('requested_at', 'id')
 
-    def get(self, request):
-        qs = RefundRequest.objects.filter(status="Pending").select_related(
+    def get_queryset(self):
+        return RefundRequest.objects.filter(status="Pending").select_related(
             'order_item__product', 'user'
         )
-        return Response(RefundRequestSerializer(qs, many=True).data)
 
 
 class ProcessRefundRequestView(APIView):
@@ -338,6 +389,7 @@ class ProcessRefundRequestView(APIView):
             if not oi.order.items.exclude(refunded_quantity=F("quantity")).exists():
                 Order.objects.filter(pk=oi.order.pk).update(status="Refunded")
                 OrderStatusHistory.objects.create(order=oi.order, status="Refunded")
+            invalidate_invoice_pdf(oi.order)
 
             try:
                 send_mail(
@@ -367,43 +419,78 @@ class RevenueReportView(APIView):
 
         if not start or not end or start > end:
             return Response({"error": "Invalid date range"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # 1) totals for the summary card
-        delivered_ids = OrderStatusHistory.objects.filter(
-            status="Delivered",
-            timestamp__date__range=(start, end)
-        ).values_list("order_id", flat=True)
-        orders        = Order.objects.filter(id__in=delivered_ids)
-        total_rev     = orders.aggregate(total=Sum("total_price"))["total"] or Decimal("0.0")
-        total_cost    = total_rev * Decimal("0.5")
-        total_profit  = total_rev - total_cost
-
-       # 2) new order-date series
-        daily = (
-        Order.objects
-            .filter(
-            id__in=delivered_ids,
-            created_at__date__range=(start, end)
+        group_by = request.GET.get("group_by")
+        if group_by and group_by not in reports.GROUP_BY:
+            return Response(
+                {"error": f"group_by must be one of {', '.join(reports.GROUP_BY)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            .annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(revenue=Sum("total_price"))
-            .order_by("day")
-        )
-
-        chart = [
-        {
-            "period": item["day"].isoformat(),
-            "revenue": float(item["revenue"] or 0.0),
-            "cost":    float((item["revenue"] or 0.0) * Decimal("0.5")),
-            "profit":  float((item["revenue"] or 0.0) * Decimal("0.5")),
-        }
-        for item in daily
-        ]
-
-        return Response({
+        try:
+            top = max(1, int(request.GET.get("top", 10)))
+        except ValueError:
+            return Response({"error": "top must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # one row per day from the rollup table (orders.rollups), not the raw orders
+        days = list(DailySalesRollup.objects.filter(day__range=(start, end)).order_by("day"))
+
+        chart = []
+        for day in days:
+            chart.append({
+                "period":  day.day.isoformat(),
+                "revenue": float(day.revenue),
+                "cost":    float(day.cost),
+                "profit":  float(day.revenue - day.cost),
+                "refunds": float(day.refunds),
+                "units":   day.units,
+                "orders":  day.orders,
+            })
+
+        total_rev    = sum((day.revenue for day in days), Decimal("0"))
+        total_cost   = sum((day.cost for day in days), Decimal("0"))
+        total_profit = total_rev - total_cost
+
+        data = {
         "revenue": float(total_rev),
         "cost":    float(total_cost),
         "profit":  float(total_profit),
+        "refunds": float(sum((day.refunds for day in days), Decimal("0"))),
+        "units":   sum(day.units for day in days),
+        "orders":  sum(day.orders for day in days),
         "chart":   chart,
-        })
\ No newline at end of file
+        }
+        # ?group_by=product|genre|author&top=N: net revenue and profit of the top N
+        if group_by:
+            data["breakdown"] = reports.breakdown(start, end, group_by, top)
+        return Response(data)
+
+
+class SalesExportView(APIView):
+    """
+    GET /api/orders/export/<orders|invoices|refunds>.<csv|ndjson>?start=…&end=…
+    streams every matching row (order exports: one line per order item).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsSalesManager]
+
+    def get(self, request, dataset, fmt):
+        if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+            raise Http404
+        bounds = {}
+        for param in ("start", "end"):
+            value = request.query_params.get(param)
+            try:
+                # None for a malformed value, ValueError for an impossible one (2025-02-30)
+                bounds[param] = dateparse.parse_date(value) if value else None
+            except ValueError:
+                bounds[param] = None
+            if value and not bounds[param]:
+                return Response(
+                    {"error": f"Invalid {param} date, expected an existing YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        filename = f'{dataset}_{bounds["start"] or "all"}_{bounds["end"] or "all"}.{fmt}'
+        return StreamingHttpResponse(
+            exports.stream_export(dataset, fmt, bounds["start"], bounds["end"]),
+            content_type=exports.FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
@@ -14,5 +14,9 @@ class Transaction(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Preparing')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # TransactionHistoryView, newest first
+        indexes = [models.Index(fields=["user", "created_at"], name="transaction_user_created_idx")]
+
     def __str__(self):
         return f"Transaction for {self.user.username} - {self.status}"
\ No newline at end of file
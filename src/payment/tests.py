@@ -4,11 +4,16 @@ from django.contrib.auth import get_user_model
 from orders.models import Order, OrderItem
 from admin_panel.models import Product, Genre
 from payment.models import Transaction
+from invoices.models import InvoiceJob
 from unittest.mock import patch
+from django.test import override_settings
+import tempfile
 from datetime import datetime, timedelta
+from e_commerce_app.testing import QueryPlanAssertions
 
 User = get_user_model()
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="payment-tests-"))
 class PaymentViewsTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='john', password='pass')
@@ -75,8 +80,8 @@ class PaymentViewsTests(APITestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.data['error'], "Invalid CVV")
 
-    @patch("payment.views.generate_invoice_pdf", return_value=b"%PDF%")
-    @patch("payment.views.send_invoice_email")
+    @patch("invoices.pdf_utils.generate_invoice_pdf", return_value=b"%PDF%")
+    @patch("invoices.tasks.send_invoice_email")
     def test_successful_payment_flow(self, mock_send_email, mock_gen_pdf):
         url = reverse('process-payment', kwargs={'order_id': self.order.id})
         valid_data = {
@@ -84,7 +89,9 @@ class PaymentViewsTests(APITestCase):
             "expiry": (datetime.now() + timedelta(days=365)).strftime("%m/%y"),
             "cvv": "123"
         }
-        resp = self.client.post(url, valid_data)
+        # the invoice PDF and email are jobs dispatched once the payment commits
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(url, valid_data)
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data["message"], "Payment processed successfully")
 
@@ -93,3 +100,39 @@ class PaymentViewsTests(APITestCase):
 
         self.assertTrue(Transaction.objects.filter(user=self.user, order=self.order).exists())
         mock_send_email.assert_called_once()
+        self.assertEqual(
+            set(InvoiceJob.objects.filter(invoice_id=resp.data["invoice_id"]).values_list("status", flat=True)),
+            {InvoiceJob.SUCCEEDED},
+        )
+
+    @patch("invoices.pdf_utils.generate_invoice_pdf")
+    def test_payment_does_not_wait_for_invoice(self, mock_gen_pdf):
+        url = reverse('process-payment', kwargs={'order_id': self.order.id})
+        valid_data = {
+            "card_number": "4111111111111111",
+            "expiry": (datetime.now() + timedelta(days=365)).strftime("%m/%y"),
+            "cvv": "123"
+        }
+        resp = self.client.post(url, valid_data)
+        self.assertEqual(resp.status_code, 200)
+
+        # nothing rendered in the request; the jobs wait in the outbox for the commit
+        mock_gen_pdf.assert_not_called()
+        self.assertEqual(
+            set(InvoiceJob.objects.filter(invoice_id=resp.data["invoice_id"]).values_list("status", flat=True)),
+            {InvoiceJob.PENDING},
+        )
+
+
+class TransactionIndexPlanTests(QueryPlanAssertions, APITestCase):
+    def setUp(self):
+        users = [User.objects.create_user(username=f"payer{n}", email=f"payer{n}@example.com", password="pass") for n in range(5)]
+        orders = Order.objects.bulk_create([Order(user=user, total_price=10) for user in users for _ in range(10)])
+        Transaction.objects.bulk_create([Transaction(user=order.user, order=order) for order in orders])
+        self.client.force_authenticate(users[0])
+
+    def test_transaction_history(self):
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('transaction-history')),
+            "payment_transaction", "transaction_user_created_idx",
+        )
@@ -5,20 +5,19 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.shortcuts import get_object_or_404
 from datetime import datetime
-from orders.models import Order, OrderItem
-from admin_panel.models import Product
+from orders.models import Order
+from orders.reservations import InsufficientStock, convert as convert_reservations, expire_stale
 from .models import Transaction
 from cart.models import Cart
 from rest_framework import generics, serializers
 from rest_framework.permissions import IsAuthenticated
 from .models import Transaction
 from .serializers import TransactionSerializer
+from e_commerce_app.pagination import KeysetPagination
 from django.db import transaction
 from invoices.models import Invoice
-from invoices.pdf_utils import generate_invoice_pdf  # Import the missing function
-from invoices.email_utils import send_invoice_email
+from invoices.tasks import enqueue_invoice_pipeline
 from django.template.loader import render_to_string
-from django.db.models import F
 
 class ProcessPaymentView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -74,21 +73,15 @@ class ProcessPaymentView(APIView):
         # --- All validations passed; **now** we mutate the DB ---
         try:
             with transaction.atomic():
-                items = OrderItem.objects.filter(order=order).select_related("product")
-
-                # Decrement stock & bump ordered_number in one shot per product
-                for item in items:
-                    updated = Product.objects.filter(
-                        pk=item.product.pk,
-                        stock__gte=item.quantity
-                    ).update(
-                        stock=F("stock") - item.quantity,
-                        ordered_number=F("ordered_number") + item.quantity
-                    )
-                    if not updated:
-                        raise serializers.ValidationError(
-                            f"Not enough stock for {item.product.title}"
-                        )
+                # lapsed holds (ours included) go back to free stock first,
+                # even if the sweeper hasn't run
+                expire_stale(products=order.items.values("product_id"))
+                # Turn the stock held at checkout into a real decrement
+                # (and bump ordered_number) for every item
+                try:
+                    convert_reservations(order)
+                except InsufficientStock as e:
+                    raise serializers.ValidationError(str(e))
 
                 # 6) Mark paid and record transaction
                 Order.objects.filter(pk=order.pk).update(status="Processing")
@@ -106,23 +99,16 @@ class ProcessPaymentView(APIView):
                     cart.items.all().delete()
                     Cart.objects.filter(pk=cart.pk).update(is_active=False)
 
+                # 8) Invoice + outbox rows; the PDF render and the email run
+                #    as Celery jobs once this transaction commits
+                invoice = Invoice.objects.create(order=order)
+                enqueue_invoice_pipeline(invoice)
+
         except serializers.ValidationError as e:
             order.delete()
             return Response({"error": str(e.detail)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # -------------------
-        # 8–9) Non-DB work: invoice, PDF & email
-        # -------------------
-        invoice = Invoice.objects.create(order=order)
-        pdf_bytes = generate_invoice_pdf(invoice.order)
-        try:
-            send_invoice_email(
-                invoice.order.user.email,
-                pdf_bytes,
-                invoice.order.id
-            )
-        except Exception as e:
-            print(f"MAIL FAILED: {e}")
+        # 9) Printable HTML for the confirmation page (a template render, no PDF)
         invoice_html = render_to_string(
             "invoices/invoice.html", {"order": order}
         )
@@ -131,6 +117,7 @@ class ProcessPaymentView(APIView):
         return Response(
             {
                 "message": "Payment processed successfully",
+                "invoice_id": invoice.id,
                 "invoice_html": invoice_html,
             },
             status=status.HTTP_200_OK,
@@ -143,6 +130,7 @@ class TransactionHistoryView(generics.ListAPIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class   = TransactionSerializer
+    pagination_class   = KeysetPagination
 
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user).order_by('-created_at')
\ No newline at end of file
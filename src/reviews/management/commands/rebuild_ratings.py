@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from admin_panel.catalog_cache import bump_generation
+from admin_panel.models import Product
+from reviews.models import Review
+
+class Command(BaseCommand):
+    help = 'Recomputes every product’s rating aggregate (sum, count, average) from its approved reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk_update batch')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        totals = {
+            row['product']: (row['stars_sum'], row['stars_count'])
+            for row in Review.objects.filter(approved=True)
+                                     .values('product')
+                                     .annotate(stars_sum=Sum('stars'), stars_count=Count('id'))
+        }
+
+        # lock the rows so concurrent reviews can't interleave with the rebuild
+        products = list(
+            Product.objects.select_for_update().only('id', 'rating_sum', 'rating_count', 'rating')
+        )
+        for product in products:
+            stars_sum, stars_count = totals.get(product.pk, (0, 0))
+            product.rating_sum = stars_sum
+            product.rating_count = stars_count
+            product.rating = round(stars_sum / stars_count, 2) if stars_count else 0
+
+        Product.objects.bulk_update(
+            products,
+            ['rating_sum', 'rating_count', 'rating'],
+            batch_size=options['batch_size'],
+        )
+        bump_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt ratings for {len(products)} products ({len(totals)} with reviews)."
+        ))
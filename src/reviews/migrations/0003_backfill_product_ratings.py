@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:05
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model("admin_panel", "Product")
+    Review = apps.get_model("reviews", "Review")
+
+    rows = (
+        Review.objects.filter(approved=True)
+        .values("product")
+        .annotate(stars_sum=Sum("stars"), stars_count=Count("id"))
+    )
+    for row in rows:
+        Product.objects.filter(pk=row["product"]).update(
+            rating_sum=row["stars_sum"],
+            rating_count=row["stars_count"],
+            rating=round(row["stars_sum"] / row["stars_count"], 2),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0002_product_rating_aggregate"),
+        ("reviews", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -17,5 +17,9 @@ class Review(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     approved = models.BooleanField(default=True)
 
+    class Meta:
+        # ReviewListView: a product's approved reviews
+        indexes = [models.Index(fields=["product", "status", "approved"], name="review_product_status_idx")]
+
     def __str__(self):
         return f"{self.user.username} - {self.product.title}"
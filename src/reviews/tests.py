@@ -1,3 +1,122 @@
-from django.test import TestCase
+from rest_framework.test import APITestCase, APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from admin_panel.models import Genre, Product
+from orders.models import Order, OrderItem
+from reviews.models import Review
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from e_commerce_app.testing import QueryPlanAssertions
 
-# Create your tests here.
\ No newline at end of file
+User = get_user_model()
+
+class ReviewRatingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", email="reader@example.com", password="testpass")
+        self.pm_user = User.objects.create_user(username="pm", email="pm@example.com", password="testpass")
+        pm_group, _ = Group.objects.get_or_create(name="product manager")
+        self.pm_user.groups.add(pm_group)
+
+        self.genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.product = Product.objects.create(
+            title="Rated Book",
+            author="Author",
+            price=Decimal("20.00"),
+            stock=10,
+            genre=self.genre,
+            isbn="1111111111111",
+            description="A book worth rating.",
+            publisher="Test Publisher",
+            publication_date=date.today(),
+            pages=100,
+            language="English",
+        )
+
+        order = Order.objects.create(user=self.user, total_price=Decimal("20.00"), status="Delivered")
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, price_at_purchase=Decimal("20.00"))
+
+        self.client_user = APIClient()
+        self.client_user.force_authenticate(self.user)
+
+        self.client_pm = APIClient()
+        self.client_pm.force_authenticate(self.pm_user)
+
+    def _review(self, stars):
+        url = reverse('create-review')
+        response = self.client_user.post(
+            url, {"product": self.product.id, "stars": stars, "review_text": "ok"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, msg=response.data)
+        return Review.objects.get(pk=response.data["id"])
+
+    def test_create_review_updates_rating(self):
+        self._review(4)
+        self._review(5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_sum, 9)
+        self.assertEqual(self.product.rating_count, 2)
+        self.assertEqual(self.product.rating, 4.5)
+
+    def test_reject_review_removes_rating(self):
+        self._review(4)
+        review = self._review(1)
+        response = self.client_pm.post(reverse('review-reject', kwargs={"pk": review.id}))
+        self.assertEqual(response.status_code, 200)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, 1)
+        self.assertEqual(self.product.rating, 4.0)
+
+    def test_approve_review_keeps_rating(self):
+        review = self._review(3)
+        response = self.client_pm.post(reverse('review-approve', kwargs={"pk": review.id}))
+        self.assertEqual(response.status_code, 200)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, 1)
+        self.assertEqual(self.product.rating, 3.0)
+
+    def test_product_list_reads_persisted_rating(self):
+        self._review(2)
+        response = self.client.get(reverse('product-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["rating"], 2.0)
+
+    def test_rebuild_ratings_command(self):
+        Review.objects.create(user=self.user, product=self.product, stars=5, review_text="a")
+        Review.objects.create(user=self.user, product=self.product, stars=2, review_text="b")
+        Review.objects.create(user=self.user, product=self.product, stars=1, review_text="c", approved=False)
+
+        call_command("rebuild_ratings", stdout=StringIO())
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_sum, 7)
+        self.assertEqual(self.product.rating_count, 2)
+        self.assertEqual(self.product.rating, 3.5)
+
+
+class ReviewIndexPlanTests(QueryPlanAssertions, APITestCase):
+    def setUp(self):
+        genre, _ = Genre.objects.get_or_create(name="Fiction")
+        self.products = Product.objects.bulk_create([
+            Product(
+                title=f"Reviewed {n}", author="Author", price=10, stock=10, isbn=f"97877777777{n:02d}",
+                slug=f"reviewed-{n}", genre=genre, description="d", publisher="p",
+                publication_date=date(2020, 1, 1), pages=100, language="EN",
+            )
+            for n in range(10)
+        ])
+        user = User.objects.create_user(username="critic", email="critic@example.com", password="pass")
+        Review.objects.bulk_create([
+            Review(user=user, product=product, stars=4, review_text="ok", status=s, approved=s == "approved")
+            for product in self.products for s in ("pending", "approved", "rejected")
+        ])
+
+    def test_product_reviews(self):
+        self.assertEndpointUsesIndex(
+            lambda: self.client.get(reverse('review-list'), {"product": self.products[3].id}),
+            "reviews_review", "review_product_status_idx",
+        )
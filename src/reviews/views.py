@@ -5,8 +5,8 @@ from .models import Review
 from .serializers import ReviewSerializer
 from orders.models import OrderItem
 from admin_panel.models import Product
-from django.db.models import Avg
 from users.permissions import IsProductManager
+from e_commerce_app.pagination import KeysetPagination
 from rest_framework.views import APIView
 from rest_framework import status
 from django.db import transaction
@@ -31,13 +31,9 @@ class ReviewCreateView(generics.CreateAPIView):
             status='pending'
         )
 
-        # 2) Recalculate and persist the product’s average rating
-        avg = Review.objects.filter(product=product).aggregate(
-            avg=Avg('stars')
-        )['avg'] or 0
-
-        product.rating = round(avg, 2)
-        product.save()
+        # 2) Fold the stars into the product’s persisted rating aggregate
+        if review.approved:
+            product.add_rating(review.stars)
 
 class ReviewListView(generics.ListAPIView):
     """
@@ -62,6 +58,7 @@ class PendingReviewListView(generics.ListAPIView):
     """
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated, IsProductManager]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Review.objects.filter(status='pending').order_by('created_at')
@@ -72,8 +69,14 @@ class ReviewApproveView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated, IsProductManager]
 
+    @transaction.atomic
     def post(self, request, pk):
-        review = get_object_or_404(Review, pk=pk, status='pending')
+        review = get_object_or_404(
+            Review.objects.select_for_update(), pk=pk, status='pending'
+        )
+        if not review.approved:
+            review.product.add_rating(review.stars)
+            review.approved = True
         review.status = 'approved'
         review.save()
         return Response({'status':'approved'}, status=status.HTTP_200_OK)
@@ -85,8 +88,15 @@ class ReviewRejectView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated, IsProductManager]
 
+    @transaction.atomic
     def post(self, request, pk):
-        review = get_object_or_404(Review, pk=pk, status='pending')
+        review = get_object_or_404(
+            Review.objects.select_for_update(), pk=pk, status='pending'
+        )
+        # a rejected review no longer counts towards the product's rating
+        if review.approved:
+            review.product.remove_rating(review.stars)
+            review.approved = False
         review.status = 'rejected'
         review.save()
         return Response({'status':'rejected'}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .roles import ROLES_CLAIM, set_roles
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the token's `roles` claim (JWT_ROLE_CLAIMS),
+    so permission checks on token-authenticated requests skip the groups query.
+    Tokens without the claim fall back to the database as before.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        roles = validated_token.get(ROLES_CLAIM)
+        if roles is not None:
+            set_roles(user, roles)
+        return user
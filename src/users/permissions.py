@@ -1,25 +1,27 @@
 from rest_framework.permissions import BasePermission, IsAdminUser
 
+from .roles import CUSTOMER, PRODUCT_MANAGER, SALES_MANAGER, has_role
+
 class IsCustomer(BasePermission):
     """
     Allows access only to users in the 'customer' group.
     """
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.groups.filter(name="customer").exists()
+        return has_role(request.user, CUSTOMER)
 
 class IsProductManager(BasePermission):
     """
     Allows access only to users in the 'product manager' group.
     """
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.groups.filter(name="product manager").exists()
+        return has_role(request.user, PRODUCT_MANAGER)
 
 class IsSalesManager(BasePermission):
     """
     Allows access only to users in the 'sales manager' group.
     """
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.groups.filter(name="sales manager").exists()
+        return has_role(request.user, SALES_MANAGER)
     
 class IsProductManagerOrSalesManager(BasePermission):
     """
@@ -27,9 +29,4 @@ class IsProductManagerOrSalesManager(BasePermission):
     group or the 'sales manager' group.
     """
     def has_permission(self, request, view):
-        user = request.user
-        return (
-            user.is_authenticated and
-            (user.groups.filter(name="product manager").exists() or
-             user.groups.filter(name="sales manager").exists())
-        )
\ No newline at end of file
+        return has_role(request.user, PRODUCT_MANAGER, SALES_MANAGER)
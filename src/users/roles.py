@@ -0,0 +1,43 @@
+"""
+Request-scoped role resolution for users.permissions and friends.
+
+A user's roles are the names of their groups. They are loaded at most once
+per user object, which DRF creates fresh for every request, so each request
+pays for one groups query however many permission checks it runs. With
+JWT_ROLE_CLAIMS the access token carries the roles (see
+users.serializers.RoleTokenObtainPairSerializer) and
+users.authentication.RoleClaimJWTAuthentication seeds the cache from the
+token, so no query is needed at all.
+"""
+CUSTOMER = "customer"
+PRODUCT_MANAGER = "product manager"
+SALES_MANAGER = "sales manager"
+
+ROLES_CLAIM = "roles"
+_CACHE_ATTR = "_role_names"
+
+
+def get_roles(user):
+    """Group names of `user` as a frozenset; empty for anonymous users."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, _CACHE_ATTR, None)
+    if roles is None:
+        roles = frozenset(user.groups.values_list("name", flat=True))
+        setattr(user, _CACHE_ATTR, roles)
+    return roles
+
+
+def set_roles(user, roles):
+    """Seed the cache, e.g. from a token claim."""
+    setattr(user, _CACHE_ATTR, frozenset(roles))
+
+
+def invalidate_roles(user):
+    """Forget the cached roles after changing the user's groups."""
+    user.__dict__.pop(_CACHE_ATTR, None)
+
+
+def has_role(user, *names):
+    """True if the user has any of the given roles."""
+    return not get_roles(user).isdisjoint(names)
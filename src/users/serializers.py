@@ -1,6 +1,13 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
 from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .roles import ROLES_CLAIM, get_roles
 
 # Serializer for Registration
 class RegisterSerializer(serializers.ModelSerializer):
@@ -14,4 +21,35 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data['password'] = make_password(validated_data['password'])
-        return get_user_model().objects.create(**validated_data)
\ No newline at end of file
+        return get_user_model().objects.create(**validated_data)
+
+# JWT with role claims (settings.JWT_ROLE_CLAIMS), read by users.authentication
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # issuing tokens is a login: lets receivers such as the guest-cart merge run
+        user_logged_in.send(sender=self.user.__class__, request=self.context.get("request"), user=self.user)
+        return data
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        if settings.JWT_ROLE_CLAIMS:
+            # claims on the refresh token are copied into every access token it issues
+            token[ROLES_CLAIM] = sorted(get_roles(user))
+        return token
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if settings.JWT_ROLE_CLAIMS:
+            # re-read the roles so group changes reach clients at their next refresh
+            access = AccessToken(data["access"])
+            user = get_user_model().objects.filter(
+                **{jwt_settings.USER_ID_FIELD: access[jwt_settings.USER_ID_CLAIM]}
+            ).first()
+            if user is not None:
+                access[ROLES_CLAIM] = sorted(get_roles(user))
+                data["access"] = str(access)
+        return data
@@ -2,7 +2,7 @@ from django.contrib.auth.signals import user_logged_in
 from django.contrib.auth.models import Group
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from cart.models import Cart, CartItem
+from cart.merge import merge_guest_cart
 from .models import User, Profile
 from django.db import transaction
 
@@ -13,4 +13,12 @@ def create_user_profile(sender, instance, created, **kwargs):
         customer_group, _ = Group.objects.get_or_create(name="customer")
         instance.groups.add(customer_group) # Assign new users to the "customer" group by default
         
-        Profile.objects.create(user=instance, email=instance.email)
\ No newline at end of file
+        Profile.objects.create(user=instance, email=instance.email)
+
+@receiver(user_logged_in)
+def merge_guest_cart_on_login(sender, request, user, **kwargs):
+    # fired by session login and by JWT issuance (users.serializers / register_view);
+    # session login has already cycled the key, so use the one the request came with
+    if request is not None and hasattr(request, "session"):
+        session_key = getattr(request, "guest_session_key", None) or request.session.session_key
+        merge_guest_cart(session_key, user)
@@ -2,7 +2,11 @@ from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
 from users.models import Profile
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from decimal import Decimal
 from datetime import date
@@ -10,6 +14,7 @@ from datetime import date
 from admin_panel.models import Product, Genre
 from cart.models import Cart, CartItem
 from orders.models import Order, OrderItem, Refund
+from users.roles import get_roles, has_role, invalidate_roles
 
 User = get_user_model()
 
@@ -155,4 +160,64 @@ class UserViewsTests(APITestCase):
 
         resp = self.client.post(url, payload, format="json")
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("Cannot refund 5", resp.data["error"])
\ No newline at end of file
+        self.assertIn("Cannot refund 5", resp.data["error"])
+
+class RoleResolutionTests(APITestCase):
+    def setUp(self):
+        self.pm = User.objects.create_user(username="pm", email="pm@example.com", password="pass123")
+        self.pm.groups.add(Group.objects.get_or_create(name="product manager")[0])
+        self.order = Order.objects.create(user=self.pm, total_price=Decimal("10.00"))
+        self.url = reverse('order-detail', kwargs={'pk': self.order.pk})
+
+    def _group_queries(self, client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in ctx.captured_queries if "users_user_groups" in q["sql"]]
+
+    def _token(self):
+        response = self.client.post(reverse('token_obtain_pair'), {"username": "pm", "password": "pass123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_roles_are_loaded_once_per_user_object(self):
+        user = User.objects.get(pk=self.pm.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(has_role(user, "product manager"))
+            self.assertTrue(has_role(user, "product manager", "sales manager"))
+            self.assertFalse(has_role(user, "sales manager"))
+        invalidate_roles(user)
+        with self.assertNumQueries(1):
+            get_roles(user)
+
+    def test_request_resolves_roles_once(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.pm.pk))
+        # permission class + OrderViewSet.get_queryset used to query separately
+        self.assertEqual(len(self._group_queries(client)), 1)
+
+    @override_settings(JWT_ROLE_CLAIMS=True)
+    def test_jwt_role_claims_skip_group_queries(self):
+        tokens = self._token()
+        self.assertEqual(AccessToken(tokens["access"])["roles"], ["customer", "product manager"])
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self._group_queries(client), [])
+
+    @override_settings(JWT_ROLE_CLAIMS=True)
+    def test_refresh_picks_up_group_changes(self):
+        tokens = self._token()
+        self.pm.groups.add(Group.objects.get_or_create(name="sales manager")[0])
+
+        response = self.client.post(reverse('token_refresh'), {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["roles"], ["customer", "product manager", "sales manager"])
+
+    def test_jwt_without_role_claims_falls_back_to_database(self):
+        tokens = self._token()
+        self.assertNotIn("roles", AccessToken(tokens["access"]).payload)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(len(self._group_queries(client)), 1)
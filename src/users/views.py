@@ -3,6 +3,7 @@ from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.forms.models import model_to_dict
 from django.contrib.auth import login, logout, get_user_model
+from django.contrib.auth.signals import user_logged_in
 from django.http import JsonResponse
 from django.db import IntegrityError, transaction
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
@@ -19,7 +20,8 @@ from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 
 from .models import User, Profile
 from .forms import RegisterForm, ProfileForm
-from .serializers import RegisterSerializer
+from .serializers import RegisterSerializer, RoleTokenObtainPairSerializer
+from .roles import get_roles
 
 import json
 
@@ -34,7 +36,8 @@ def register_view(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleTokenObtainPairSerializer.get_token(user)
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
         return Response({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -125,7 +128,7 @@ def profile_update_view(request):
 @permission_classes([IsAuthenticated])
 def user_info(request):
     user = request.user
-    roles = list(user.groups.values_list('name', flat=True))
+    roles = sorted(get_roles(user))
     return Response({
         "username": user.username,
         "roles": roles,
@@ -183,3 +183,17 @@ class WishlistAPITests(TestCase):
         self.assertIn("slug", item)
         self.assertEqual(item["slug"], self.prod1.slug)
 
+
+    # ---------- conditional GET ----------
+    def test_unchanged_wishlist_answers_304(self):
+        WishlistItem.objects.create(user=self.user1, product=self.prod1)
+        etag = self.c1.get(self.list_url)["ETag"]
+        res = self.c1.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        # another user's copy is not this user's
+        self.assertEqual(self.c2.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        Product.objects.filter(pk=self.prod1.pk).update(discount_percent=Decimal("5"))
+        res = self.c1.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["items"][0]["product"]["discount_percent"], "5.00")
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
+from e_commerce_app.conditional import conditional_response, etag_for, fingerprint
 
 from .models import WishlistItem
 from .serializers import WishlistItemSerializer, WishlistResponseSerializer
@@ -35,8 +36,13 @@ class WishlistViewSet(viewsets.GenericViewSet):
 
     # ----- endpoints --------------------------------------------------------
     def list(self, request, *args, **kwargs):
-        """GET /wishlist/"""
-        return self._response()
+        """GET /wishlist/  (conditional: answers If-None-Match with 304)"""
+        rows = self._items_qs().order_by("pk").values_list(
+            "pk", "added_at", "product_id", "product__title", "product__slug", "product__price",
+            "product__cover_image", "product__discount_percent",
+        )
+        etag = etag_for(request, request.user.id, fingerprint(rows))
+        return conditional_response(request, etag, self._response)
 
     @action(detail=False, methods=["post"], url_path="add")
     def add(self, request, *args, **kwargs):